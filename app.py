@@ -1,15 +1,13 @@
+import time
+_inicio_importacion = time.perf_counter()
+
 import streamlit as st
 from datetime import datetime
 from auth.auth import login_form
-from modules.database import DatabaseManager
-from interfaces.sidebar import SidebarManager
-from modules.logic.regist_compras_gastos_logic import RegistroManager
-from interfaces.registro.regist_comp_gast_ui import RegistroUI
-from modules.logic.cons_compras_gastos_logic import ConsultasComprasGastosLogic
-from interfaces.consultas.cons_compras_gastos_ui import ConsultasComprasGastosUI
-from utils.data_service import DataService
-from modules.logic.precio_ponderado_logic import PrecioPonderadoLogic
-from interfaces.analisis.precio_ponderado_ui import PrecioPonderadoUI
+from utils.instrumentacion import Instrumentacion
+
+# Solo lo necesario para el login; vistas y lógica se importan al elegirlas (interfaces.rutas)
+Instrumentacion.registrar_importacion("app (login)", time.perf_counter() - _inicio_importacion)
 
 # ======================
 #  CONFIGURACIÓN INICIAL
@@ -48,20 +46,19 @@ def manejar_autenticacion():
 # ======================
 @st.cache_resource
 def inicializar_componentes():
-    if 'registros_temporales' not in st.session_state:
-        st.session_state.registros_temporales = []
-    
+    from interfaces.rutas import importar
+
     # Crear la instancia única de DatabaseManager
-    db = DatabaseManager()
+    db = importar("modules.database").DatabaseManager()
+
+    # Diario de escritura diferida (None si ESCRITURA_DIFERIDA no está activa)
+    diario = importar("modules.diario_escritura").DiarioEscritura.desde_configuracion()
 
     # Crear servicio de datos
-    data_service = DataService(db)
+    data_service = importar("utils.data_service").DataService(db, diario=diario)
 
     return {
-        'data_service': data_service,
-        'registro_manager': RegistroManager(data_service),
-        'consultas_compras_gastos_logic': ConsultasComprasGastosLogic(data_service),
-        'precio_ponderado_logic': PrecioPonderadoLogic(data_service)
+        'data_service': data_service
     }
 
 # ======================
@@ -81,31 +78,24 @@ def mostrar_footer():
 def main():
     # Configuración inicial
     configuracion_inicial()
+    Instrumentacion.iniciar_rerun()
     manejar_autenticacion()
     
-    # Inicialización de componentes
+    # Inicialización de componentes (después del login)
+    from interfaces.rutas import RegistroRutas, importar
     componentes = inicializar_componentes()
-    sidebar = SidebarManager()
-
-    registro_ui = RegistroUI(componentes['registro_manager'])
-    consultas_compras_gastos_ui = ConsultasComprasGastosUI(componentes['consultas_compras_gastos_logic'])
-    precio_ponderado_ui = PrecioPonderadoUI(componentes['precio_ponderado_logic'])
+    sidebar = importar("interfaces.sidebar").SidebarManager()
+    sidebar.mostrar_estado_envios(componentes['data_service'].diario)
     
     # Elementos de la sidebar
     #with st.sidebar:
         #mostrar_footer()
     
-    # Sistema de routing
-    opciones_menu = {
-        "Registro": lambda: registro_ui.mostrar_interfaz(),
-        "Consulta": lambda: consultas_compras_gastos_ui.mostrar_interfaz(),
-        #"Análisis": acceder a la ineterfaz de analisis
-        "Precio Ponderado": lambda: precio_ponderado_ui.mostrar_interfaz() #provisional
-    }
-    
-    # Ejecutar vista seleccionada
-    opcion_seleccionada = sidebar.menu_option
-    opciones_menu.get(opcion_seleccionada, lambda: st.error("Opción no válida"))()
+    # Sistema de routing: solo se importa y construye la vista seleccionada
+    RegistroRutas.mostrar(sidebar.menu_option, componentes['data_service'])
+
+    # Desglose de tiempos del rerun (solo administradores)
+    sidebar.mostrar_panel_rendimiento()
 
 # ======================
 #  EJECUCIÓN PRINCIPAL
@@ -1,10 +1,11 @@
 import streamlit as st
 import hashlib
-from supabase import create_client
 
 # Configuración inicial
 def init_auth():
     """Inicializa la conexión a Supabase para autenticación"""
+    # Importación diferida: el formulario de login se pinta sin cargar supabase
+    from supabase import create_client
     return create_client(
         st.secrets["SUPABASE_URL"],
         st.secrets["SUPABASE_KEY"]
@@ -0,0 +1,73 @@
+"""Tiempo de importación en frío de la app y de cada ruta del menú.
+
+Uso:
+    python -m benchmarks.arranque --repeticiones 5
+
+Cada medición corre en un proceso nuevo de Python, como un contenedor
+recién arrancado. 'app' es lo que se importa antes de pintar el login; cada
+ruta añade el módulo de su vista y el de su lógica sobre la app ya cargada.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.run import DIRECTORIO_RESULTADOS
+from interfaces.rutas import RUTAS
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+_MEDIR = """
+import time, importlib
+for modulo in {previos!r}:
+    importlib.import_module(modulo)
+inicio = time.perf_counter()
+for modulo in {modulos!r}:
+    importlib.import_module(modulo)
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir_importacion(modulos: list[str], previos: list[str] = (), repeticiones: int = 5) -> dict:
+    """Segundos para importar `modulos` en un proceso nuevo (tras importar `previos`)"""
+    codigo = _MEDIR.format(modulos=list(modulos), previos=list(previos))
+    tiempos = [
+        float(subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1])
+        for _ in range(repeticiones)
+    ]
+    return {"min_s": min(tiempos), "mediana_s": statistics.median(tiempos), "max_s": max(tiempos)}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importación en frío de la app y sus rutas")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", type=Path, default=None)
+    args = parser.parse_args(argumentos)
+
+    casos = {"app": (["app"], [])}
+    casos["sidebar"] = (["interfaces.sidebar"], ["app"])
+    for nombre, ruta in RUTAS.items():
+        casos[f"ruta {nombre}"] = ([ruta["vista"][0], ruta["logica"][0]], ["app", "interfaces.sidebar"])
+
+    resultados = []
+    for caso, (modulos, previos) in casos.items():
+        medicion = medir_importacion(modulos, previos, args.repeticiones)
+        resultados.append({"caso": caso, "modulos": modulos, **medicion})
+        print(f"  {caso:<28} mediana {medicion['mediana_s'] * 1000:9.1f} ms")
+
+    salida = args.salida or DIRECTORIO_RESULTADOS / f"arranque_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps({
+        "meta": {"fecha": datetime.now().isoformat(timespec="seconds"), "repeticiones": args.repeticiones},
+        "resultados": resultados
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados escritos en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Generador determinista de datos sintéticos para compras, gastos y ventas.
+
+Las cardinalidades imitan a un restaurante real: unos cientos de productos
+con una distribución de popularidad tipo Zipf, unas decenas de proveedores
+y fechas repartidas en varios años.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.validators import ValidadorRegistros
+
+BASES_PRODUCTO = [
+    "Pollo", "Res", "Cerdo", "Pescado", "Camarón", "Arroz", "Frijol", "Papa",
+    "Tomate", "Cebolla", "Ajo", "Zanahoria", "Lechuga", "Limón", "Aguacate",
+    "Queso", "Leche", "Crema", "Mantequilla", "Huevo", "Harina", "Azúcar",
+    "Sal", "Aceite", "Café", "Plátano", "Maíz", "Pimentón", "Cilantro", "Champiñón"
+]
+VARIANTES_PRODUCTO = [
+    "", "entero", "fileteado", "orgánico", "premium", "importado", "nacional",
+    "en lata", "congelado", "fresco"
+]
+UNIDADES = ["unidad", "kg", "litros", "paquete"]
+CATEGORIAS_GASTO = ["equipos", "nomina", "servicios", "otros"]
+CONCEPTOS_GASTO = [
+    "Electricidad", "Agua", "Gas", "Internet", "Nómina cocina", "Nómina sala",
+    "Mantenimiento", "Licuadora", "Horno", "Limpieza", "Publicidad", "Contabilidad"
+]
+GRUPOS_VENTA = {
+    "Entradas": 12, "Sopas": 8, "Platos fuertes": 30, "Parrilla": 15,
+    "Mariscos": 12, "Postres": 10, "Bebidas": 20, "Licores": 13
+}
+
+
+def _probabilidades_zipf(n: int, exponente: float = 1.1) -> np.ndarray:
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def _fechas(rng, n: int, fecha_fin: date, dias: int) -> np.ndarray:
+    desplazamientos = rng.integers(0, dias, size=n)
+    inicio = np.datetime64(fecha_fin - timedelta(days=dias - 1))
+    return (inicio + desplazamientos.astype("timedelta64[D]")).astype(str)
+
+
+def catalogo_productos(rng) -> pd.DataFrame:
+    nombres = [f"{base} {variante}".strip() for base in BASES_PRODUCTO for variante in VARIANTES_PRODUCTO]
+    return pd.DataFrame({
+        "producto": nombres,
+        "producto_clave": [ValidadorRegistros.normalizar_producto(nombre) for nombre in nombres],
+        "unidad_medida": rng.choice(UNIDADES, size=len(nombres), p=[0.3, 0.4, 0.15, 0.15]),
+        "precio_base": np.round(rng.lognormal(mean=2.5, sigma=0.8, size=len(nombres)), 2)
+    })
+
+
+def generar_compras(n: int, semilla: int = 42, fecha_fin: date = date(2025, 12, 31), dias: int = 3 * 365) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    catalogo = catalogo_productos(rng)
+    proveedores = np.array([f"Proveedor {i:02d}" for i in range(1, 41)])
+
+    indices = rng.choice(len(catalogo), size=n, p=_probabilidades_zipf(len(catalogo)))
+    cantidad = np.round(rng.lognormal(mean=1.0, sigma=0.7, size=n), 3) + 0.001
+    precio = catalogo["precio_base"].to_numpy()[indices] * rng.normal(1.0, 0.08, size=n).clip(0.7, 1.3)
+
+    return pd.DataFrame({
+        "fecha": _fechas(rng, n, fecha_fin, dias),
+        "categoria": "mercancía",
+        "producto": catalogo["producto"].to_numpy()[indices],
+        "producto_clave": catalogo["producto_clave"].to_numpy()[indices],
+        "cantidad": cantidad,
+        "unidad_medida": catalogo["unidad_medida"].to_numpy()[indices],
+        "monto": np.round(cantidad * precio, 2),
+        "proveedor": proveedores[rng.choice(len(proveedores), size=n, p=_probabilidades_zipf(len(proveedores), 0.8))],
+        "descripcion": None
+    })
+
+
+def generar_gastos(n: int, semilla: int = 42, fecha_fin: date = date(2025, 12, 31), dias: int = 3 * 365) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla + 1)
+    conceptos = rng.choice(CONCEPTOS_GASTO, size=n)
+    return pd.DataFrame({
+        "fecha": _fechas(rng, n, fecha_fin, dias),
+        "producto": conceptos,
+        "producto_clave": ValidadorRegistros.normalizar_productos(pd.Series(conceptos)).to_numpy(),
+        "categoria": rng.choice(CATEGORIAS_GASTO, size=n, p=[0.1, 0.4, 0.35, 0.15]),
+        "monto": np.round(rng.lognormal(mean=4.5, sigma=1.0, size=n), 2),
+        "descripcion": None,
+        "proveedor": None
+    })
+
+
+def generar_ventas(n: int, semilla: int = 42, fecha_fin: date = date(2025, 12, 31), dias: int = 3 * 365) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla + 2)
+    platos = [(grupo, f"{grupo} {i + 1}") for grupo, total in GRUPOS_VENTA.items() for i in range(total)]
+    precios = np.round(rng.lognormal(mean=3.0, sigma=0.5, size=len(platos)), 2)
+
+    indices = rng.choice(len(platos), size=n, p=_probabilidades_zipf(len(platos), 0.9))
+    cantidad = rng.integers(1, 6, size=n)
+    return pd.DataFrame({
+        "fecha": _fechas(rng, n, fecha_fin, dias),
+        "grupo": [platos[i][0] for i in indices],
+        "nombre": [platos[i][1] for i in indices],
+        "cantidad": cantidad,
+        "venta": np.round(precios[indices] * cantidad, 2),
+        "entidad": rng.choice(["restaurante", "domicilio"], size=n, p=[0.8, 0.2]),
+        "cliente": rng.choice(["clientes", "cuenta_casa"], size=n, p=[0.95, 0.05])
+    })
+
+
+def cargar(backend, tabla: str, df: pd.DataFrame, tamano_lote: int = 50_000):
+    """Carga directa en un SQLiteBackend (sin pasar por DataService)"""
+    columnas = list(df.columns)
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})"
+    df = df.astype(object).where(df.notna(), None)
+    with backend.lock, backend.conexion:
+        for inicio in range(0, len(df), tamano_lote):
+            backend.conexion.executemany(sql, df.iloc[inicio:inicio + tamano_lote].itertuples(index=False, name=None))
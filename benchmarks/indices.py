@@ -0,0 +1,120 @@
+"""Comprueba con EXPLAIN QUERY PLAN que los filtros habituales usan índices.
+
+Uso:
+    python -m benchmarks.indices --tamanos 10000 100000 1000000
+
+Las consultas se construyen con el mismo código que emite DataService, se
+explican en el backend SQLite y se cronometran. Termina con código 1 si
+alguna consulta que debería usar un índice recorre la tabla completa.
+La búsqueda por subcadena (ILIKE '%x%') solo tiene índice en Postgres
+(pg_trgm), así que en SQLite se informa pero no cuenta como fallo.
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.generador import cargar, generar_compras, generar_gastos, generar_ventas
+from benchmarks.run import DIRECTORIO_RESULTADOS, FECHA_FIN
+from modules.backends.sqlite_backend import SQLiteBackend
+from modules.database import DatabaseManager
+from utils.data_service import DataService
+
+# "SCAN compras" sin índice = recorrido completo de la tabla
+_RECORRIDO_COMPLETO = re.compile(r"^SCAN (\w+)$")
+
+
+def consultas(data_service: DataService, producto: str, producto_clave: str) -> dict:
+    """Nombre -> (consulta, requiere_indice)"""
+    client = data_service.db.client
+    rango = ("2025-06-01", "2025-06-30")
+    cursor = ("2025-06-15", 10**9)
+
+    def pagina(tabla, producto_filtro=None, ultimo=None):
+        clave = data_service._clave_consulta(tabla, {
+            "fecha_inicio": rango[0], "fecha_fin": rango[1], "producto": producto_filtro
+        })
+        return data_service._consulta_pagina(tabla, clave, None, ultimo, 1000)
+
+    return {
+        "compras_rango_fechas": (pagina("compras"), True),
+        "compras_rango_fechas_cursor": (pagina("compras", ultimo=cursor), True),
+        "gastos_rango_fechas": (pagina("gastos"), True),
+        "compras_producto_clave": (
+            data_service._consulta_pagina("compras", data_service._clave_consulta("compras", {
+                "fecha_inicio": rango[0], "fecha_fin": rango[1], "producto_clave": producto_clave
+            }), None, None, 1000), True
+        ),
+        "compras_producto_subcadena": (pagina("compras", producto_filtro=producto.split()[0]), False),
+        "ventas_fecha_grupo": (
+            client.table("ventas").select("*").gte("fecha", rango[0]).lte("fecha", rango[1])
+            .eq("grupo", "Postres"), True
+        ),
+        "rollup_producto_meses": (
+            client.table("compras_rollup").select("mes,sum_monto,sum_cantidad,n")
+            .eq("producto_clave", producto_clave).gte("mes", "2025-01-01").lte("mes", "2025-06-01"), True
+        ),
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Comprobación de planes de consulta")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=Path, default=None)
+    args = parser.parse_args(argumentos)
+
+    resultados = []
+    for tamano in args.tamanos:
+        backend = SQLiteBackend()
+        data_service = DataService(DatabaseManager.con_backend(backend))
+        compras = generar_compras(tamano, args.semilla, FECHA_FIN)
+        cargar(backend, "compras", compras)
+        cargar(backend, "gastos", generar_gastos(tamano, args.semilla, FECHA_FIN))
+        cargar(backend, "ventas", generar_ventas(tamano, args.semilla, FECHA_FIN))
+        data_service.db.reconstruir_rollup_compras()
+        with backend.lock:
+            backend.conexion.execute("ANALYZE")
+
+        print(f"[{tamano} filas]")
+        mas_comprado = compras["producto_clave"].value_counts().index[0]
+        producto = compras.loc[compras["producto_clave"].eq(mas_comprado), "producto"].iloc[0]
+        for nombre, (consulta, requiere_indice) in consultas(data_service, producto, mas_comprado).items():
+            plan = backend.explicar(consulta)
+            recorridos = [m.group(1) for paso in plan if (m := _RECORRIDO_COMPLETO.match(paso))]
+
+            inicio = time.perf_counter()
+            filas = len(consulta.execute().data)
+            duracion = time.perf_counter() - inicio
+
+            correcto = not (requiere_indice and recorridos)
+            resultados.append({
+                "tamano": tamano,
+                "consulta": nombre,
+                "plan": plan,
+                "requiere_indice": requiere_indice,
+                "recorrido_completo": recorridos,
+                "correcto": correcto,
+                "filas": filas,
+                "duracion_s": duracion
+            })
+            estado = "OK " if correcto else "FALLO"
+            print(f"  {estado} {nombre:<30} {duracion * 1000:9.2f} ms  {' | '.join(plan)}")
+
+    salida = args.salida or DIRECTORIO_RESULTADOS / f"indices_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps({
+        "meta": {"fecha": datetime.now().isoformat(timespec="seconds"), "semilla": args.semilla, "backend": "sqlite"},
+        "resultados": resultados
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados escritos en {salida}")
+
+    if not all(r["correcto"] for r in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Benchmarks de la capa de datos sobre un SQLiteBackend con datos sintéticos.
+
+Uso:
+    python -m benchmarks.run --tamanos 10000 100000 1000000 --repeticiones 5
+    python -m benchmarks.run --tamanos 10000 --comparar benchmarks/resultados/anterior.json
+
+Los resultados se escriben en JSON (un registro por tamaño y caso con
+min/mediana/p95/media en segundos) para poder comparar ejecuciones.
+"""
+import argparse
+import json
+import platform
+import statistics
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import logger
+
+from benchmarks.generador import cargar, generar_compras, generar_gastos, generar_ventas
+from modules.backends.sqlite_backend import SQLiteBackend
+from modules.database import DatabaseManager
+from modules.logic.analisis_ventas_logic import AnalisisVentasLogic
+from modules.logic.precio_ponderado_logic import PrecioPonderadoLogic
+from modules.logic.regist_compras_gastos_logic import RegistroManager
+from utils.data_processing import procesar_dataframe_editado
+from utils.data_service import DataService
+from utils.validators import ValidadorRegistros
+
+FECHA_FIN = date(2025, 12, 31)
+DIRECTORIO_RESULTADOS = Path(__file__).parent / "resultados"
+
+
+def medir(funcion, repeticiones: int, preparar=None) -> dict:
+    """Ejecuta `funcion` varias veces; `preparar` corre antes de cada repetición sin cronometrarse"""
+    tiempos = []
+    filas = None
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        if hasattr(resultado, "__len__"):
+            filas = len(resultado)
+
+    return {
+        "repeticiones": repeticiones,
+        "filas": filas,
+        "min_s": min(tiempos),
+        "mediana_s": statistics.median(tiempos),
+        "p95_s": float(np.percentile(tiempos, 95)),
+        "media_s": statistics.fmean(tiempos)
+    }
+
+
+def preparar_base(tamano: int, semilla: int, ruta: str) -> tuple[DataService, pd.DataFrame]:
+    backend = SQLiteBackend(ruta)
+    db = DatabaseManager.con_backend(backend)
+
+    compras = generar_compras(tamano, semilla, FECHA_FIN)
+    cargar(backend, "compras", compras)
+    cargar(backend, "gastos", generar_gastos(tamano, semilla, FECHA_FIN))
+    cargar(backend, "ventas", generar_ventas(tamano, semilla, FECHA_FIN))
+    db.reconstruir_rollup_compras()
+    db.reconstruir_ventas_diarias()
+
+    return DataService(db), compras
+
+
+def casos(data_service: DataService, compras: pd.DataFrame, filas_confirmacion: int, semilla: int) -> dict:
+    """Casos a medir: nombre -> (funcion, preparar)"""
+    precio_logic = PrecioPonderadoLogic(data_service)
+    analisis_logic = AnalisisVentasLogic(data_service)
+    registro_manager = RegistroManager(data_service)
+    producto_clave = compras["producto_clave"].value_counts().index[0]
+
+    filtros_mes = {"fecha_inicio": "2025-06-01", "fecha_fin": "2025-06-30", "producto": ""}
+    filtros_semestre = {"fecha_inicio": "2025-01-01", "fecha_fin": "2025-06-30", "producto": ""}
+    filtros_producto = {"fecha_inicio": "2025-01-01", "fecha_fin": "2025-06-30", "producto_clave": producto_clave}
+    inicio_semestre, fin_semestre = date(2025, 1, 1), date(2025, 6, 30)
+
+    # La tabla del editor trae las fechas como datetime
+    editado = compras.copy()
+    editado["fecha"] = pd.to_datetime(editado["fecha"])
+
+    pendientes = generar_compras(filas_confirmacion, semilla + 100, FECHA_FIN)
+    pendientes = pendientes.astype(object).where(pendientes.notna(), None).to_dict("records")
+
+    def sin_cache():
+        data_service.cache.limpiar()
+
+    def cargar_pendientes():
+        st.session_state.registros_temporales = [dict(reg) for reg in pendientes]
+
+    def historico_y_ponderado():
+        df = precio_logic.obtener_precios_historicos(producto_clave, inicio_semestre, fin_semestre)
+        precio_logic.calcular_precio_ponderado(df)
+        return df
+
+    return {
+        "obtener_registros_mes": (lambda: data_service.obtener_registros("mercancía", filtros_mes), sin_cache),
+        "obtener_registros_mes_cacheado": (lambda: data_service.obtener_registros("mercancía", filtros_mes), None),
+        "obtener_registros_producto_semestre": (lambda: data_service.obtener_registros("mercancía", filtros_producto), sin_cache),
+        "precios_historicos_y_ponderado": (historico_y_ponderado, sin_cache),
+        "resumen_periodo_rollup": (
+            lambda: precio_logic.obtener_resumen_periodo(producto_clave, date(2024, 12, 15), fin_semestre), sin_cache
+        ),
+        "analisis_ventas_anual_grupo": (
+            lambda: analisis_logic.obtener_tabla_dinamica(date(2025, 1, 1), FECHA_FIN, "Día", "Grupo"), sin_cache
+        ),
+        "consulta_primera_pagina_semestre": (
+            lambda: (data_service.contar_registros("mercancía", filtros_semestre),
+                     data_service.obtener_pagina("mercancía", filtros_semestre, tamano_pagina=100)[0]), sin_cache
+        ),
+        "validar_dataframe": (lambda: ValidadorRegistros.validar_dataframe(compras), None),
+        "procesar_dataframe_editado": (lambda: procesar_dataframe_editado(editado), None),
+        # Inserta filas nuevas en cada repetición: se mide al final
+        "confirmar_registros": (lambda: registro_manager.confirmar_registros()["errores"], cargar_pendientes),
+    }
+
+
+def comparar(resultados: list[dict], ruta_previa: Path):
+    previos = {
+        (r["tamano"], r["caso"]): r for r in json.loads(ruta_previa.read_text(encoding="utf-8"))["resultados"]
+    }
+    print(f"\nComparación con {ruta_previa} (mediana actual / previa):")
+    for r in resultados:
+        previo = previos.get((r["tamano"], r["caso"]))
+        if previo and previo["mediana_s"]:
+            razon = r["mediana_s"] / previo["mediana_s"]
+            marca = "  <-- regresión" if razon > 1.2 else ""
+            print(f"  {r['tamano']:>9} {r['caso']:<40} x{razon:6.2f}{marca}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la capa de datos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--filas-confirmacion", type=int, default=500,
+                        help="Registros temporales por repetición de confirmar_registros")
+    parser.add_argument("--db", default=":memory:", help="Ruta del archivo SQLite (por defecto en memoria)")
+    parser.add_argument("--salida", type=Path, default=None)
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de una ejecución previa")
+    args = parser.parse_args(argumentos)
+
+    logger.set_log_level("error")
+
+    resultados = []
+    for tamano in args.tamanos:
+        inicio = time.perf_counter()
+        data_service, compras = preparar_base(tamano, args.semilla, args.db)
+        print(f"[{tamano} filas] datos generados y cargados en {time.perf_counter() - inicio:.1f} s")
+
+        for caso, (funcion, preparar) in casos(data_service, compras, args.filas_confirmacion, args.semilla).items():
+            medicion = medir(funcion, args.repeticiones, preparar)
+            resultados.append({"tamano": tamano, "caso": caso, **medicion})
+            print(f"  {caso:<40} mediana {medicion['mediana_s'] * 1000:10.2f} ms  p95 {medicion['p95_s'] * 1000:10.2f} ms")
+
+    salida = args.salida or DIRECTORIO_RESULTADOS / f"capa_datos_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps({
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "semilla": args.semilla,
+            "repeticiones": args.repeticiones,
+            "tamanos": args.tamanos,
+            "backend": "sqlite",
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__
+        },
+        "resultados": resultados
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados escritos en {salida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Peticiones al backend cuando varias sesiones abren Precio Ponderado a la vez.
+
+Uso:
+    python -m benchmarks.sesiones --sesiones 1 4 16 32 --latencia-ms 50
+
+Cada sesión es un hilo que, con la caché vacía, pide el catálogo, el
+histórico y el resumen del producto más comprado, como al abrir la vista.
+El backend SQLite se envuelve con una latencia fija para que las consultas
+se solapen como lo harían contra Supabase. Con las consultas agrupadas
+(CacheConsultas.obtener_o_calcular) las peticiones no crecen con las
+sesiones.
+"""
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from streamlit import logger
+
+from benchmarks.run import DIRECTORIO_RESULTADOS, preparar_base
+from modules.logic.precio_ponderado_logic import PrecioPonderadoLogic
+
+
+class _ConsultaConLatencia:
+    """Constructor de consultas que cuenta y retrasa cada `execute()`"""
+
+    def __init__(self, consulta, backend):
+        self._consulta = consulta
+        self._backend = backend
+
+    def execute(self):
+        with self._backend.lock_contador:
+            self._backend.peticiones += 1
+        time.sleep(self._backend.latencia)
+        return self._consulta.execute()
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._consulta, atributo)
+        if not callable(valor):
+            return valor
+
+        def encadenar(*args, **kwargs):
+            resultado = valor(*args, **kwargs)
+            return _ConsultaConLatencia(resultado, self._backend) if hasattr(resultado, "execute") else resultado
+        return encadenar
+
+
+class BackendConLatencia:
+    def __init__(self, backend, latencia: float):
+        self.backend = backend
+        self.latencia = latencia
+        self.peticiones = 0
+        self.lock_contador = threading.Lock()
+
+    def table(self, nombre: str):
+        return _ConsultaConLatencia(self.backend.table(nombre), self)
+
+    def rpc(self, funcion: str, params: dict):
+        return _ConsultaConLatencia(self.backend.rpc(funcion, params), self)
+
+    def __getattr__(self, atributo):
+        return getattr(self.backend, atributo)
+
+
+def medir_sesiones(data_service, producto_clave: str, sesiones: int) -> dict:
+    """Lanza `sesiones` hilos a la vez sobre una caché vacía"""
+    logica = PrecioPonderadoLogic(data_service)
+    backend = data_service.db.client
+    data_service.cache.limpiar()
+    backend.peticiones = 0
+    barrera = threading.Barrier(sesiones)
+
+    def abrir_vista():
+        barrera.wait()
+        logica.data_service.obtener_productos()
+        logica.obtener_precios_historicos(producto_clave, date(2025, 1, 1), date(2025, 6, 30))
+        logica.obtener_resumen_periodo(producto_clave, date(2024, 12, 15), date(2025, 6, 30))
+
+    hilos = [threading.Thread(target=abrir_vista) for _ in range(sesiones)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    return {
+        "sesiones": sesiones,
+        "peticiones": backend.peticiones,
+        "segundos": time.perf_counter() - inicio,
+        "agrupadas": data_service.cache.estadisticas()["agrupadas"]
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Peticiones al backend con sesiones simultáneas")
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--tamano", type=int, default=100_000)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=Path, default=None)
+    args = parser.parse_args(argumentos)
+
+    logger.set_log_level("error")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        data_service, compras = preparar_base(args.tamano, args.semilla, str(Path(directorio) / "sesiones.db"))
+        data_service.db.client = BackendConLatencia(data_service.db.client, args.latencia_ms / 1000)
+        producto_clave = compras["producto_clave"].value_counts().index[0]
+
+        resultados = []
+        for sesiones in args.sesiones:
+            medicion = medir_sesiones(data_service, producto_clave, sesiones)
+            resultados.append(medicion)
+            print(f"  {sesiones:>4} sesiones: {medicion['peticiones']:>4} peticiones, "
+                  f"{medicion['agrupadas']:>4} agrupadas, {medicion['segundos'] * 1000:8.1f} ms")
+
+    salida = args.salida or DIRECTORIO_RESULTADOS / f"sesiones_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps({
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "tamano": args.tamano,
+            "latencia_ms": args.latencia_ms,
+            "semilla": args.semilla
+        },
+        "resultados": resultados
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados escritos en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import streamlit as st
+import plotly.express as px
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+
+class AnalisisVentasUI:
+    PERIODOS = {
+        "Últimos 30 días": relativedelta(days=30),
+        "Últimos 90 días": relativedelta(days=90),
+        "Últimos 6 meses": relativedelta(months=6),
+        "Últimos 12 meses": relativedelta(years=1),
+    }
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def mostrar_interfaz(self):
+        st.title("📊 Análisis de Ventas")
+
+        fecha_inicio, fecha_fin = self._seleccionar_periodo()
+        resumen = self.logic.obtener_resumen(fecha_inicio, fecha_fin)
+        if not resumen['lineas']:
+            st.warning("No hay ventas en el período seleccionado")
+            return
+
+        cols = st.columns(3)
+        cols[0].metric("Ingresos", f"${resumen['ingresos']:,.0f}")
+        cols[1].metric("Unidades", f"{resumen['unidades']:,}")
+        cols[2].metric("Domicilios", f"{resumen['participacion_domicilio']:.1%}")
+
+        cols = st.columns(4)
+        agrupacion = cols[0].radio("Agrupar por", list(self.logic.INTERVALOS), horizontal=True)
+        dimension = cols[1].selectbox("Desglosar por", list(self.logic.DIMENSIONES))
+        metrica = cols[2].radio("Métrica", list(self.logic.METRICAS), horizontal=True)
+        grupo = cols[3].selectbox(
+            "Grupo", [None] + self.logic.obtener_grupos(fecha_inicio, fecha_fin),
+            format_func=lambda g: "Todos" if g is None else g
+        )
+
+        tabla = self.logic.obtener_tabla_dinamica(fecha_inicio, fecha_fin, agrupacion, dimension, metrica, grupo)
+        fig = px.area(tabla, labels={"value": metrica, "periodo": "", "variable": dimension})
+        st.plotly_chart(fig, use_container_width=True)
+
+        dimension_ranking = dimension if dimension != "Total" else "Producto"
+        ranking = self.logic.obtener_ranking(fecha_inicio, fecha_fin, dimension_ranking, metrica, grupo)
+        fig = px.bar(
+            ranking, x=self.logic.METRICAS[metrica], y='dimension', orientation='h',
+            title=f"{dimension_ranking} con más {metrica.lower()}",
+            labels={'dimension': "", self.logic.METRICAS[metrica]: metrica}
+        )
+        fig.update_yaxes(autorange="reversed")
+        st.plotly_chart(fig, use_container_width=True)
+
+    def _seleccionar_periodo(self):
+        hoy = datetime.now().date()
+        rango = st.selectbox("Período", list(self.PERIODOS) + ["Este año", "Personalizado"])
+
+        if rango == "Personalizado":
+            cols = st.columns(2)
+            fecha_inicio = cols[0].date_input("Fecha inicio", value=hoy - timedelta(days=30))
+            fecha_fin = cols[1].date_input("Fecha fin", value=hoy)
+            return fecha_inicio, fecha_fin
+        if rango == "Este año":
+            return hoy.replace(month=1, day=1), hoy
+        return hoy - self.PERIODOS[rango], hoy
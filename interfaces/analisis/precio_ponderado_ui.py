@@ -1,47 +1,117 @@
 import streamlit as st
+import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
 class PrecioPonderadoUI:
+    RANGOS = [
+        "Últimos 30 días",
+        "Últimos 60 días",
+        "Últimos 90 días",
+        "Este mes",
+        "Últimos 6 meses",
+        "Este año",
+        "Personalizado"
+    ]
+
     def __init__(self, logic):
         self.logic = logic
     
     def mostrar_interfaz(self):
         st.title("📈 Análisis de Precio Ponderado")
+        self._precargar()
         
-        # Obtener productos únicos
-        productos = self.logic.obtener_productos()
-        producto_seleccionado = st.selectbox("Seleccionar Producto", productos)
+        # Productos del catálogo por clave normalizada
+        catalogo = self.logic.obtener_catalogo()
+        producto_seleccionado = st.selectbox(
+            "Seleccionar Producto", list(catalogo), format_func=catalogo.get, key="pp_producto"
+        )
+        if not producto_seleccionado:
+            st.info("Aún no hay productos registrados")
+            return
+        self._mostrar_union_productos(catalogo, producto_seleccionado)
+        # El producto principal no puede quedar también en la comparación
+        if producto_seleccionado in st.session_state.get("pp_comparar", []):
+            st.session_state.pp_comparar = [
+                clave for clave in st.session_state.pp_comparar if clave != producto_seleccionado
+            ]
+        comparar = st.multiselect(
+            "Comparar con",
+            [clave for clave in catalogo if clave != producto_seleccionado],
+            format_func=catalogo.get,
+            key="pp_comparar"
+        )
         
         # Selector de rango de fechas
-        rango = st.selectbox("Período", [
-            "Últimos 30 días", 
-            "Últimos 60 días",
-            "Últimos 90 días",
-            "Este mes",
-            "Últimos 6 meses",
-            "Este año", 
-            "Personalizado"]
-        )
+        rango = st.selectbox("Período", self.RANGOS, key="pp_rango")
         
         fecha_inicio, fecha_fin = self._calcular_fechas(rango)
+        agrupacion = st.radio("Agrupar por", list(self.logic.INTERVALOS), horizontal=True, key="pp_agrupacion")
         
-        # Obtener datos
-        df = self.logic.obtener_precios_historicos(producto_seleccionado, fecha_inicio, fecha_fin)
+        # Precio ponderado desde el rollup mensual; serie agregada en el servidor
+        resumen = self.logic.obtener_resumen_periodo(producto_seleccionado, fecha_inicio, fecha_fin)
         
-        if not df.empty:
+        if resumen['n']:
+            df = self.logic.obtener_serie_agregada(producto_seleccionado, fecha_inicio, fecha_fin, agrupacion)
+
             # Precio ponderado
-            precio_pond = self.logic.calcular_precio_ponderado(df)
-            st.metric("Precio Ponderado del Período", f"${precio_pond:,.2f}")
+            cols = st.columns(3)
+            cols[0].metric("Precio Ponderado del Período", f"${resumen['precio_ponderado']:,.2f}")
+            cols[1].metric("Precio mínimo", f"${df['precio_min'].min():,.2f}")
+            cols[2].metric("Precio máximo", f"${df['precio_max'].max():,.2f}")
+            st.caption(f"{resumen['n']} compras en el período")
             
-            # Gráfico de precios
-            fig = px.line(df, x='fecha', y='precio_unitario', title=f"Precio Unitario - {producto_seleccionado}")
+            # Gráfico de precios (los productos a comparar se piden en paralelo)
+            if comparar:
+                series = self.logic.obtener_series_varias(
+                    [producto_seleccionado] + comparar, fecha_inicio, fecha_fin, agrupacion
+                )
+                df = pd.concat(
+                    [serie.assign(producto=catalogo[clave]) for clave, serie in series.items() if not serie.empty],
+                    ignore_index=True
+                )
+                fig = px.line(
+                    df, x='periodo', y='precio_ponderado', color='producto', markers=True,
+                    title="Precio Unitario"
+                )
+            else:
+                fig = px.line(
+                    df, x='periodo', y='precio_ponderado', markers=True,
+                    title=f"Precio Unitario - {catalogo[producto_seleccionado]}"
+                )
             st.plotly_chart(fig)
             
         else:
             st.warning("No hay datos para el período seleccionado")
     
+    def _precargar(self):
+        """Pide en paralelo lo que necesitará la vista según la selección anterior"""
+        producto = st.session_state.get("pp_producto")
+        rango = st.session_state.get("pp_rango", self.RANGOS[0])
+        if not producto or rango == "Personalizado":
+            return
+        fecha_inicio, fecha_fin = self._calcular_fechas(rango)
+        self.logic.precargar(
+            [producto] + st.session_state.get("pp_comparar", []),
+            fecha_inicio,
+            fecha_fin,
+            st.session_state.get("pp_agrupacion", "Día")
+        )
+
+    def _mostrar_union_productos(self, catalogo, producto_seleccionado):
+        """Permite unir variantes de un mismo producto bajo el seleccionado"""
+        with st.expander("🔗 Unir productos"):
+            variantes = st.multiselect(
+                f"Registrar como alias de '{catalogo[producto_seleccionado]}'",
+                [clave for clave in catalogo if clave != producto_seleccionado],
+                format_func=catalogo.get
+            )
+            if st.button("Unir", disabled=not variantes):
+                reasignadas = self.logic.unir_productos(variantes, producto_seleccionado)
+                st.toast(f"✅ {reasignadas} registros reasignados")
+                st.rerun()
+
     def _calcular_fechas(self, rango):
         hoy = datetime.now().date()
 
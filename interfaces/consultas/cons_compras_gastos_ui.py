@@ -1,26 +1,55 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-from utils.data_processing import procesar_dataframe_editado
+from utils.data_processing import convertir_registros, mostrar_errores_edicion
+from utils.diff_registros import calcular_diff
 from utils.validators import ValidadorRegistros
 from utils.error_handler import ErrorHandler
+from utils.exportacion import FORMATOS
 from interfaces.base_ui import BaseEditableUI
 
 class ConsultasComprasGastosUI(BaseEditableUI):
+    CAMPOS_RELEVANTES = ['fecha', 'categoria', 'producto', 'monto', 'cantidad', 'unidad_medida']
+
+    # Unifican los tipos de la base de datos y del editor antes de comparar
+    NORMALIZADORES = {
+        'fecha': ValidadorRegistros.parsear_fechas,
+        'monto': lambda serie: pd.to_numeric(serie, errors="coerce"),
+        'cantidad': lambda serie: pd.to_numeric(serie, errors="coerce")
+    }
+
+    TAMANOS_PAGINA = [50, 100, 250, 500]
+
     def __init__(self, consultas_compras_gastos_logic):
         super().__init__()
         self.logic = consultas_compras_gastos_logic
-        self._inicializar_estado()
     
     def _inicializar_estado(self):
         if 'consulta_actual' not in st.session_state:
-            st.session_state.consulta_actual = {
-                'datos_originales': [],
-                'datos_editados': []
-            }
+            st.session_state.consulta_actual = self._estado_vacio()
+
+    @staticmethod
+    def _estado_vacio(filtros: dict = None, total: int = 0, tamano_pagina: int = 100) -> dict:
+        """Estado de la consulta: solo filtros, cursores y cambios pendientes.
+
+        Las filas de cada página se piden al servicio (cacheado) en cada
+        rerun; `originales` guarda únicamente las filas editadas o borradas.
+        """
+        return {
+            'filtros': filtros,
+            'total': total,
+            'tamano_pagina': tamano_pagina,
+            'pagina': 0,
+            'cursores': [None],     # cursor de inicio de cada página visitada
+            'cambios': {},          # id -> {campo: valor editado}
+            'eliminados': set(),
+            'originales': {}        # id -> fila tal como vino de la base de datos
+        }
     
     def mostrar_interfaz(self):
         st.header("🔍 Consulta de Registros")
+        # Se llama en cada rerun: la vista se reutiliza entre reruns (ver interfaces.rutas)
+        self._inicializar_estado()
         self._mostrar_filtros()
         self._mostrar_resultados()
     
@@ -30,128 +59,211 @@ class ConsultasComprasGastosUI(BaseEditableUI):
             fecha_inicio = cols[0].date_input("Fecha inicio", value=date.today())
             fecha_fin = cols[1].date_input("Fecha fin", value=date.today())
             
-            categoria = st.selectbox("Categoría", ["Mercancía", "Equipos", "Limpieza", "Servicios", "Otros"])
+            categoria = st.selectbox("Categoría", ["Mercancía", "Equipos", "Limpieza", "Servicios", "Otros", "Todas"])
             producto = st.text_input("Producto/Servicio (opcional)")
-            
-            if st.form_submit_button("🔎 Buscar"):
-                filtros = {
-                    "fecha_inicio": fecha_inicio.isoformat(),
-                    "fecha_fin": fecha_fin.isoformat(),
-                    "categoria": categoria.lower(),
-                    "producto": producto.strip()
-                }
-                
-                resultados = self.logic.consultar_registros(filtros)
-                st.session_state.consulta_actual = {
-                    'datos_originales': resultados,
-                    'datos_editados': resultados.copy()
-                }
+
+            filtros = {
+                "fecha_inicio": fecha_inicio.isoformat(),
+                "fecha_fin": fecha_fin.isoformat(),
+                "categoria": categoria.lower(),
+                "producto": producto.strip()
+            }
+
+            tamano_pagina = st.select_slider("Filas por página", self.TAMANOS_PAGINA, value=100)
+
+            cols = st.columns([1, 1, 2])
+            buscar = cols[0].form_submit_button("🔎 Buscar")
+            exportar = cols[1].form_submit_button("📤 Exportar")
+            formato = cols[2].radio("Formato", list(FORMATOS), horizontal=True, label_visibility="collapsed")
+
+        if buscar:
+            total = self.logic.contar_registros(filtros)
+            st.session_state.consulta_actual = self._estado_vacio(filtros, total, tamano_pagina)
+        elif exportar:
+            self._exportar(filtros, formato)
+
+    def _exportar(self, filtros, formato):
+        """Genera el archivo en disco sin pasar por el editor ni por session_state"""
+        if filtros['categoria'] == "todas":
+            st.warning("Elige una categoría para exportar: compras y gastos tienen columnas distintas")
+            return
+
+        with st.spinner("Generando exportación..."):
+            archivo, filas = self.logic.exportar_registros(filtros, formato)
+
+        if not filas:
+            st.warning("No hay registros para exportar con esos filtros")
+            return
+
+        extension, mime = FORMATOS[formato]
+        with archivo:
+            st.download_button(
+                f"⬇️ Descargar {filas:,} registros ({formato})",
+                data=archivo,
+                file_name=f"{filtros['categoria']}_{filtros['fecha_inicio']}_{filtros['fecha_fin']}.{extension}",
+                mime=mime,
+                on_click="ignore"
+            )
     
     def _mostrar_resultados(self):
-        if st.session_state.consulta_actual['datos_originales']:
-            df = pd.DataFrame(st.session_state.consulta_actual['datos_editados'])
-            
-            if not df.empty and 'fecha' in df.columns:
-                df['fecha'] = pd.to_datetime(df['fecha'])
-                
-                df["cantidad"] = df.apply(
-                    lambda x: x["cantidad"] if str(x["categoria"]).lower() == "mercancía" else None, 
-                    axis=1
-                )
-                df["unidad_medida"] = df.apply(
-                    lambda x: x["unidad_medida"] if str(x["categoria"]).lower() == "mercancía" else None, 
-                    axis=1
-                )
-
-            edited_df = self._create_data_editor(df, "consulta")
-
-            # Actualizar registros inmediatamente
-            try:
-                edited_data = procesar_dataframe_editado(edited_df)
-            except ValueError as e:
-                st.error(f"Error de formato: {str(e)}")
-                st.stop()
-            
-            if not edited_df.equals(df):    
-                cambios = edited_df.compare(df)
-                if not cambios.empty:
-                    st.session_state.consulta_actual['datos_editados'] = edited_data
-                    st.rerun()
-
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button("💾 Confirmar cambios", type="primary"):
-                    self.confirmar_registros()
-            with col2:
-                if st.button("↩️ Deshacer cambios"):
-                    self._restaurar_datos_originales()
-            with col3:
-                if st.button("🗑️ Nueva búsqueda"):
-                    self._reiniciar_busqueda()
+        consulta = st.session_state.consulta_actual
+        if not consulta['filtros']:
+            return
+        if not consulta['total']:
+            st.info("No hay registros con esos filtros")
+            return
+
+        registros, siguiente = self.logic.obtener_pagina(
+            consulta['filtros'], consulta['cursores'][consulta['pagina']], consulta['tamano_pagina']
+        )
+
+        if consulta['filtros']['categoria'] == "todas":
+            # "Todas" mezcla ids de compras y gastos: solo lectura
+            st.caption("Vista combinada de compras y gastos; elige una categoría para editar")
+            df = pd.DataFrame(registros)
+            df['fecha'] = pd.to_datetime(df['fecha'])
+            st.dataframe(df, column_config=self.column_configs.get_column_configs(), hide_index=True)
+            self._mostrar_paginacion(consulta, siguiente)
+            if st.button("🗑️ Nueva búsqueda"):
+                self._reiniciar_busqueda()
+            return
+
+        # La página con los cambios pendientes aplicados y sin las filas borradas
+        df = pd.DataFrame([
+            {**reg, **consulta['cambios'].get(reg['id'], {})}
+            for reg in registros if reg['id'] not in consulta['eliminados']
+        ], columns=list(registros[0]) if registros else None)
+
+        if not df.empty and 'fecha' in df.columns:
+            df['fecha'] = pd.to_datetime(df['fecha'])
+
+            es_mercancia = df["categoria"].astype(str).str.lower() == "mercancía"
+            for columna in ("cantidad", "unidad_medida"):
+                df[columna] = df[columna].where(es_mercancia, None) if columna in df.columns else None
+
+        edited_df = self._create_data_editor(df, f"consulta_{consulta['pagina']}")
+        mostrar_errores_edicion(edited_df)
+
+        # Solo las filas con id cambiadas o eliminadas pasan a los cambios pendientes
+        diff = calcular_diff(df, edited_df, clave='id')
+        if diff['actualizados'] or diff['eliminados']:
+            self._aplicar_ediciones(diff, edited_df, registros)
+            st.rerun()
+
+        self._mostrar_paginacion(consulta, siguiente)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("💾 Confirmar cambios", type="primary"):
+                self.confirmar_registros()
+        with col2:
+            if st.button("↩️ Deshacer cambios"):
+                self._restaurar_datos_originales()
+        with col3:
+            if st.button("🗑️ Nueva búsqueda"):
+                self._reiniciar_busqueda()
+
+    def _mostrar_paginacion(self, consulta, siguiente):
+        """Botones de página y total de registros; los cambios pendientes se conservan"""
+        paginas = -(-consulta['total'] // consulta['tamano_pagina'])
+        pendientes = len(consulta['originales'])
+
+        cols = st.columns([1, 1, 4])
+        anterior = cols[0].button("⬅️ Anterior", disabled=consulta['pagina'] == 0, use_container_width=True)
+        proxima = cols[1].button("Siguiente ➡️", disabled=siguiente is None, use_container_width=True)
+        cols[2].markdown(
+            f"Página **{consulta['pagina'] + 1}** de {paginas} · :blue-badge[{consulta['total']:,} registros]"
+            + (f" · :orange-badge[{pendientes} con cambios sin guardar]" if pendientes else "")
+        )
+
+        if anterior:
+            consulta['pagina'] -= 1
+            st.rerun()
+        if proxima:
+            consulta['pagina'] += 1
+            if consulta['pagina'] == len(consulta['cursores']):
+                consulta['cursores'].append(siguiente)
+            st.rerun()
+
+    def _aplicar_ediciones(self, diff, edited_df, registros):
+        """Acumula en los cambios pendientes solo las filas modificadas o eliminadas.
+
+        `registros` es la página tal como vino de la base de datos; la fila
+        original se guarda la primera vez que se toca para validar y
+        comparar al confirmar.
+        """
+        consulta = st.session_state.consulta_actual
+        filas_pagina = {reg['id']: reg for reg in registros}
+        filas_editadas = edited_df[edited_df['id'].isin(list(diff['actualizados']))]
+        procesados = {int(reg['id']): reg for reg in convertir_registros(filas_editadas)}
+
+        for reg_id, campos in diff['actualizados'].items():
+            consulta['originales'].setdefault(reg_id, filas_pagina[reg_id])
+            consulta['cambios'].setdefault(reg_id, {}).update(
+                {campo: procesados[reg_id][campo] for campo in campos}
+            )
+
+        for reg_id in diff['eliminados']:
+            consulta['originales'].setdefault(reg_id, filas_pagina[reg_id])
+            consulta['cambios'].pop(reg_id, None)
+            consulta['eliminados'].add(reg_id)
 
     def confirmar_registros(self):
         registros_invalidos = []
         cambios_pendientes = []
-        eliminaciones_procesadas = []
         
-        # Obtener datos originales y editados
+        # Solo las filas tocadas en cualquier página, antes y después de editarlas
+        consulta = st.session_state.consulta_actual
+        if not consulta['originales']:
+            st.warning("No hay cambios para guardar")
+            return
+        datos_originales = list(consulta['originales'].values())
         datos_editados = [
-            reg for reg in st.session_state.consulta_actual['datos_editados']
-            if reg is not None and isinstance(reg, dict) and reg.get('id')
+            {**reg, **consulta['cambios'].get(reg['id'], {})}
+            for reg in datos_originales if reg['id'] not in consulta['eliminados']
         ]
-        datos_originales = st.session_state.consulta_actual['datos_originales']
         originales_por_id = {reg['id']: reg for reg in datos_originales}
-        
-        ids_originales = {reg['id'] for reg in datos_originales} if datos_originales else set()
-        ids_editados = {reg['id'] for reg in datos_editados} if datos_editados else set()
+        editados_por_id = {int(reg['id']): reg for reg in datos_editados}
 
-        if not datos_editados and datos_originales:
-            eliminaciones_pendientes_ids = ids_originales
-        else:
-            eliminaciones_pendientes_ids = list(ids_originales - ids_editados)
-
-        
-        # Procesar actualizaciones
-        for reg_id in eliminaciones_pendientes_ids:
-            try:
-                reg_original = next(
-                    (r for r in datos_originales if r['id'] == reg_id),
-                    None
-                )
-                if reg_original:
-                    tabla = "compras" if reg_original["categoria"] == "mercancía" else "gastos"
-                    eliminaciones_procesadas.append({
-                        'tabla': tabla,
-                        'id': reg_id
-                    })
-            except Exception as e:
-                registros_invalidos.append(f"Error eliminando registro {reg_id}: {str(e)}")
+        # Diferencias por id en una sola pasada
+        df_originales = pd.DataFrame(datos_originales)
+        diff = calcular_diff(
+            df_originales,
+            pd.DataFrame(datos_editados, columns=None if datos_editados else df_originales.columns),
+            clave='id',
+            campos=self.CAMPOS_RELEVANTES,
+            normalizadores=self.NORMALIZADORES
+        )
 
-        for reg_editado in datos_editados:
-            try:
-                reg_id = int(reg_editado.get('id'))
-                reg_original = originales_por_id.get(reg_id)
+        eliminaciones_procesadas = [
+            {'tabla': ValidadorRegistros.obtener_tabla(originales_por_id[reg_id]), 'id': reg_id}
+            for reg_id in diff['eliminados']
+        ]
 
-                # Validación básica
-                if not reg_original:
-                    raise ValueError("Registro original no encontrado")
+        # Validar campos comunes de las filas modificadas en una sola pasada
+        ids_actualizados = list(diff['actualizados'])
+        errores_por_fila = ValidadorRegistros.agrupar_errores(
+            ValidadorRegistros.validar_dataframe(
+                pd.DataFrame([editados_por_id[reg_id] for reg_id in ids_actualizados])
+            )
+        )
 
-                # Validar campos comunes
-                errores = ValidadorRegistros.validar_campos_comunes(reg_editado)
-                if errores:
-                    raise ValueError("\n".join(errores))
+        for posicion, reg_id in enumerate(ids_actualizados):
+            try:
+                if posicion in errores_por_fila:
+                    raise ValueError("\n".join(errores_por_fila[posicion]))
 
                 # Filtrar campos no permitidos
-                reg_limpio = ValidadorRegistros.filtrar_campos(reg_editado.copy())
+                reg_limpio = ValidadorRegistros.filtrar_campos(editados_por_id[reg_id].copy())
                 
-                # Detectar cambios
-                cambios = self._detectar_cambios(reg_original, reg_editado, reg_limpio)
-                if cambios:
-                    tabla = ValidadorRegistros.obtener_tabla(reg_limpio)
+                # Ignorar cambios en campos que no aplican a la categoría
+                if any(campo in reg_limpio for campo in diff['actualizados'][reg_id]):
+                    # El id pertenece a la tabla del registro original
+                    tabla = ValidadorRegistros.obtener_tabla(originales_por_id[reg_id])
                     cambios_pendientes.append({
                         'tabla': tabla,
                         'id': reg_id,
-                        'datos': cambios
+                        'datos': reg_limpio
                     })
 
             except Exception as e:
@@ -161,58 +273,30 @@ class ConsultasComprasGastosUI(BaseEditableUI):
             ErrorHandler.display_validation_errors(registros_invalidos, "consulta")
             st.stop()
 
-        # Actualizar registros modificados
-        for cambio in cambios_pendientes:
-            self.logic.data_service.db.execute_safe_operation(
-                operation='update',
-                table=cambio['tabla'],
-                record_id=cambio['id'],
-                data=cambio['datos']
-            )
-
-        # Eliminar registros marcados
-        if eliminaciones_procesadas:
-            for eliminacion in eliminaciones_procesadas:
-                self.logic.data_service.db.execute_safe_operation(
-                    operation='delete',
-                    table=eliminacion['tabla'],
-                    record_id=eliminacion['id']
-                )
-            st.success("**¡Registros eliminados exitosamente!** ✅")
-            self._reiniciar_busqueda()
-        else:
+        if not cambios_pendientes and not eliminaciones_procesadas:
             st.warning("No hay cambios para guardar")
+            return
+
+        # Actualizar y eliminar en bloque (una petición por tabla y bloque)
+        resultado = self.logic.data_service.aplicar_cambios(
+            cambios_pendientes,
+            eliminaciones_procesadas
+        )
+
+        for faltante in resultado['faltantes']:
+            st.toast(f"⚠️ Registro {faltante['id']} no existe en {faltante['tabla']}")
+        if resultado['eliminados']:
+            st.toast(f"🗑️ {resultado['eliminados']} registros eliminados")
 
-        # Actualizar estado y notificar
-        st.session_state.consulta_actual['datos_originales'] = datos_editados.copy()
         st.success("**¡Operaciones completadas exitosamente!** ✅")
         self._reiniciar_busqueda()
         
-    def _detectar_cambios(self, original, editado, reg_limpio):
-        cambios = {}
-        campos_relevantes = ['fecha', 'categoria', 'producto', 'monto', 'cantidad', 'unidad_medida']
-        
-        for campo in campos_relevantes:
-            if campo not in reg_limpio:
-                continue
-                
-            v_editado = editado.get(campo)
-            v_original = original.get(campo)
-            
-            # Normalizar fechas
-            if campo == "fecha":
-                v_editado = pd.to_datetime(v_editado).isoformat() if v_editado else None
-                v_original = pd.to_datetime(v_original).isoformat() if v_original else None
-            
-            # Comparación estricta
-            if v_editado != v_original:
-                cambios[campo] = v_editado
-        
-        return cambios
-    
     def _restaurar_datos_originales(self):
-        """Restaura los datos a su estado original antes de las ediciones"""
-        st.session_state.consulta_actual['datos_editados'] = st.session_state.consulta_actual['datos_originales'].copy()
+        """Descarta los cambios pendientes de todas las páginas"""
+        consulta = st.session_state.consulta_actual
+        consulta['cambios'] = {}
+        consulta['eliminados'] = set()
+        consulta['originales'] = {}
         st.rerun()
 
     def _reiniciar_busqueda(self):
@@ -222,9 +306,3 @@ class ConsultasComprasGastosUI(BaseEditableUI):
             if key in st.session_state:
                 del st.session_state[key]
         st.rerun()
-    
-    def _actualizar_registro(self, datos):
-        tabla = "compras" if datos["categoria"] == "mercancía" else "gastos"
-        self.logic.db.client.table(tabla).update(datos).eq("id", datos["id"]).execute()
-
-    
\ No newline at end of file
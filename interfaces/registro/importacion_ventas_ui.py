@@ -0,0 +1,66 @@
+import streamlit as st
+from utils.error_handler import ErrorHandler
+
+class ImportacionVentasUI:
+    def __init__(self, importacion_logic):
+        self.logic = importacion_logic
+
+    def mostrar_interfaz(self):
+        st.header("🧾 Importar Ventas del POS")
+        st.caption(
+            "Archivo CSV o Excel (.xlsx) con las columnas: "
+            + ", ".join(f"`{c}`" for c in self.logic.COLUMNAS)
+            + ". Los días ya importados se omiten."
+        )
+
+        archivo = st.file_uploader("Archivo de ventas", type=["csv", "txt", "xlsx"])
+        if archivo is None:
+            return
+
+        if st.button("📤 Importar", type="primary"):
+            self._importar(archivo)
+
+    def _importar(self, archivo):
+        barra = st.progress(0.0, text="Leyendo archivo...")
+
+        def al_progresar(progreso, resumen):
+            barra.progress(
+                progreso,
+                text=f"{resumen['leidas']:,} líneas leídas · {resumen['insertadas']:,} insertadas"
+            )
+
+        try:
+            resumen = self.logic.importar(archivo, archivo.name, al_progresar=al_progresar)
+        except ValueError as e:
+            barra.empty()
+            st.error(f"**Archivo no válido:** {str(e)}")
+            return
+        except Exception as e:
+            barra.empty()
+            ErrorHandler.handle_db_error(e, "importación de ventas")
+            return
+
+        barra.progress(1.0, text="Importación finalizada")
+        self._mostrar_resumen(resumen)
+
+    def _mostrar_resumen(self, resumen):
+        cols = st.columns(4)
+        cols[0].metric("Líneas leídas", f"{resumen['leidas']:,}")
+        cols[1].metric("Insertadas", f"{resumen['insertadas']:,}")
+        cols[2].metric("Con errores", f"{resumen['invalidas']:,}")
+        cols[3].metric("Días omitidos", f"{resumen['dias_omitidos']:,}")
+
+        if resumen['omitidas']:
+            st.info(f"{resumen['omitidas']:,} líneas pertenecían a días ya importados")
+
+        if resumen['dias_pendientes']:
+            st.info(
+                f"{resumen['dias_pendientes']:,} días con errores no se marcaron como importados: "
+                "corrija las líneas y vuelva a importar el archivo"
+            )
+
+        if not resumen['errores'].empty:
+            st.warning(f"Se muestran las primeras {len(resumen['errores'])} líneas con errores")
+            st.dataframe(resumen['errores'], hide_index=True, use_container_width=True)
+        elif resumen['insertadas']:
+            st.success(f"**¡Ventas importadas!** ✅ {resumen['dias_importados']} días")
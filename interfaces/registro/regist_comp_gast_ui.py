@@ -2,14 +2,14 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from interfaces.base_ui import BaseEditableUI
-from utils.data_processing import procesar_dataframe_editado
+from utils.data_processing import convertir_registros, mostrar_errores_edicion
+from utils.diff_registros import calcular_diff, hay_cambios
 from utils.error_handler import ErrorHandler
 
 class RegistroUI(BaseEditableUI):
     def __init__(self, registro_manager):
         super().__init__()
         self.manager = registro_manager
-        self._inicializar_estado()
         
     def _inicializar_estado(self):
         if 'registros_temporales' not in st.session_state:
@@ -17,9 +17,99 @@ class RegistroUI(BaseEditableUI):
         
     def mostrar_interfaz(self):
         st.header("📥 Registro de Compras y Gastos")
-        self._mostrar_formulario()
+        # Se llama en cada rerun: la vista se reutiliza entre reruns (ver interfaces.rutas)
+        self._inicializar_estado()
+        modo = st.radio("Modo de registro", ["Formulario", "Archivo"], horizontal=True)
+        if modo == "Formulario":
+            self._mostrar_formulario()
+        else:
+            self._mostrar_carga_archivo()
+        self._mostrar_resumen_importacion()
         self._mostrar_tabla_editable()
 
+    def _mostrar_carga_archivo(self):
+        """Carga masiva desde CSV o Excel con asignación de columnas"""
+        archivo = st.file_uploader("Archivo de compras y gastos", type=["csv", "txt", "xlsx"])
+        if archivo is None:
+            return
+
+        try:
+            encabezados = self.manager.leer_encabezados(archivo, archivo.name)
+        except Exception as e:
+            st.error(f"**Archivo no válido:** {str(e)}")
+            return
+
+        sugerido = self.manager.sugerir_mapeo(encabezados)
+        opciones = [None] + encabezados
+        with st.expander("🔀 Columnas del archivo", expanded=True):
+            cols = st.columns(4)
+            mapeo = {
+                campo: cols[i % 4].selectbox(
+                    campo + (" *" if campo in self.manager.CAMPOS_ARCHIVO_OBLIGATORIOS else ""),
+                    opciones,
+                    index=opciones.index(sugerido[campo]),
+                    format_func=lambda c: "—" if c is None else c,
+                    key=f"mapeo_{campo}"
+                )
+                for i, campo in enumerate(self.manager.CAMPOS_ARCHIVO)
+            }
+            categoria = None
+            if not mapeo['categoria']:
+                categoria = st.selectbox(
+                    "Categoría para todas las filas", ["Mercancía", "Equipos", "Nomina", "Servicios", "Otros"]
+                ).lower()
+
+        if not st.button("📤 Importar archivo", type="primary"):
+            return
+
+        barra = st.progress(0.0, text="Leyendo archivo...")
+
+        def al_progresar(progreso, resumen):
+            barra.progress(
+                progreso,
+                text=f"{resumen['leidas']:,} líneas leídas · {resumen['insertadas']:,} guardadas"
+            )
+
+        try:
+            resumen = self.manager.importar_archivo(
+                archivo, mapeo, archivo.name, categoria, al_progresar=al_progresar
+            )
+        except ValueError as e:
+            barra.empty()
+            st.error(f"**No se puede importar:** {str(e)}")
+            return
+        except Exception as e:
+            barra.empty()
+            ErrorHandler.handle_db_error(e, "importación de compras y gastos")
+            return
+
+        st.session_state.resumen_importacion = resumen
+        st.rerun()
+
+    def _mostrar_resumen_importacion(self):
+        """Resultado de la última carga de archivo (sobrevive al rerun)"""
+        resumen = st.session_state.pop('resumen_importacion', None)
+        if not resumen:
+            return
+
+        cols = st.columns(3)
+        cols[0].metric("Líneas leídas", f"{resumen['leidas']:,}")
+        cols[1].metric("Guardadas", f"{resumen['insertadas']:,}")
+        cols[2].metric("Con errores", f"{resumen['invalidas']:,}")
+
+        if resumen['omitidas']:
+            st.info(f"{resumen['omitidas']:,} líneas ya se habían importado antes y se omitieron")
+
+        if resumen['invalidas']:
+            st.warning(
+                f"{resumen['pendientes']:,} líneas con errores se pasaron a la tabla para corregirlas"
+                + (f"; {resumen['invalidas'] - resumen['pendientes']:,} no caben y deben corregirse en el archivo"
+                   if resumen['pendientes'] < resumen['invalidas'] else "")
+            )
+            st.dataframe(resumen['errores'], hide_index=True, use_container_width=True)
+        else:
+            st.success("**¡Archivo importado!** ✅")
+
     def _mostrar_formulario(self):
         with st.form("form_compras_gastos"):
              self._render_campos_formulario()
@@ -62,7 +152,50 @@ class RegistroUI(BaseEditableUI):
             else:
                 st.toast(msg)
 
+    def _mostrar_resumen_confirmacion(self):
+        """Muestra el resultado de la última confirmación (sobrevive al rerun)"""
+        resumen = st.session_state.pop('resumen_confirmacion', None)
+        if not resumen:
+            return
+
+        if resumen['errores']:
+            ErrorHandler.display_validation_errors(resumen['errores'], "guardado")
+        else:
+            st.success("**¡Datos guardados!** ✅")
+            st.balloons()
+        if resumen['encolados']:
+            st.caption(
+                f"📨 {resumen['encolados']} registros en cola de envío ({resumen['duracion']:.2f} s); "
+                "el estado aparece en la barra lateral"
+            )
+        else:
+            st.caption(
+                f"⏱️ {resumen['insertados']} registros guardados en {resumen['duracion']:.2f} s"
+            )
+
+    def _aplicar_ediciones(self, diff, edited_df):
+        """Aplica a los registros temporales las filas editadas, borradas y añadidas.
+
+        Las filas se identifican por su posición, que es el índice del DataFrame.
+        """
+        actualizados = diff['actualizados']
+        procesados = dict(zip(actualizados, convertir_registros(edited_df.loc[list(actualizados)])))
+        eliminados = set(diff['eliminados'])
+
+        registros = []
+        for idx, reg in enumerate(st.session_state.registros_temporales):
+            if idx in eliminados:
+                continue
+            if idx in procesados:
+                reg = {**reg, **{campo: procesados[idx][campo] for campo in actualizados[idx]}}
+            registros.append(reg)
+
+        registros.extend(convertir_registros(diff['insertados']))
+        st.session_state.registros_temporales = registros
+
     def _mostrar_tabla_editable(self):
+        self._mostrar_resumen_confirmacion()
+
         if st.session_state.registros_temporales:
             st.subheader("📋 Registros a confirmar")
 
@@ -75,15 +208,12 @@ class RegistroUI(BaseEditableUI):
             # Configurar columnas editables
             edited_df = self._create_data_editor(df, "registro")
             
-            # Actualizar registros temporales inmediatamente
-            try:
-                edited_data = procesar_dataframe_editado(edited_df)
-            except ValueError as e:
-                st.error(f"Error de formato: {str(e)}")
-                st.stop()
-            
-            if not edited_df.equals(df):
-                st.session_state.registros_temporales = edited_data
+            mostrar_errores_edicion(edited_df)
+
+            # Actualizar registros temporales inmediatamente (solo filas cambiadas)
+            diff = calcular_diff(df, edited_df)
+            if hay_cambios(diff):
+                self._aplicar_ediciones(diff, edited_df)
                 st.rerun()  # Forzar actualización
             
         # Botón de confirmación
@@ -92,10 +222,7 @@ class RegistroUI(BaseEditableUI):
                 st.error("📭 **Tabla vacía:** Agrega registros antes de confirmar")
             else:
                 try:
-                    self.manager.confirmar_registros()
-                    st.success("**¡Datos guardados!** ✅")
-                    st.balloons()
-                    st.session_state.registros_temporales = []
+                    st.session_state.resumen_confirmacion = self.manager.confirmar_registros()
                     st.rerun()
                     
                 except RuntimeError as e:
@@ -0,0 +1,88 @@
+import importlib
+import sys
+import time
+import streamlit as st
+from utils.instrumentacion import Instrumentacion
+
+# Entrada del menú -> vista y lógica que la atienden. Los módulos se importan
+# la primera vez que se selecciona la entrada, no al arrancar la app.
+RUTAS = {
+    "Registro": {
+        "icono": "cloud-upload",
+        "vista": ("interfaces.registro.regist_comp_gast_ui", "RegistroUI"),
+        "logica": ("modules.logic.regist_compras_gastos_logic", "RegistroManager")
+    },
+    "Consulta": {
+        "icono": "search",
+        "vista": ("interfaces.consultas.cons_compras_gastos_ui", "ConsultasComprasGastosUI"),
+        "logica": ("modules.logic.cons_compras_gastos_logic", "ConsultasComprasGastosLogic")
+    },
+    "Importar Ventas": {
+        "icono": "receipt",
+        "vista": ("interfaces.registro.importacion_ventas_ui", "ImportacionVentasUI"),
+        "logica": ("modules.logic.importacion_ventas_logic", "ImportacionVentasLogic")
+    },
+    "Análisis": {
+        "icono": "graph-up",
+        "vista": ("interfaces.analisis.analisis_ventas_ui", "AnalisisVentasUI"),
+        "logica": ("modules.logic.analisis_ventas_logic", "AnalisisVentasLogic")
+    },
+    "Precio Ponderado": {
+        "icono": "bar-chart",
+        "vista": ("interfaces.analisis.precio_ponderado_ui", "PrecioPonderadoUI"),
+        "logica": ("modules.logic.precio_ponderado_logic", "PrecioPonderadoLogic")
+    }
+}
+
+
+def importar(ruta_modulo: str):
+    """importlib.import_module que registra el tiempo de la primera importación"""
+    if ruta_modulo in sys.modules:
+        return sys.modules[ruta_modulo]
+    inicio = time.perf_counter()
+    with Instrumentacion.bloque(f"import {ruta_modulo}", "importacion"):
+        modulo = importlib.import_module(ruta_modulo)
+    Instrumentacion.registrar_importacion(ruta_modulo, time.perf_counter() - inicio)
+    return modulo
+
+
+def _clase(destino: tuple):
+    ruta_modulo, nombre_clase = destino
+    return getattr(importar(ruta_modulo), nombre_clase)
+
+
+@st.cache_resource
+def _logica(nombre: str, _data_service):
+    """Lógica de la ruta, compartida entre sesiones como el DataService"""
+    return _clase(RUTAS[nombre]["logica"])(_data_service)
+
+
+class RegistroRutas:
+    """Construye bajo demanda la vista de cada entrada del menú.
+
+    Las vistas se guardan en la sesión, así que cada rerun solo ejecuta
+    `mostrar_interfaz` de la entrada seleccionada; la lógica se comparte
+    entre sesiones.
+    """
+
+    @staticmethod
+    def opciones() -> list[str]:
+        return list(RUTAS)
+
+    @staticmethod
+    def iconos() -> list[str]:
+        return [ruta["icono"] for ruta in RUTAS.values()]
+
+    @staticmethod
+    def vista(nombre: str, data_service):
+        vistas = st.session_state.setdefault("vistas", {})
+        if nombre not in vistas:
+            vistas[nombre] = _clase(RUTAS[nombre]["vista"])(_logica(nombre, data_service))
+        return vistas[nombre]
+
+    @staticmethod
+    def mostrar(nombre: str, data_service):
+        if nombre not in RUTAS:
+            st.error("Opción no válida")
+            return
+        RegistroRutas.vista(nombre, data_service).mostrar_interfaz()
@@ -1,6 +1,9 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import os
+import pandas as pd
+from utils.instrumentacion import Instrumentacion
+from interfaces.rutas import RegistroRutas
 
 class SidebarManager:
     def __init__(self):
@@ -8,8 +11,8 @@ class SidebarManager:
         
     def _render(self):
         self.menu_config = {
-            "options": ["Registro", "Consulta", "Precio Ponderado"],
-            "icons": ["cloud-upload", "search", "bar-chart"],
+            "options": RegistroRutas.opciones(),
+            "icons": RegistroRutas.iconos(),
             "styles": {
                 "container": {"padding": "0!important"},
                 "nav-link": {"font-size": "16px"}
@@ -46,6 +49,69 @@ class SidebarManager:
             self._render_menu()
             st.markdown("---")
             self._render_logout()
+            # Se rellena al final del rerun con mostrar_panel_rendimiento
+            self.panel_rendimiento = st.container() if self._es_administrador() else None
+
+    @staticmethod
+    def _es_administrador() -> bool:
+        """Usuarios listados en el secreto ADMIN_USERS"""
+        try:
+            administradores = st.secrets.get("ADMIN_USERS", [])
+        except FileNotFoundError:
+            return False
+        return st.session_state.get("user") in administradores
+
+    def mostrar_panel_rendimiento(self) -> None:
+        """Desglose de tiempos del rerun actual (solo administradores)"""
+        if self.panel_rendimiento is None:
+            return
+
+        with self.panel_rendimiento.expander("⏱️ Rendimiento del rerun"):
+            if Instrumentacion.activa:
+                eventos, por_capa = Instrumentacion.resumen_rerun()
+                st.dataframe(
+                    pd.DataFrame({"ms": por_capa}).round(1),
+                    use_container_width=True
+                )
+                if not eventos.empty:
+                    st.dataframe(eventos.round(1), hide_index=True, use_container_width=True)
+            else:
+                st.caption("Mediciones desactivadas; se activan con INSTRUMENTACION=1 (entorno o secretos)")
+
+            importaciones = Instrumentacion.importaciones()
+            if importaciones:
+                st.caption("Importaciones en frío de este proceso")
+                st.dataframe(
+                    (pd.Series(importaciones, name="ms") * 1000).round(1),
+                    use_container_width=True
+                )
+
+            if Instrumentacion.activa and st.button("💾 Exportar percentiles", use_container_width=True):
+                ruta = Instrumentacion.exportar_percentiles()
+                st.success(f"Percentiles guardados en {ruta}")
+
+    def mostrar_estado_envios(self, diario) -> None:
+        """Pendientes y fallidos del diario de escritura diferida (si está activo)"""
+        if diario is None:
+            return
+        with st.sidebar:
+            self._render_estado_envios(diario)
+
+    @staticmethod
+    @st.fragment(run_every=15)
+    def _render_estado_envios(diario) -> None:
+        # Fragmento: se refresca solo mientras el hilo del diario envía
+        conteos = diario.conteos()
+        cols = st.columns(2)
+        cols[0].metric("📨 Pendientes", conteos['pendiente'], help=diario.ultimo_error)
+        cols[1].metric("⚠️ Fallidos", conteos['fallido'])
+
+        if conteos['fallido']:
+            with st.expander("Registros fallidos"):
+                st.dataframe(pd.DataFrame(diario.fallidos()), hide_index=True, use_container_width=True)
+                if st.button("🔁 Reintentar fallidos", use_container_width=True):
+                    diario.reintentar_fallidos()
+                    st.rerun()
 
     @property
     def menu_option(self) -> str:
@@ -29,6 +29,10 @@ class ColumnConfigFactory:
                 "Cantidad", 
                 format="%.3f", 
                 required=True
-            )
+            ),
+            # Se recalcula al guardar a partir de `producto`
+            "producto_clave": None,
+            # Solo la usan los envíos del diario de escritura diferida
+            "clave_idempotencia": None
         }
     
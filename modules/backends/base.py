@@ -0,0 +1,25 @@
+class BackendBase:
+    """Interfaz común de los backends de almacenamiento.
+
+    Los backends exponen la misma API encadenable que el cliente de Supabase
+    (PostgREST), de modo que DataService y DatabaseManager funcionan sin
+    cambios sobre cualquiera de ellos:
+
+        backend.table("compras").select("fecha,monto").gte("fecha", "2024-01-01").execute().data
+        backend.table("compras").insert([...]).execute().data
+        backend.table("compras").upsert([...], on_conflict="id").execute().data
+        backend.table("compras").delete().in_("id", [1, 2]).execute().data
+        backend.rpc("precio_ponderado_agregado", params={...}).execute().data
+
+    Filtros soportados: eq, neq, gt, gte, lt, lte, like, ilike, in_, or_;
+    modificadores: order, limit, range y select(count="exact").
+    """
+    nombre = None
+    # Dialecto SQL de las migraciones (ver modules/migraciones)
+    dialecto = None
+
+    def table(self, nombre: str):
+        raise NotImplementedError
+
+    def rpc(self, funcion: str, params: dict):
+        raise NotImplementedError
@@ -0,0 +1,50 @@
+from modules.backends.base import BackendBase
+from utils.instrumentacion import Instrumentacion
+
+# Métodos del constructor de consultas que fijan la operación
+OPERACIONES = ("select", "insert", "upsert", "update", "delete")
+
+
+class ConsultaInstrumentada:
+    """Envuelve un constructor de consultas y mide su `execute()`"""
+
+    def __init__(self, consulta, nombre: str):
+        self._consulta = consulta
+        self._nombre = nombre
+
+    def execute(self):
+        with Instrumentacion.bloque(self._nombre, "red") as evento:
+            return evento.registrar(self._consulta.execute())
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._consulta, atributo)
+        if hasattr(valor, "execute"):
+            return ConsultaInstrumentada(valor, self._nombre)
+        if not callable(valor):
+            return valor
+
+        def encadenar(*args, **kwargs):
+            resultado = valor(*args, **kwargs)
+            if not hasattr(resultado, "execute"):
+                return resultado
+            nombre = f"{self._nombre}.{atributo}" if atributo in OPERACIONES else self._nombre
+            return ConsultaInstrumentada(resultado, nombre)
+        return encadenar
+
+
+class BackendInstrumentado(BackendBase):
+    """Backend que delega en otro y registra cada petición (tiempo, filas y bytes)"""
+
+    def __init__(self, backend: BackendBase):
+        self.backend = backend
+        self.nombre = backend.nombre
+        self.dialecto = backend.dialecto
+
+    def table(self, nombre: str):
+        return ConsultaInstrumentada(self.backend.table(nombre), nombre)
+
+    def rpc(self, funcion: str, params: dict):
+        return ConsultaInstrumentada(self.backend.rpc(funcion, params), f"rpc.{funcion}")
+
+    def __getattr__(self, atributo):
+        return getattr(self.backend, atributo)
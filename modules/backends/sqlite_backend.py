@@ -0,0 +1,450 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from modules.backends.base import BackendBase
+from utils.validators import ValidadorRegistros
+
+# Inicio de periodo equivalente a date_trunc de Postgres (semanas desde el lunes)
+PERIODOS_SQLITE = {
+    "day": "fecha",
+    "week": "date(fecha, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', fecha)"
+}
+
+# Columnas por las que `ventas_agregadas` puede desglosar
+DIMENSIONES_VENTAS = ("grupo", "nombre", "entidad", "cliente")
+
+_IDENTIFICADOR = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class Respuesta:
+    """Equivalente mínimo de APIResponse de postgrest"""
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class ConsultaSQLite:
+    """Constructor de consultas con la misma API encadenable que PostgREST"""
+    OPERADORES = {
+        'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=',
+        'lt': '<', 'lte': '<=', 'like': 'LIKE', 'ilike': 'LIKE'
+    }
+
+    def __init__(self, backend, tabla: str):
+        self.backend = backend
+        self.tabla = self._identificador(tabla)
+        self.operacion = 'select'
+        self.columnas = '*'
+        self.datos = None
+        self.condiciones = []
+        self.parametros = []
+        self.orden = []
+        self.limite = None
+        self.desplazamiento = None
+        self.contar = None
+        self.solo_conteo = False
+        self.on_conflict = None
+        self.ignorar_duplicados = False
+        self.nulos_por_defecto = True
+        self.unico = False
+
+    # ---------- utilidades ----------
+    @staticmethod
+    def _identificador(nombre: str) -> str:
+        nombre = nombre.strip()
+        if nombre != '*' and not _IDENTIFICADOR.match(nombre):
+            raise ValueError(f"Identificador no válido: {nombre}")
+        return nombre
+
+    @staticmethod
+    def _valor(valor):
+        if isinstance(valor, datetime):
+            return valor.isoformat(sep=' ')
+        if isinstance(valor, date):
+            return valor.isoformat()
+        if isinstance(valor, Decimal):
+            return float(valor)
+        if isinstance(valor, (dict, list)):
+            return json.dumps(valor)
+        if hasattr(valor, 'item'):
+            # Escalares de numpy/pandas
+            return valor.item()
+        return valor
+
+    # ---------- operaciones ----------
+    def select(self, *columnas, count=None, head=None):
+        self.operacion = 'select'
+        if columnas:
+            nombres = [c for col in columnas for c in col.split(',') if c.strip()]
+            self.columnas = ', '.join(self._identificador(c) for c in nombres)
+        self.contar = count
+        self.solo_conteo = bool(head)
+        return self
+
+    def insert(self, json, *, count=None, returning=None, upsert=False, default_to_null=True):
+        self.operacion = 'upsert' if upsert else 'insert'
+        self.datos = json if isinstance(json, list) else [json]
+        self.nulos_por_defecto = default_to_null and isinstance(json, list)
+        return self
+
+    def upsert(self, json, *, count=None, returning=None, ignore_duplicates=False,
+               on_conflict="", default_to_null=True):
+        self.insert(json, default_to_null=default_to_null)
+        self.operacion = 'upsert'
+        self.on_conflict = [self._identificador(c) for c in (on_conflict or 'id').split(',')]
+        self.ignorar_duplicados = ignore_duplicates
+        return self
+
+    def update(self, json, *, count=None, returning=None):
+        self.operacion = 'update'
+        self.datos = json
+        return self
+
+    def delete(self, *, count=None, returning=None):
+        self.operacion = 'delete'
+        return self
+
+    # ---------- filtros ----------
+    def _condicion(self, columna, operador, valor):
+        columna = self._identificador(columna)
+        if operador == 'is':
+            if str(valor).lower() in ('null', 'none'):
+                return f"{columna} IS NULL", []
+            return f"{columna} IS ?", [valor]
+        if operador == 'in':
+            valores = list(valor)
+            if not valores:
+                return "0", []
+            return f"{columna} IN ({', '.join('?' * len(valores))})", [self._valor(v) for v in valores]
+        if operador not in self.OPERADORES:
+            raise ValueError(f"Operador no soportado: {operador}")
+        if operador in ('like', 'ilike'):
+            valor = str(valor).replace('*', '%')
+        return f"{columna} {self.OPERADORES[operador]} ?", [self._valor(valor)]
+
+    def _filtrar(self, columna, operador, valor):
+        condicion, parametros = self._condicion(columna, operador, valor)
+        self.condiciones.append(condicion)
+        self.parametros.extend(parametros)
+        return self
+
+    def eq(self, columna, valor): return self._filtrar(columna, 'eq', valor)
+    def neq(self, columna, valor): return self._filtrar(columna, 'neq', valor)
+    def gt(self, columna, valor): return self._filtrar(columna, 'gt', valor)
+    def gte(self, columna, valor): return self._filtrar(columna, 'gte', valor)
+    def lt(self, columna, valor): return self._filtrar(columna, 'lt', valor)
+    def lte(self, columna, valor): return self._filtrar(columna, 'lte', valor)
+    def like(self, columna, patron): return self._filtrar(columna, 'like', patron)
+    def ilike(self, columna, patron): return self._filtrar(columna, 'ilike', patron)
+    def in_(self, columna, valores): return self._filtrar(columna, 'in', valores)
+    def is_(self, columna, valor): return self._filtrar(columna, 'is', valor)
+
+    @staticmethod
+    def _dividir(texto: str) -> list[str]:
+        """Divide por comas de primer nivel (fuera de paréntesis)"""
+        partes, profundidad, actual = [], 0, ''
+        for caracter in texto:
+            if caracter == ',' and profundidad == 0:
+                partes.append(actual)
+                actual = ''
+                continue
+            profundidad += caracter == '('
+            profundidad -= caracter == ')'
+            actual += caracter
+        partes.append(actual)
+        return [p.strip() for p in partes if p.strip()]
+
+    def _arbol_logico(self, texto: str, union: str):
+        condiciones, parametros = [], []
+        for parte in self._dividir(texto):
+            anidado = re.match(r'^(and|or)\((.*)\)$', parte)
+            if anidado:
+                condicion, params = self._arbol_logico(anidado.group(2), anidado.group(1).upper())
+            else:
+                columna, operador, valor = parte.split('.', 2)
+                if operador == 'in':
+                    valor = [v.strip() for v in valor.strip('()').split(',')]
+                condicion, params = self._condicion(columna, operador, valor)
+            condiciones.append(condicion)
+            parametros.extend(params)
+        return '(' + f' {union} '.join(condiciones) + ')', parametros
+
+    def or_(self, filtros: str, reference_table=None):
+        """Acepta la sintaxis de PostgREST: 'a.gt.1,and(b.eq.2,c.lt.3)'"""
+        condicion, parametros = self._arbol_logico(filtros, 'OR')
+        self.condiciones.append(condicion)
+        self.parametros.extend(parametros)
+        return self
+
+    # ---------- modificadores ----------
+    def order(self, columna, *, desc=False, nullsfirst=None, foreign_table=None):
+        clausula = f"{self._identificador(columna)} {'DESC' if desc else 'ASC'}"
+        if nullsfirst is not None:
+            clausula += " NULLS FIRST" if nullsfirst else " NULLS LAST"
+        self.orden.append(clausula)
+        return self
+
+    def limit(self, tamano, *, foreign_table=None):
+        self.limite = int(tamano)
+        return self
+
+    def range(self, inicio, fin, foreign_table=None):
+        self.desplazamiento = int(inicio)
+        self.limite = int(fin) - int(inicio) + 1
+        return self
+
+    def single(self):
+        self.unico = True
+        return self
+
+    # ---------- ejecución ----------
+    def _where(self) -> str:
+        return f" WHERE {' AND '.join(self.condiciones)}" if self.condiciones else ""
+
+    def sql(self) -> tuple[str, list]:
+        """SQL y parámetros de una consulta select (útil para EXPLAIN)"""
+        sql = f"SELECT {self.columnas} FROM {self.tabla}{self._where()}"
+        parametros = list(self.parametros)
+        if self.orden:
+            sql += f" ORDER BY {', '.join(self.orden)}"
+        if self.limite is not None or self.desplazamiento is not None:
+            sql += " LIMIT ? OFFSET ?"
+            parametros += [self.limite if self.limite is not None else -1, self.desplazamiento or 0]
+        return sql, parametros
+
+    def _filas_insercion(self):
+        """Agrupa las filas por conjunto de columnas (o rellena con NULL)"""
+        if self.nulos_por_defecto:
+            columnas = list(dict.fromkeys(c for fila in self.datos for c in fila))
+            return [(columnas, self.datos)]
+
+        grupos = {}
+        for fila in self.datos:
+            grupos.setdefault(tuple(fila), []).append(fila)
+        return [(list(columnas), filas) for columnas, filas in grupos.items()]
+
+    def _ejecutar_insercion(self, cursor) -> list[dict]:
+        resultado = []
+        for columnas, filas in self._filas_insercion():
+            columnas = [self._identificador(c) for c in columnas]
+            conflicto = ""
+            if self.operacion == 'upsert':
+                actualizables = [c for c in columnas if c not in self.on_conflict]
+                destino = f" ON CONFLICT ({', '.join(self.on_conflict)})"
+                if self.ignorar_duplicados or not actualizables:
+                    conflicto = destino + " DO NOTHING"
+                else:
+                    conflicto = destino + " DO UPDATE SET " + ", ".join(
+                        f"{c} = excluded.{c}" for c in actualizables
+                    )
+
+            # Respetar el límite de parámetros por sentencia de SQLite
+            filas_por_sentencia = max(1, 30000 // max(1, len(columnas)))
+            for inicio in range(0, len(filas), filas_por_sentencia):
+                bloque = filas[inicio:inicio + filas_por_sentencia]
+                marcadores = ", ".join(["(" + ", ".join("?" * len(columnas)) + ")"] * len(bloque))
+                parametros = [self._valor(fila.get(c)) for fila in bloque for c in columnas]
+                sql = (
+                    f"INSERT INTO {self.tabla} ({', '.join(columnas)}) VALUES {marcadores}"
+                    f"{conflicto} RETURNING *"
+                )
+                resultado.extend(self.backend._filas(cursor.execute(sql, parametros)))
+        return resultado
+
+    def execute(self) -> Respuesta:
+        with self.backend.lock, self.backend.conexion:
+            cursor = self.backend.conexion.cursor()
+
+            if self.operacion == 'select':
+                conteo = None
+                if self.contar:
+                    conteo = cursor.execute(
+                        f"SELECT COUNT(*) FROM {self.tabla}{self._where()}", self.parametros
+                    ).fetchone()[0]
+                if self.solo_conteo:
+                    return Respuesta([], conteo)
+                sql, parametros = self.sql()
+                datos = self.backend._filas(cursor.execute(sql, parametros))
+                if self.unico:
+                    if len(datos) != 1:
+                        raise ValueError("Se esperaba exactamente una fila")
+                    return Respuesta(datos[0], conteo)
+                return Respuesta(datos, conteo)
+
+            if self.operacion in ('insert', 'upsert'):
+                return Respuesta(self._ejecutar_insercion(cursor))
+
+            if self.operacion == 'update':
+                columnas = [self._identificador(c) for c in self.datos]
+                asignaciones = ", ".join(f"{c} = ?" for c in columnas)
+                parametros = [self._valor(self.datos[c]) for c in self.datos] + self.parametros
+                sql = f"UPDATE {self.tabla} SET {asignaciones}{self._where()} RETURNING *"
+                return Respuesta(self.backend._filas(cursor.execute(sql, parametros)))
+
+            sql = f"DELETE FROM {self.tabla}{self._where()} RETURNING *"
+            return Respuesta(self.backend._filas(cursor.execute(sql, self.parametros)))
+
+
+class LlamadaRPC:
+    def __init__(self, backend, funcion: str, params: dict):
+        self.backend = backend
+        self.funcion = funcion
+        self.params = params or {}
+
+    def execute(self) -> Respuesta:
+        implementacion = getattr(self.backend, f"_rpc_{self.funcion}", None)
+        if implementacion is None:
+            raise ValueError(f"Función RPC no disponible en SQLite: {self.funcion}")
+        with self.backend.lock, self.backend.conexion:
+            return Respuesta(implementacion(self.backend.conexion.cursor(), **self.params))
+
+
+class SQLiteBackend(BackendBase):
+    """Backend local embebido para desarrollo, pruebas de carga y benchmarks.
+
+    Implementa en Python las funciones RPC que en Supabase son funciones de
+    Postgres, de modo que DataService y la lógica funcionan sin red.
+    """
+    nombre = "sqlite"
+    dialecto = "sqlite"
+
+    def __init__(self, ruta: str = ":memory:"):
+        self.ruta = ruta
+        self.lock = threading.RLock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        # Equivalente de la función normalizar_producto() de Postgres
+        self.conexion.create_function(
+            "normalizar_producto", 1, ValidadorRegistros.normalizar_producto, deterministic=True
+        )
+
+    @staticmethod
+    def _filas(cursor) -> list[dict]:
+        columnas = [c[0] for c in cursor.description or []]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def table(self, nombre: str):
+        return ConsultaSQLite(self, nombre)
+
+    def rpc(self, funcion: str, params: dict):
+        return LlamadaRPC(self, funcion, params)
+
+    def explicar(self, consulta: ConsultaSQLite) -> list[str]:
+        """Plan de ejecución (EXPLAIN QUERY PLAN) de una consulta select"""
+        sql, parametros = consulta.sql()
+        with self.lock:
+            filas = self.conexion.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+        return [fila[-1] for fila in filas]
+
+    # ---------- funciones RPC ----------
+    def _rpc_execute_sql(self, cursor, query: str):
+        cursor.executescript(query)
+        return []
+
+    def _rpc_precio_ponderado_agregado(self, cursor, p_producto_clave, p_fecha_inicio, p_fecha_fin, p_intervalo=None):
+        periodo = "?" if p_intervalo is None else PERIODOS_SQLITE[p_intervalo]
+        parametros = [p_fecha_inicio] if p_intervalo is None else []
+        sql = f"""
+            SELECT {periodo} AS periodo,
+                   SUM(monto) AS sum_monto,
+                   SUM(cantidad) AS sum_cantidad,
+                   COUNT(*) AS n,
+                   MIN(monto / NULLIF(cantidad, 0)) AS precio_min,
+                   MAX(monto / NULLIF(cantidad, 0)) AS precio_max
+              FROM compras
+             WHERE producto_clave = ?
+               AND fecha BETWEEN ? AND ?
+             GROUP BY 1
+             ORDER BY 1
+        """
+        return self._filas(cursor.execute(sql, parametros + [p_producto_clave, p_fecha_inicio, p_fecha_fin]))
+
+    def _rpc_aplicar_deltas_compras_rollup(self, cursor, p_deltas):
+        cursor.executemany(
+            """
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            VALUES (:producto_clave, :unidad_medida, :mes, :sum_monto, :sum_cantidad, :n)
+            ON CONFLICT (producto_clave, unidad_medida, mes) DO UPDATE
+               SET sum_monto = sum_monto + excluded.sum_monto,
+                   sum_cantidad = sum_cantidad + excluded.sum_cantidad,
+                   n = n + excluded.n
+            """,
+            p_deltas
+        )
+        cursor.execute("DELETE FROM compras_rollup WHERE n <= 0")
+        return []
+
+    def _rpc_recalcular_compras_rollup(self, cursor, p_grupos):
+        cursor.executemany(
+            "DELETE FROM compras_rollup WHERE producto_clave = :producto_clave "
+            "AND unidad_medida = :unidad_medida AND mes = :mes",
+            p_grupos
+        )
+        cursor.executemany("""
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(producto_clave, ''), unidad_medida, strftime('%Y-%m-01', fecha),
+                   SUM(monto), SUM(cantidad), COUNT(*)
+              FROM compras
+             WHERE COALESCE(producto_clave, '') = :producto_clave
+               AND unidad_medida = :unidad_medida
+               AND fecha >= :mes AND fecha < date(:mes, '+1 month')
+             GROUP BY 1, 2, 3
+        """, p_grupos)
+        return []
+
+    def _rpc_reconstruir_compras_rollup(self, cursor):
+        cursor.execute("DELETE FROM compras_rollup")
+        cursor.execute("""
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(producto_clave, ''), unidad_medida, strftime('%Y-%m-01', fecha),
+                   SUM(monto), SUM(cantidad), COUNT(*)
+              FROM compras
+             GROUP BY 1, 2, 3
+        """)
+        return []
+
+    def _rpc_recalcular_ventas_diarias(self, cursor, p_fechas):
+        marcadores = ", ".join("?" * len(p_fechas))
+        cursor.execute(f"DELETE FROM ventas_diarias WHERE fecha IN ({marcadores})", p_fechas)
+        cursor.execute(f"""
+            INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+            SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+              FROM ventas
+             WHERE fecha IN ({marcadores})
+             GROUP BY 1, 2, 3, 4, 5
+        """, p_fechas)
+        return []
+
+    def _rpc_reconstruir_ventas_diarias(self, cursor):
+        cursor.execute("DELETE FROM ventas_diarias")
+        cursor.execute("""
+            INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+            SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+              FROM ventas
+             GROUP BY 1, 2, 3, 4, 5
+        """)
+        return []
+
+    def _rpc_ventas_agregadas(self, cursor, p_fecha_inicio, p_fecha_fin, p_intervalo=None, p_dimension=None, p_grupo=None):
+        periodo = "?" if p_intervalo is None else PERIODOS_SQLITE[p_intervalo]
+        dimension = p_dimension if p_dimension in DIMENSIONES_VENTAS else "'total'"
+        parametros = [p_fecha_inicio] if p_intervalo is None else []
+        sql = f"""
+            SELECT {periodo} AS periodo,
+                   {dimension} AS dimension,
+                   SUM(ingresos) AS ingresos,
+                   SUM(unidades) AS unidades,
+                   SUM(lineas) AS lineas
+              FROM ventas_diarias
+             WHERE fecha BETWEEN ? AND ?
+               AND (? IS NULL OR grupo = ?)
+             GROUP BY 1, 2
+             ORDER BY 1, 2
+        """
+        return self._filas(cursor.execute(sql, parametros + [p_fecha_inicio, p_fecha_fin, p_grupo, p_grupo]))
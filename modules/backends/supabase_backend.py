@@ -0,0 +1,21 @@
+import streamlit as st
+from supabase import create_client
+from modules.backends.base import BackendBase
+
+
+class SupabaseBackend(BackendBase):
+    """Backend remoto: Postgres a través de PostgREST (cliente de Supabase)"""
+    nombre = "supabase"
+    dialecto = "postgres"
+
+    def __init__(self, url: str = None, key: str = None):
+        self.client = create_client(
+            (url or st.secrets["SUPABASE_URL"]).strip(),
+            (key or st.secrets["SUPABASE_KEY"]).strip()
+        )
+
+    def table(self, nombre: str):
+        return self.client.table(nombre)
+
+    def rpc(self, funcion: str, params: dict):
+        return self.client.rpc(funcion, params=params)
@@ -1,7 +1,13 @@
+import json
+import os
 import streamlit as st
-from supabase import create_client
 import pandas as pd
 from utils.error_handler import ErrorHandler
+from utils.instrumentacion import Instrumentacion, instrumentar
+from modules.backends.instrumentado import BackendInstrumentado
+from modules.rollup_compras import RollupCompras
+from modules.rollup_ventas import RollupVentas
+from modules.migraciones.gestor import GestorMigraciones
 
 class DatabaseManager:
     _instance = None
@@ -11,69 +17,64 @@ class DatabaseManager:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
             cls._instance._inicializar_conexion()
         return cls._instance
-    
-    def _inicializar_conexion(self):
-        """Establece la conexión única con Supabase"""
-        self.client = create_client(
-            st.secrets["SUPABASE_URL"].strip(),
-            st.secrets["SUPABASE_KEY"].strip()
-        )
-        self._create_tables()
-
-    def _create_tables(self):
-        """Crear todas las tablas necesarias"""
-        
-        tables =  {
-            "compras": """
-                CREATE TABLE IF NOT EXISTS compras (
-                    id SERIAL PRIMARY KEY,
-                    fecha DATE NOT NULL,
-                    categoria VARCHAR(50) NOT NULL DEFAULT 'Mercancía',
-                    producto VARCHAR(100),
-                    cantidad NUMERIC(10,3) NOT NULL DEFAULT 1,
-                    unidad_medida VARCHAR(20) NOT NULL DEFAULT 'unidad',
-                    monto NUMERIC(10,2) NOT NULL,
-                    proveedor VARCHAR(100),
-                    descripcion TEXT,
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
-            """,
-
-            "gastos": """
-                CREATE TABLE IF NOT EXISTS gastos (
-                    id SERIAL PRIMARY KEY,
-                    fecha DATE NOT NULL,
-                    producto VARCHAR(100),
-                    categoria VARCHAR(50) NOT NULL,
-                    monto NUMERIC(10,2) NOT NULL,
-                    descripcion TEXT,
-                    proveedor VARCHAR(100),
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
-            """,
-
-            "ventas": """
-                CREATE TABLE IF NOT EXISTS ventas (
-                    id SERIAL PRIMARY KEY,
-                    fecha DATE NOT NULL,
-                    grupo VARCHAR(50) NOT NULL,
-                    nombre VARCHAR(100) NOT NULL,
-                    cantidad INTEGER NOT NULL,
-                    venta NUMERIC(10,2) NOT NULL,
-                    entidad VARCHAR(20) NOT NULL CHECK (entidad IN ('restaurante', 'domicilio')),
-                    cliente VARCHAR(20) NOT NULL CHECK (cliente IN ('clientes', 'cuenta_casa')),
-                    created_at TIMESTAMP DEFAULT NOW()
-            )
+
+    @classmethod
+    def con_backend(cls, backend):
+        """Crea un gestor independiente del singleton sobre un backend dado
+        (pruebas de carga, benchmarks o scripts offline)"""
+        instancia = super(DatabaseManager, cls).__new__(cls)
+        instancia._inicializar_conexion(backend)
+        return instancia
+
+    @staticmethod
+    def _crear_backend():
+        """Elige el backend con la variable de entorno o el secreto DB_BACKEND.
+
+        'supabase' (por defecto) usa SUPABASE_URL/SUPABASE_KEY; 'sqlite' usa
+        un archivo local indicado en DB_SQLITE_RUTA.
         """
-        }
+        nombre = os.environ.get("DB_BACKEND")
+        ruta = os.environ.get("DB_SQLITE_RUTA")
+        if nombre is None:
+            try:
+                nombre = st.secrets.get("DB_BACKEND", "supabase")
+                ruta = ruta or st.secrets.get("DB_SQLITE_RUTA")
+            except FileNotFoundError:
+                nombre = "supabase"
 
-        for tables, script in tables.items():
-            self.client.rpc('execute_sql', params={'query': script}).execute()
+        if nombre == "sqlite":
+            from modules.backends.sqlite_backend import SQLiteBackend
+            return SQLiteBackend(ruta or "restaurante.db")
+
+        from modules.backends.supabase_backend import SupabaseBackend
+        return SupabaseBackend()
     
+    def _inicializar_conexion(self, backend=None):
+        """Establece la conexión única con el backend de almacenamiento"""
+        self.client = backend or self._crear_backend()
+        if Instrumentacion.activa:
+            # Cada petición al backend queda medida (tiempo, filas y bytes)
+            self.client = BackendInstrumentado(self.client)
+        self._observadores = []
+        self.rollup_compras = RollupCompras()
+        self.rollup_ventas = RollupVentas()
+        self._aplicar_migraciones()
+
+    def _aplicar_migraciones(self):
+        """Aplica solo las migraciones de esquema pendientes (una lectura si no hay ninguna)"""
+        with Instrumentacion.bloque("migraciones", "db"):
+            GestorMigraciones(self.client).aplicar_pendientes()
+
+    @staticmethod
+    def _limpiar_datos(data: dict) -> dict:
+        """Convierte valores NaN/NA en None para que viajen como NULL"""
+        return {k: v if not pd.isna(v) else None for k, v in data.items()}
+
+    @instrumentar("db")
     def safe_insert(self, target_table: str, data: dict) -> dict:
         try:
             # Limpiar valores NaN/None
-            data_limpia = {k: v if not pd.isna(v) else None for k, v in data.items()}
+            data_limpia = self._limpiar_datos(data)
     
             # Insertar
             response = self.client.table(target_table).insert(data_limpia).execute()
@@ -92,6 +93,72 @@ class DatabaseManager:
             st.error(error_msg)
             raise
 
+    @instrumentar("db")
+    def safe_insert_lote(self, target_table: str, registros: list[dict], tamano_lote: int = 500) -> dict:
+        """Inserta registros en bloques multi-fila (una petición por bloque).
+
+        Si un bloque falla se reintenta fila a fila para aislar los registros
+        inválidos sin perder el resto. Los errores se devuelven con el índice
+        de la fila dentro de `registros`.
+        """
+        insertados = []
+        errores = []
+
+        for inicio in range(0, len(registros), tamano_lote):
+            bloque = [self._limpiar_datos(reg) for reg in registros[inicio:inicio + tamano_lote]]
+            try:
+                response = self.client.table(target_table).insert(bloque, default_to_null=False).execute()
+                insertados.extend(response.data)
+            except Exception:
+                for desplazamiento, fila in enumerate(bloque):
+                    try:
+                        response = self.client.table(target_table).insert(fila).execute()
+                        insertados.extend(response.data)
+                    except Exception as e:
+                        errores.append({
+                            'indice': inicio + desplazamiento,
+                            'datos': fila,
+                            'error': str(e)
+                        })
+
+        return {'insertados': insertados, 'errores': errores}
+
+    @instrumentar("db")
+    def insertar_idempotente(self, target_table: str, registros: list[dict], tamano_lote: int = 500) -> list[dict]:
+        """Inserta ignorando las filas cuya `clave_idempotencia` ya existe.
+
+        Lo usa el envío del diario de escritura diferida, que corre en su
+        propio hilo: no muestra nada en la UI sino que propaga los errores,
+        también los del rollup, para que el diario reintente el lote.
+        Devuelve solo las filas insertadas de verdad.
+        """
+        insertados, ignoradas = [], []
+        try:
+            for inicio in range(0, len(registros), tamano_lote):
+                bloque = [self._limpiar_datos(reg) for reg in registros[inicio:inicio + tamano_lote]]
+                response = self.client.table(target_table).upsert(
+                    bloque, on_conflict='clave_idempotencia', ignore_duplicates=True, default_to_null=False
+                ).execute()
+                insertados.extend(response.data)
+                nuevas = {str(fila['clave_idempotencia']) for fila in response.data}
+                ignoradas.extend(
+                    reg['clave_idempotencia'] for reg in bloque if str(reg['clave_idempotencia']) not in nuevas
+                )
+
+            if target_table == RollupCompras.TABLA:
+                self.rollup_compras.aplicar(self.client, [], insertados)
+                if ignoradas:
+                    # Ya insertadas en un envío cuya respuesta se perdió: no se sabe
+                    # si el rollup las sumó, así que se recalculan sus grupos
+                    self.rollup_compras.recalcular(
+                        self.client,
+                        self.rollup_compras.leer_filas(self.client, ignoradas, columna='clave_idempotencia')
+                    )
+        finally:
+            self._notificar_escritura(target_table)
+        return insertados
+
+    @instrumentar("db")
     def actualizar_registro(self, tabla: str, registro_id: int, nuevos_datos: dict) -> bool:
         try:
             self.client.table(tabla).update(nuevos_datos).eq('id', registro_id).execute()
@@ -100,6 +167,7 @@ class DatabaseManager:
             st.error(f"Error actualizando registro: {str(e)}")
             return False
     
+    @instrumentar("db")
     def eliminar_registro(self, tabla: str, registro_id: int) -> bool:
         try:
             # Verificar existencia del registro
@@ -123,17 +191,208 @@ class DatabaseManager:
             st.error(error_msg)
             return False
     
+    @instrumentar("db")
+    def actualizar_registros_lote(self, tabla: str, registros: list[dict], tamano_lote: int = 500) -> dict:
+        """Actualiza registros (incluyendo `id`) con PATCH, sin crear filas.
+
+        Solo se escriben las columnas presentes en cada registro; el resto de
+        la fila se conserva. Los registros con los mismos cambios comparten
+        un único `in_('id', ...)` por bloque. Un id que otra sesión borró
+        mientras se editaba no se recrea: no aparece en la respuesta y se
+        devuelve como faltante, igual que en `eliminar_registros_lote`.
+        """
+        grupos = {}
+        for reg in registros:
+            datos = self._limpiar_datos({campo: valor for campo, valor in reg.items() if campo != 'id'})
+            firma = json.dumps(datos, sort_keys=True, default=str)
+            grupos.setdefault(firma, (datos, []))[1].append(reg['id'])
+
+        actualizados = []
+        for datos, ids in grupos.values():
+            for inicio in range(0, len(ids), tamano_lote):
+                bloque = ids[inicio:inicio + tamano_lote]
+                actualizados.extend(self.client.table(tabla).update(datos).in_('id', bloque).execute().data)
+
+        ids_actualizados = {fila['id'] for fila in actualizados}
+        faltantes = [reg['id'] for reg in registros if reg['id'] not in ids_actualizados]
+        return {'actualizados': actualizados, 'faltantes': faltantes}
+
+    @instrumentar("db")
+    def eliminar_registros_lote(self, tabla: str, registro_ids: list[int], tamano_lote: int = 500) -> dict:
+        """Elimina registros con un único `in_('id', ...)` por bloque.
+
+        No consulta la existencia previa: los ids que no aparecen en la
+        respuesta del borrado se devuelven como faltantes.
+        """
+        eliminados = []
+        for inicio in range(0, len(registro_ids), tamano_lote):
+            bloque = registro_ids[inicio:inicio + tamano_lote]
+            response = self.client.table(tabla).delete().in_('id', bloque).execute()
+            eliminados.extend(response.data)
+
+        ids_eliminados = {reg['id'] for reg in eliminados}
+        faltantes = [reg_id for reg_id in registro_ids if reg_id not in ids_eliminados]
+        return {'eliminados': eliminados, 'faltantes': faltantes}
+
+    @instrumentar("db")
+    def eliminar_por_fechas(self, tabla: str, fechas: list[str], tamano_lote: int = 500) -> dict:
+        """Elimina todas las filas de `tabla` cuyas fechas estén en `fechas`"""
+        eliminados = []
+        for inicio in range(0, len(fechas), tamano_lote):
+            bloque = fechas[inicio:inicio + tamano_lote]
+            eliminados.extend(self.client.table(tabla).delete().in_('fecha', bloque).execute().data)
+        return {'eliminados': eliminados}
+
+    @instrumentar("db")
     def execute_safe_operation(self, operation, table, data=None, record_id=None):
             try:
+                filas_previas = self._filas_previas_rollup(operation, table, data, record_id)
+
                 if operation == 'insert':
-                    return self.safe_insert(table, data)
+                    resultado = self.safe_insert(table, data)
+                elif operation == 'bulk_insert':
+                    resultado = self.safe_insert_lote(table, data)
                 elif operation == 'update':
-                    return self.actualizar_registro(table, record_id, data)
+                    resultado = self.actualizar_registro(table, record_id, data)
                 elif operation == 'delete':
-                    return self.eliminar_registro(table, record_id)
+                    resultado = self.eliminar_registro(table, record_id)
+                elif operation == 'bulk_update':
+                    resultado = self.actualizar_registros_lote(table, data)
+                elif operation == 'bulk_delete':
+                    resultado = self.eliminar_registros_lote(table, record_id)
+                elif operation == 'delete_by_fecha':
+                    resultado = self.eliminar_por_fechas(table, record_id)
+                else:
+                    return None
+
+                self._actualizar_rollup(operation, table, resultado, filas_previas, record_id)
+                return resultado
             except Exception as e:
                 ErrorHandler.handle_db_error(e, f"{operation} en {table}")
                 raise
+            finally:
+                # Una escritura (aunque sea parcial) deja obsoletas las lecturas de la tabla
+                self._notificar_escritura(table)
+
+    def _filas_previas_rollup(self, operation, table, data, record_id) -> list[dict]:
+        """Lee el estado anterior de las filas de compras o ventas que se van a modificar"""
+        if table == RollupCompras.TABLA:
+            leer_filas = self.rollup_compras.leer_filas
+        elif table == RollupVentas.TABLA:
+            leer_filas = self.rollup_ventas.leer_fechas
+        else:
+            return []
+        if operation in ('update', 'delete'):
+            return leer_filas(self.client, [record_id])
+        if operation == 'bulk_update':
+            return leer_filas(self.client, [reg['id'] for reg in data])
+        return []
+
+    def _actualizar_rollup(self, operation, table, resultado, filas_previas, record_id):
+        """Aplica al rollup la diferencia entre las filas anteriores y las nuevas"""
+        if table == RollupVentas.TABLA:
+            self._actualizar_ventas_diarias(operation, resultado, filas_previas, record_id)
+            return
+        if table != RollupCompras.TABLA:
+            return
+
+        if operation == 'insert':
+            anteriores, nuevas = [], [resultado]
+        elif operation == 'bulk_insert':
+            anteriores, nuevas = [], resultado['insertados']
+        elif operation == 'update':
+            if not resultado:
+                return
+            anteriores, nuevas = filas_previas, self.rollup_compras.leer_filas(self.client, [record_id])
+        elif operation == 'delete':
+            if not resultado:
+                return
+            anteriores, nuevas = filas_previas, []
+        elif operation == 'bulk_update':
+            # Las filas borradas por otra sesión antes del PATCH ya restaron su parte
+            ids = {fila['id'] for fila in resultado['actualizados']}
+            anteriores = [fila for fila in filas_previas if fila['id'] in ids]
+            nuevas = resultado['actualizados']
+        else:
+            anteriores, nuevas = resultado['eliminados'], []
+
+        try:
+            self.rollup_compras.aplicar(self.client, anteriores, nuevas)
+        except Exception as e:
+            # La escritura ya se hizo; el rollup se corrige con reconstruir_rollup_compras
+            st.warning(f"No se pudo actualizar compras_rollup: {str(e)}")
+
+    def _actualizar_ventas_diarias(self, operation, resultado, filas_previas, record_id):
+        """Recalcula en ventas_diarias los días tocados por la escritura"""
+        if operation in ('update', 'delete') and not resultado:
+            return
+        try:
+            if operation == 'update':
+                # actualizar_registro no devuelve la fila: se relee la fecha nueva
+                resultado = self.rollup_ventas.leer_fechas(self.client, [record_id])
+            fechas = RollupVentas.fechas_afectadas(operation, resultado, filas_previas, record_id)
+            self.rollup_ventas.aplicar(self.client, fechas)
+        except Exception as e:
+            # La escritura ya se hizo; el rollup se corrige con reconstruir_ventas_diarias
+            st.warning(f"No se pudo actualizar ventas_diarias: {str(e)}")
+
+    def reconstruir_ventas_diarias(self):
+        """Recalcula ventas_diarias desde cero (cargas históricas o correcciones)"""
+        self.rollup_ventas.reconstruir(self.client)
+        self._notificar_escritura(RollupVentas.TABLA)
+
+    def reconstruir_rollup_compras(self):
+        """Recalcula compras_rollup desde cero (cargas históricas o correcciones)"""
+        self.rollup_compras.reconstruir(self.client)
+        self._notificar_escritura(RollupCompras.TABLA)
+
+    @instrumentar("db")
+    def unir_productos(self, alias_claves: list[str], producto_clave: str) -> int:
+        """Registra `alias_claves` como alias de `producto_clave` y reasigna el histórico.
+
+        Los alias que apuntaban a alguno de ellos pasan a la clave canónica.
+        Devuelve las filas de compras y gastos reasignadas; el catálogo se
+        actualiza por trigger y el rollup recibe solo los deltas de las
+        claves afectadas.
+        """
+        tablas = ("producto_alias", "compras", "gastos")
+        try:
+            self.client.table("producto_alias").upsert(
+                [{"alias_clave": alias, "producto_clave": producto_clave} for alias in alias_claves],
+                on_conflict="alias_clave"
+            ).execute()
+            self.client.table("producto_alias").update(
+                {"producto_clave": producto_clave}
+            ).in_("producto_clave", alias_claves).execute()
+
+            reasignadas = 0
+            for alias in alias_claves:
+                # Un update por alias: las filas devueltas sabían su clave anterior
+                for tabla in ("compras", "gastos"):
+                    filas = (
+                        self.client.table(tabla).update({"producto_clave": producto_clave})
+                        .eq("producto_clave", alias).execute().data
+                    )
+                    reasignadas += len(filas)
+                    if tabla == RollupCompras.TABLA and filas:
+                        anteriores = [{**fila, "producto_clave": alias} for fila in filas]
+                        self.rollup_compras.aplicar(self.client, anteriores, filas)
+            return reasignadas
+        except Exception as e:
+            ErrorHandler.handle_db_error(e, f"unión de productos en {', '.join(tablas)}")
+            raise
+        finally:
+            for tabla in tablas:
+                self._notificar_escritura(tabla)
+
+    def registrar_observador(self, callback):
+        """Registra una función `callback(tabla)` que se llama tras cada escritura"""
+        if callback not in self._observadores:
+            self._observadores.append(callback)
+
+    def _notificar_escritura(self, tabla: str):
+        for callback in self._observadores:
+            callback(tabla)
 
 
 
@@ -0,0 +1,240 @@
+"""Diario local de escritura diferida (write-behind) para compras y gastos.
+
+Con ESCRITURA_DIFERIDA activa, confirmar registros solo los guarda en un
+SQLite local y la UI responde de inmediato; un hilo en segundo plano los
+envía a la base de datos en lotes. Cada fila lleva un UUID en
+`clave_idempotencia` (migración m009) y se inserta con upsert
+ignore_duplicates: reenviar un lote cuya respuesta se perdió no duplica
+filas.
+
+- Errores de conexión: el lote se reintenta con espera exponencial.
+- Errores de datos: el lote se reenvía fila a fila y las filas rechazadas
+  quedan como 'fallido' hasta que se reintenten a mano.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS diario (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla TEXT NOT NULL,
+        clave_idempotencia TEXT NOT NULL UNIQUE,
+        datos TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'pendiente',
+        intentos INTEGER NOT NULL DEFAULT 0,
+        proximo_intento REAL NOT NULL DEFAULT 0,
+        error TEXT,
+        creado_en TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_diario_estado_proximo ON diario (estado, proximo_intento);
+"""
+
+
+def es_error_transitorio(error: Exception) -> bool:
+    """Cortes de red y tiempos de espera (se reintentan); el resto son errores de datos"""
+    if isinstance(error, (ConnectionError, TimeoutError, OSError)):
+        return True
+    # SQLSTATE de conexión (08), recursos (53) o intervención del operador (57)
+    if str(getattr(error, "code", "") or "")[:2] in ("08", "53", "57"):
+        return True
+    # Errores de transporte de supabase-py sin importar httpx
+    return type(error).__module__.split(".")[0] in ("httpx", "httpcore")
+
+
+class DiarioEscritura:
+    def __init__(self, ruta: str = "diario_escritura.db", tamano_lote: int = 200,
+                 espera_base: float = 2.0, espera_maxima: float = 300.0, intervalo: float = 30.0):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.intervalo = intervalo
+        self.ultimo_error = None
+
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        with self.lock, self.conexion:
+            self.conexion.execute("PRAGMA journal_mode=WAL")
+            self.conexion.executescript(ESQUEMA)
+
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @classmethod
+    def desde_configuracion(cls):
+        """Crea el diario si ESCRITURA_DIFERIDA está activa (variable de entorno o secreto).
+
+        La ruta del archivo se toma de DIARIO_RUTA; devuelve None si el modo
+        está desactivado.
+        """
+        activa = os.environ.get("ESCRITURA_DIFERIDA")
+        ruta = os.environ.get("DIARIO_RUTA")
+        if activa is None:
+            try:
+                activa = st.secrets.get("ESCRITURA_DIFERIDA", "")
+                ruta = ruta or st.secrets.get("DIARIO_RUTA")
+            except FileNotFoundError:
+                activa = ""
+
+        if str(activa).strip().lower() not in ("1", "true", "si", "sí"):
+            return None
+        return cls(ruta or "diario_escritura.db")
+
+    def encolar(self, registros: list[tuple[str, dict]]) -> int:
+        """Guarda (tabla, datos) en el diario con una clave de idempotencia nueva"""
+        filas = [
+            (tabla, str(uuid.uuid4()), json.dumps(datos, default=str))
+            for tabla, datos in registros
+        ]
+        with self.lock, self.conexion:
+            self.conexion.executemany(
+                "INSERT INTO diario (tabla, clave_idempotencia, datos) VALUES (?, ?, ?)", filas
+            )
+        self._despertar.set()
+        return len(filas)
+
+    def conteos(self) -> dict:
+        """Filas por estado: {'pendiente': n, 'fallido': m}"""
+        with self.lock:
+            filas = self.conexion.execute("SELECT estado, COUNT(*) FROM diario GROUP BY estado").fetchall()
+        return {'pendiente': 0, 'fallido': 0, **dict(filas)}
+
+    def fallidos(self) -> list[dict]:
+        """Filas rechazadas por la base de datos, con su error"""
+        with self.lock:
+            filas = self.conexion.execute(
+                "SELECT id, tabla, datos, error FROM diario WHERE estado = 'fallido' ORDER BY id"
+            ).fetchall()
+        return [
+            {'id': fila_id, 'tabla': tabla, **json.loads(datos), 'error': error}
+            for fila_id, tabla, datos, error in filas
+        ]
+
+    def reintentar_fallidos(self) -> int:
+        """Vuelve a poner en cola las filas fallidas (tras corregir el problema)"""
+        with self.lock, self.conexion:
+            cursor = self.conexion.execute(
+                "UPDATE diario SET estado = 'pendiente', intentos = 0, proximo_intento = 0, error = NULL "
+                "WHERE estado = 'fallido'"
+            )
+        self._despertar.set()
+        return cursor.rowcount
+
+    def _espera(self, intentos: int) -> float:
+        """Espera exponencial con jitter antes del siguiente intento"""
+        return min(self.espera_maxima, self.espera_base * 2 ** (intentos - 1)) * random.uniform(0.5, 1.0)
+
+    def _lote_pendiente(self) -> list[tuple]:
+        with self.lock:
+            return self.conexion.execute(
+                "SELECT id, tabla, clave_idempotencia, datos, intentos FROM diario "
+                "WHERE estado = 'pendiente' AND proximo_intento <= ? ORDER BY id LIMIT ?",
+                (time.time(), self.tamano_lote)
+            ).fetchall()
+
+    def _confirmar(self, ids: list[int]):
+        with self.lock, self.conexion:
+            self.conexion.executemany("DELETE FROM diario WHERE id = ?", [(i,) for i in ids])
+
+    def _posponer(self, filas: list[tuple], error: Exception):
+        ahora = time.time()
+        with self.lock, self.conexion:
+            self.conexion.executemany(
+                "UPDATE diario SET intentos = ?, proximo_intento = ?, error = ? WHERE id = ?",
+                [(fila[4] + 1, ahora + self._espera(fila[4] + 1), str(error), fila[0]) for fila in filas]
+            )
+
+    def _marcar_fallido(self, fila_id: int, error: Exception):
+        with self.lock, self.conexion:
+            self.conexion.execute(
+                "UPDATE diario SET estado = 'fallido', error = ? WHERE id = ?", (str(error), fila_id)
+            )
+
+    def enviar_pendientes(self, enviar) -> int:
+        """Envía los lotes vencidos con `enviar(tabla, registros)`; devuelve las filas enviadas.
+
+        Se detiene ante el primer error de conexión: el resto del diario
+        esperaría lo mismo.
+        """
+        enviadas = 0
+        while not self._detener.is_set():
+            lote = self._lote_pendiente()
+            if not lote:
+                return enviadas
+
+            por_tabla = {}
+            for fila in lote:
+                por_tabla.setdefault(fila[1], []).append(fila)
+
+            for tabla, filas in por_tabla.items():
+                try:
+                    enviar(tabla, [{**json.loads(f[3]), 'clave_idempotencia': f[2]} for f in filas])
+                except Exception as e:
+                    self.ultimo_error = str(e)
+                    if es_error_transitorio(e):
+                        self._posponer(filas, e)
+                        return enviadas
+                    enviadas += self._enviar_fila_a_fila(enviar, tabla, filas)
+                    continue
+                self._confirmar([f[0] for f in filas])
+                enviadas += len(filas)
+            self.ultimo_error = None
+        return enviadas
+
+    def _enviar_fila_a_fila(self, enviar, tabla: str, filas: list[tuple]) -> int:
+        """Aísla las filas que la base de datos rechaza dentro de un lote"""
+        enviadas = 0
+        for fila in filas:
+            try:
+                enviar(tabla, [{**json.loads(fila[3]), 'clave_idempotencia': fila[2]}])
+            except Exception as e:
+                if es_error_transitorio(e):
+                    self._posponer([fila], e)
+                else:
+                    self._marcar_fallido(fila[0], e)
+                continue
+            self._confirmar([fila[0]])
+            enviadas += 1
+        return enviadas
+
+    def _segundos_hasta_proximo(self) -> float:
+        with self.lock:
+            proximo = self.conexion.execute(
+                "SELECT MIN(proximo_intento) FROM diario WHERE estado = 'pendiente'"
+            ).fetchone()[0]
+        if proximo is None:
+            return self.intervalo
+        return min(self.intervalo, max(proximo - time.time(), 0.0))
+
+    def iniciar(self, enviar):
+        """Arranca (una vez por proceso) el hilo que vacía el diario con `enviar`"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+
+        def bucle():
+            while not self._detener.is_set():
+                self._despertar.clear()
+                try:
+                    self.enviar_pendientes(enviar)
+                except Exception as e:
+                    # El hilo no debe morir: lo que falle se reintenta en la siguiente vuelta
+                    self.ultimo_error = str(e)
+                self._despertar.wait(self._segundos_hasta_proximo())
+
+        self._hilo = threading.Thread(target=bucle, name="diario-escritura", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera: float = 5.0):
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
@@ -0,0 +1,96 @@
+import pandas as pd
+from utils.instrumentacion import instrumentar
+
+class AnalisisVentasLogic:
+    # Agrupaciones de la serie: etiqueta -> (intervalo del servidor, periodo de pandas equivalente)
+    INTERVALOS = {"Día": ("day", "D"), "Semana": ("week", "W-SUN"), "Mes": ("month", "M")}
+    DIMENSIONES = {"Total": None, "Grupo": "grupo", "Producto": "nombre", "Entidad": "entidad", "Cliente": "cliente"}
+    METRICAS = {"Ingresos": "ingresos", "Unidades": "unidades"}
+    # Series que se dibujan por separado; el resto se agrupa en "Otros"
+    MAX_SERIES = 8
+
+    def __init__(self, data_service):
+        self.data_service = data_service
+
+    def obtener_grupos(self, fecha_inicio, fecha_fin) -> list[str]:
+        """Grupos con ventas en el periodo"""
+        df = self.obtener_serie(fecha_inicio, fecha_fin, None, "Grupo")
+        return sorted(df['dimension'].astype(str).unique())
+
+    @instrumentar("logica")
+    def obtener_serie(self, fecha_inicio, fecha_fin, agrupacion="Día", dimension="Total", grupo=None) -> pd.DataFrame:
+        """Serie en formato largo (periodo, dimension, ingresos, unidades, lineas).
+
+        Sin `agrupacion` se devuelve una fila por valor de la dimensión con el
+        total del periodo.
+        """
+        datos = self.data_service.obtener_ventas_agregadas(
+            fecha_inicio.strftime("%Y-%m-%d"),
+            fecha_fin.strftime("%Y-%m-%d"),
+            intervalo=self.INTERVALOS[agrupacion][0] if agrupacion else None,
+            dimension=self.DIMENSIONES[dimension],
+            grupo=grupo
+        )
+        df = pd.DataFrame(datos, columns=['periodo', 'dimension', 'ingresos', 'unidades', 'lineas'])
+        df['periodo'] = pd.to_datetime(df['periodo'], format="%Y-%m-%d")
+        df['dimension'] = df['dimension'].astype("category")
+        df['ingresos'] = pd.to_numeric(df['ingresos'], errors="coerce").fillna(0.0)
+        for columna in ('unidades', 'lineas'):
+            df[columna] = pd.to_numeric(df[columna], errors="coerce").fillna(0).astype("int64")
+        return df
+
+    @instrumentar("logica")
+    def obtener_tabla_dinamica(self, fecha_inicio, fecha_fin, agrupacion="Día", dimension="Total",
+                               metrica="Ingresos", grupo=None) -> pd.DataFrame:
+        """Periodos en filas y valores de la dimensión en columnas, listo para graficar.
+
+        Conserva las MAX_SERIES categorías con mayor total y suma el resto en
+        "Otros"; los periodos sin ventas aparecen con 0. El resultado se
+        cachea junto a las consultas de ventas y se invalida con ellas.
+        """
+        clave = ("ventas", "analisis_ventas", fecha_inicio, fecha_fin, agrupacion, dimension, metrica, grupo)
+        return self.data_service.cache.obtener_o_calcular(
+            clave, lambda: self._construir_tabla_dinamica(fecha_inicio, fecha_fin, agrupacion, dimension, metrica, grupo)
+        ).copy()
+
+    def _construir_tabla_dinamica(self, fecha_inicio, fecha_fin, agrupacion, dimension, metrica, grupo) -> pd.DataFrame:
+        df = self.obtener_serie(fecha_inicio, fecha_fin, agrupacion, dimension, grupo)
+        columna = self.METRICAS[metrica]
+
+        totales = df.groupby('dimension', observed=True)[columna].sum().sort_values(ascending=False)
+        principales = totales.index[:self.MAX_SERIES]
+        serie = df['dimension'].astype(str).where(df['dimension'].isin(principales), "Otros")
+
+        tabla = (
+            df.assign(serie=serie)
+            .pivot_table(index='periodo', columns='serie', values=columna, aggfunc='sum', fill_value=0)
+        )
+        orden = [str(c) for c in principales] + (["Otros"] if "Otros" in tabla.columns else [])
+        # Inicios de periodo como los de date_trunc ('W-SUN' empieza el lunes)
+        periodos = pd.period_range(fecha_inicio, fecha_fin, freq=self.INTERVALOS[agrupacion][1]).start_time
+        tabla = tabla.reindex(index=periodos, columns=orden, fill_value=0)
+        tabla.index.name, tabla.columns.name = 'periodo', None
+
+        return tabla
+
+    def obtener_resumen(self, fecha_inicio, fecha_fin) -> dict:
+        """Totales del periodo y participación de domicilios en los ingresos"""
+        df = self.obtener_serie(fecha_inicio, fecha_fin, None, "Entidad")
+        ingresos = float(df['ingresos'].sum())
+        domicilio = float(df.loc[df['dimension'].astype(str).eq("domicilio"), 'ingresos'].sum())
+        return {
+            'ingresos': ingresos,
+            'unidades': int(df['unidades'].sum()),
+            'lineas': int(df['lineas'].sum()),
+            'participacion_domicilio': domicilio / ingresos if ingresos else 0.0
+        }
+
+    def obtener_ranking(self, fecha_inicio, fecha_fin, dimension="Producto", metrica="Ingresos",
+                        grupo=None, limite: int = 15) -> pd.DataFrame:
+        """Valores de la dimensión con mayor total en el periodo"""
+        df = self.obtener_serie(fecha_inicio, fecha_fin, None, dimension, grupo)
+        return (
+            df.assign(dimension=df['dimension'].astype(str))
+            .nlargest(limite, self.METRICAS[metrica])[['dimension', 'ingresos', 'unidades']]
+            .reset_index(drop=True)
+        )
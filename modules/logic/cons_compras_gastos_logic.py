@@ -1,12 +1,49 @@
+from utils.exportacion import exportar
+from utils.instrumentacion import instrumentar
+
 
 class ConsultasComprasGastosLogic:
     def __init__(self, data_service):
         self.data_service = data_service
         self.last_query = None
 
+    @instrumentar("logica")
     def consultar_registros(self, filtros: dict) -> list:
+        if filtros["categoria"] == "todas":
+            # compras y gastos en paralelo; cada registro indica su tabla
+            return self.data_service.obtener_registros_todas(filtros)
         return self.data_service.obtener_registros(
             tipo=filtros["categoria"],
             filtros=filtros
         )
-    
+
+    @instrumentar("logica")
+    def contar_registros(self, filtros: dict) -> int:
+        if filtros["categoria"] == "todas":
+            return len(self.data_service.obtener_registros_todas(filtros))
+        return self.data_service.contar_registros(filtros["categoria"], filtros)
+
+    @instrumentar("logica")
+    def obtener_pagina(self, filtros: dict, cursor=None, tamano_pagina: int = 100) -> tuple[list, object]:
+        """Devuelve (registros, siguiente_cursor) de una página de resultados.
+
+        Para una categoría el cursor es el (fecha, id) del último registro
+        (ver DataService.obtener_pagina); la vista "todas" es de solo lectura
+        y se pagina por posición sobre la mezcla de compras y gastos.
+        """
+        if filtros["categoria"] == "todas":
+            registros = self.data_service.obtener_registros_todas(filtros)
+            inicio = cursor or 0
+            fin = inicio + tamano_pagina
+            return registros[inicio:fin], fin if fin < len(registros) else None
+        return self.data_service.obtener_pagina(filtros["categoria"], filtros, cursor, tamano_pagina)
+
+    @instrumentar("logica")
+    def exportar_registros(self, filtros: dict, formato: str, tamano_pagina: int = 1000):
+        """Exporta todos los registros del filtro página a página a CSV o Parquet.
+
+        Devuelve (archivo, filas); ver utils.exportacion.exportar.
+        """
+        tabla = "compras" if filtros["categoria"] == "mercancía" else "gastos"
+        paginas = self.data_service.iterar_dataframes(filtros["categoria"], filtros, tamano_pagina=tamano_pagina)
+        return exportar(paginas, formato, tabla)
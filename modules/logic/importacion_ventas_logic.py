@@ -0,0 +1,119 @@
+import pandas as pd
+from collections import Counter
+from utils.instrumentacion import instrumentar
+from utils.lectura_archivos import leer_por_bloques, normalizar_encabezado, TAMANO_BLOQUE
+from utils.validators import ValidadorRegistros
+
+class ImportacionVentasLogic:
+    COLUMNAS = ['fecha', 'grupo', 'nombre', 'cantidad', 'venta', 'entidad', 'cliente']
+    # Filas con error que se conservan para mostrarlas (el resto solo se cuenta)
+    MAX_ERRORES = 200
+
+    def __init__(self, data_service):
+        self.data_service = data_service
+
+    def preparar_bloque(self, bloque: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza encabezados y valores de un bloque leído del POS"""
+        bloque = bloque.rename(columns=normalizar_encabezado)
+        faltantes = [c for c in self.COLUMNAS if c not in bloque.columns]
+        if faltantes:
+            raise ValueError(f"Columnas faltantes en el archivo: {', '.join(faltantes)}")
+
+        bloque = bloque[self.COLUMNAS].copy()
+        for columna in ('grupo', 'nombre'):
+            bloque[columna] = bloque[columna].astype("string").str.strip()
+        for columna in ('entidad', 'cliente'):
+            bloque[columna] = bloque[columna].astype("string").str.strip().str.lower().str.replace(" ", "_")
+        return bloque
+
+    def _registros_validos(self, bloque: pd.DataFrame) -> pd.DataFrame:
+        fechas = ValidadorRegistros.parsear_fechas(bloque['fecha'])
+        return pd.DataFrame({
+            'fecha': fechas.dt.strftime("%Y-%m-%d"),
+            'grupo': bloque['grupo'].astype(object),
+            'nombre': bloque['nombre'].astype(object),
+            'cantidad': ValidadorRegistros.parsear_numeros(bloque['cantidad']).astype("int64"),
+            'venta': ValidadorRegistros.parsear_numeros(bloque['venta']).round(2),
+            'entidad': bloque['entidad'].astype(object),
+            'cliente': bloque['cliente'].astype(object)
+        })
+
+    @instrumentar("logica")
+    def importar(self, archivo, nombre: str = None, tamano_bloque: int = TAMANO_BLOQUE, al_progresar=None) -> dict:
+        """Importa un export del POS bloque a bloque.
+
+        Cada bloque se valida de forma vectorizada y sus filas válidas se
+        insertan en peticiones multi-fila. Se omiten los días ya importados;
+        los días nuevos se limpian antes de insertar por si quedaron restos
+        de una importación interrumpida. En memoria solo hay un bloque, el
+        conteo de filas por día y una muestra de errores.
+
+        Un día con filas inválidas o rechazadas no se registra como
+        importado: tras corregir el archivo se vuelve a importar entero. Si
+        alguna fila inválida no tiene fecha legible no se registra ningún día.
+
+        `al_progresar(progreso, resumen)` se llama tras cada bloque.
+        """
+        nombre = nombre or getattr(archivo, "name", "archivo")
+        importados = self.data_service.obtener_dias_importados()
+        dias_vistos = set()
+        filas_por_dia = Counter()
+        dias_con_errores = set()
+        errores_sin_fecha = False
+        errores = []
+        resumen = {'leidas': 0, 'insertadas': 0, 'invalidas': 0, 'omitidas': 0, 'dias_omitidos': set()}
+
+        for bloque, progreso in leer_por_bloques(archivo, nombre, tamano_bloque):
+            desplazamiento = resumen['leidas']
+            resumen['leidas'] += len(bloque)
+            bloque = self.preparar_bloque(bloque).reset_index(drop=True)
+
+            invalidas = ValidadorRegistros.validar_ventas(bloque)
+            filas_invalidas = invalidas['fila'].unique()
+            resumen['invalidas'] += len(filas_invalidas)
+            if len(errores) < self.MAX_ERRORES:
+                # Línea del archivo: +2 por el encabezado y la numeración desde 1
+                for fila, mensajes in ValidadorRegistros.agrupar_errores(invalidas).items():
+                    if len(errores) >= self.MAX_ERRORES:
+                        break
+                    errores.append({'linea': desplazamiento + fila + 2, 'errores': " | ".join(mensajes)})
+
+            fechas_invalidas = ValidadorRegistros.parsear_fechas(bloque.loc[filas_invalidas, 'fecha'])
+            errores_sin_fecha |= bool(fechas_invalidas.isna().any())
+            dias_con_errores.update(fechas_invalidas.dropna().dt.strftime("%Y-%m-%d"))
+
+            validas = self._registros_validos(bloque.drop(index=filas_invalidas))
+            ya_importadas = validas['fecha'].isin(importados)
+            resumen['omitidas'] += int(ya_importadas.sum())
+            resumen['dias_omitidos'].update(validas.loc[ya_importadas, 'fecha'].unique())
+            validas = validas[~ya_importadas]
+
+            if not validas.empty:
+                dias_nuevos = sorted(set(validas['fecha'].unique()) - dias_vistos)
+                self.data_service.eliminar_ventas_dias(dias_nuevos)
+                dias_vistos.update(dias_nuevos)
+
+                resultado = self.data_service.guardar_ventas(validas.to_dict('records'))
+                resumen['insertadas'] += len(resultado['insertados'])
+                filas_por_dia.update(fila['fecha'] for fila in resultado['insertados'])
+                for error in resultado['errores']:
+                    resumen['invalidas'] += 1
+                    dias_con_errores.add(str(error['datos']['fecha'])[:10])
+                    if len(errores) < self.MAX_ERRORES:
+                        errores.append({'linea': None, 'errores': error['error']})
+
+            if al_progresar:
+                al_progresar(progreso, resumen)
+
+        completos = {
+            str(fecha)[:10]: filas for fecha, filas in filas_por_dia.items()
+            if not errores_sin_fecha and str(fecha)[:10] not in dias_con_errores
+        }
+        if completos:
+            self.data_service.registrar_importacion(completos, nombre)
+
+        resumen['dias_importados'] = len(completos)
+        resumen['dias_pendientes'] = len(filas_por_dia) - len(completos)
+        resumen['dias_omitidos'] = len(resumen['dias_omitidos'])
+        resumen['errores'] = pd.DataFrame(errores, columns=['linea', 'errores'])
+        return resumen
@@ -1,6 +1,11 @@
 import pandas as pd
+from datetime import timedelta
+from utils.instrumentacion import instrumentar
 
 class PrecioPonderadoLogic:
+    # Agrupaciones disponibles para la serie agregada en servidor
+    INTERVALOS = {"Día": "day", "Semana": "week", "Mes": "month"}
+
     def __init__(self, data_service):
         self.data_service = data_service
     
@@ -8,23 +13,144 @@ class PrecioPonderadoLogic:
         """Usar el método de DataService"""
         return self.data_service.obtener_productos()
 
-    def obtener_precios_historicos(self, producto, fecha_inicio, fecha_fin):
+    def obtener_catalogo(self) -> dict:
+        """Productos del catálogo como {producto_clave: nombre}"""
+        return {
+            item["producto_clave"]: item["producto"]
+            for item in self.data_service.obtener_catalogo_productos()
+        }
+
+    def unir_productos(self, alias_claves, producto_clave):
+        """Registra productos como alias de otro (ver DataService.registrar_alias)"""
+        return self.data_service.registrar_alias(alias_claves, producto_clave)
+
+    @instrumentar("logica")
+    def obtener_precios_historicos(self, producto_clave, fecha_inicio, fecha_fin):
         filtros  = {
             "fecha_inicio": fecha_inicio.strftime("%Y-%m-%d"),  
             "fecha_fin": fecha_fin.strftime("%Y-%m-%d"),        
-            "producto": producto
+            "producto_clave": producto_clave
         }
 
-        data = self.data_service.obtener_registros(tipo="mercancía", filtros=filtros)
-        df = pd.DataFrame(data)
+        # Solo las columnas necesarias; el DataFrame llega ya tipado y ordenado por fecha
+        df = self.data_service.obtener_dataframe(
+            tipo="mercancía",
+            filtros=filtros,
+            columnas=["fecha", "monto", "cantidad"]
+        )
 
         if not df.empty:
             df['precio_unitario'] = df['monto'] / df['cantidad']
-            df['fecha'] = pd.to_datetime(df['fecha'])
-            df = df.sort_values('fecha')
         return df
+
+    @instrumentar("logica")
+    def obtener_serie_agregada(self, producto_clave, fecha_inicio, fecha_fin, agrupacion="Día"):
+        """Serie de precio ponderado por periodo calculada en el servidor"""
+        datos = self.data_service.obtener_agregado_precios(
+            producto_clave,
+            fecha_inicio.strftime("%Y-%m-%d"),
+            fecha_fin.strftime("%Y-%m-%d"),
+            intervalo=self.INTERVALOS[agrupacion]
+        )
+        df = pd.DataFrame(datos)
+
+        if not df.empty:
+            df['periodo'] = pd.to_datetime(df['periodo'])
+            for columna in ['sum_monto', 'sum_cantidad', 'precio_min', 'precio_max']:
+                df[columna] = pd.to_numeric(df[columna], errors="coerce")
+            df['precio_ponderado'] = df['sum_monto'] / df['sum_cantidad']
+        return df
+
+    @staticmethod
+    def _dividir_periodo(fecha_inicio, fecha_fin):
+        """Separa el periodo en meses completos y tramos parciales en los bordes.
+
+        Devuelve (primer_mes, ultimo_mes, tramos) donde los meses completos
+        pueden ser None si el periodo no contiene ninguno.
+        """
+        primer_mes = fecha_inicio if fecha_inicio.day == 1 else (
+            fecha_inicio.replace(day=28) + timedelta(days=4)
+        ).replace(day=1)
+        fin_siguiente = fecha_fin + timedelta(days=1)
+        ultimo_mes = (fin_siguiente.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        if primer_mes > ultimo_mes:
+            return None, None, [(fecha_inicio, fecha_fin)]
+
+        tramos = []
+        if fecha_inicio < primer_mes:
+            tramos.append((fecha_inicio, primer_mes - timedelta(days=1)))
+        fin_meses = (ultimo_mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if fin_meses <= fecha_fin:
+            tramos.append((fin_meses, fecha_fin))
+        return primer_mes, ultimo_mes, tramos
+
+    @instrumentar("logica")
+    def obtener_resumen_periodo(self, producto_clave, fecha_inicio, fecha_fin):
+        """Precio ponderado y número de compras del periodo.
+
+        Los meses completos se leen de `compras_rollup` y solo los tramos
+        parciales de los bordes usan filas de compras, así que el coste crece
+        con el número de meses y no con el de compras.
+        """
+        primer_mes, ultimo_mes, tramos = self._dividir_periodo(fecha_inicio, fecha_fin)
+        sum_monto = sum_cantidad = 0.0
+        n = 0
+
+        # Rollup y tramos parciales son independientes: se piden a la vez
+        tareas = [
+            lambda inicio=inicio, fin=fin: self.obtener_precios_historicos(producto_clave, inicio, fin)
+            for inicio, fin in tramos
+        ]
+        if primer_mes:
+            tareas.append(lambda: self.data_service.obtener_rollup_compras(
+                producto_clave,
+                primer_mes.strftime("%Y-%m-%d"),
+                ultimo_mes.strftime("%Y-%m-%d")
+            ))
+        resultados = self.data_service.ejecutar_concurrente(tareas)
+
+        if primer_mes:
+            for fila in resultados.pop():
+                sum_monto += float(fila['sum_monto'])
+                sum_cantidad += float(fila['sum_cantidad'])
+                n += int(fila['n'])
+
+        for df in resultados:
+            if not df.empty:
+                sum_monto += df['monto'].sum()
+                sum_cantidad += df['cantidad'].sum()
+                n += len(df)
+
+        return {
+            'precio_ponderado': sum_monto / sum_cantidad if sum_cantidad else 0,
+            'n': n
+        }
     
+    @instrumentar("logica")
+    def obtener_series_varias(self, productos_clave, fecha_inicio, fecha_fin, agrupacion="Día") -> dict:
+        """`obtener_serie_agregada` de varios productos en paralelo, en el orden recibido"""
+        series = self.data_service.ejecutar_concurrente([
+            lambda clave=clave: self.obtener_serie_agregada(clave, fecha_inicio, fecha_fin, agrupacion)
+            for clave in productos_clave
+        ])
+        return dict(zip(productos_clave, series))
+
+    @instrumentar("logica")
+    def precargar(self, productos_clave, fecha_inicio, fecha_fin, agrupacion="Día"):
+        """Calienta la caché con el catálogo y los datos de la vista en paralelo.
+
+        La vista pide después lo mismo en serie y lo encuentra en caché, así
+        que la espera es la de la consulta más lenta y no la suma de todas.
+        """
+        tareas = [self.data_service.obtener_catalogo_productos]
+        for clave in productos_clave:
+            tareas.append(lambda clave=clave: self.obtener_resumen_periodo(clave, fecha_inicio, fecha_fin))
+            tareas.append(lambda clave=clave: self.obtener_serie_agregada(clave, fecha_inicio, fecha_fin, agrupacion))
+        self.data_service.ejecutar_concurrente(tareas)
+
+    @instrumentar("logica")
     def calcular_precio_ponderado(self, df):
         if df.empty:
             return 0
-        return df['monto'].sum() / df['cantidad'].sum()
\ No newline at end of file
+        return df['monto'].sum() / df['cantidad'].sum()
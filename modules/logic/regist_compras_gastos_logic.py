@@ -1,9 +1,28 @@
 import streamlit as st
+import pandas as pd
+import time
+import uuid
 from datetime import datetime, date
+from utils.lectura_archivos import huella_archivo, leer_por_bloques, leer_encabezados, normalizar_encabezado, TAMANO_BLOQUE
 from utils.validators import ValidadorRegistros
 from utils.error_handler import ErrorHandler
+from utils.instrumentacion import instrumentar
 
 class RegistroManager:
+    # Campos que se pueden asignar desde las columnas de un archivo
+    CAMPOS_ARCHIVO = ['fecha', 'categoria', 'producto', 'monto', 'cantidad', 'unidad_medida', 'proveedor', 'descripcion']
+    CAMPOS_ARCHIVO_OBLIGATORIOS = ['fecha', 'producto', 'monto']
+    # Encabezados alternativos que se reconocen al sugerir el mapeo
+    SINONIMOS = {
+        'producto': ('producto/servicio', 'producto_servicio', 'item', 'articulo'),
+        'monto': ('valor', 'total', 'importe', 'monto_($)'),
+        'unidad_medida': ('unidad', 'um'),
+        'categoria': ('tipo',)
+    }
+    CATEGORIAS = {"mercancia": "mercancía", "equipos": "equipos", "nomina": "nomina", "servicios": "servicios", "otros": "otros"}
+    # Filas con error que se pasan a la lista temporal; el resto solo se cuenta
+    MAX_PENDIENTES = 500
+
     def __init__(self, data_service):
         self.data_service = data_service
         self._inicializar_registros_temporales()
@@ -54,6 +73,7 @@ class RegistroManager:
             'fecha': self._normalizar_fecha(datos_raw['fecha']),
             'categoria': datos_raw['categoria'].lower().strip(),
             'producto': datos_raw['producto'].strip(),
+            'producto_clave': ValidadorRegistros.normalizar_producto(datos_raw['producto']),
             'monto': float(datos_raw['monto']),
             'cantidad': float(datos_raw['cantidad']),
             'unidad_medida': datos_raw.get('unidad_medida'),
@@ -84,18 +104,28 @@ class RegistroManager:
         ]
         st.session_state.registros_temporales = nuevos_registros
 
+    @instrumentar("logica")
     def confirmar_registros(self):
+        """Valida los registros temporales y los inserta en bloques por tabla.
+
+        Las filas que fallan en la base de datos permanecen en la lista
+        temporal para poder corregirlas. Devuelve un resumen con el número de
+        filas insertadas, los errores por fila y la duración de la operación.
+        """
         registros_invalidos = []
         registros_procesados = []
+        posiciones = []
+        registros = st.session_state.registros_temporales
 
-        for idx, reg in enumerate(st.session_state.registros_temporales, start=1):
-            try:
-                reg = reg.copy()  # Evitar modificar el original
+        # Validación común de todas las filas en una sola pasada
+        errores_por_fila = ValidadorRegistros.agrupar_errores(
+            ValidadorRegistros.validar_dataframe(pd.DataFrame(registros))
+        )
 
-                # Validación común
-                errores = ValidadorRegistros.validar_campos_comunes(reg)
-                if errores:
-                    raise ValueError("\n".join(errores))
+        for idx, reg in enumerate(registros, start=1):
+            try:
+                if idx - 1 in errores_por_fila:
+                    raise ValueError("\n".join(errores_por_fila[idx - 1]))
 
                 # Filtrar campos no permitidos
                 reg_limpio = ValidadorRegistros.filtrar_campos(reg.copy())
@@ -106,6 +136,7 @@ class RegistroManager:
                 # Determinar tabla
                 tabla = ValidadorRegistros.obtener_tabla(reg_limpio)
                 registros_procesados.append((tabla, reg_limpio))
+                posiciones.append(idx - 1)
                 
             except Exception as e:
                 registros_invalidos.append(f"Fila {idx}: {str(e)}")
@@ -115,9 +146,163 @@ class RegistroManager:
             ErrorHandler.display_validation_errors(registros_invalidos, "registro")
             st.stop()
         
-        # Insertar en DB
-        for tabla, datos in registros_procesados:
-            tipo = "mercancía" if tabla == "compras" else "gastos"
-            self.data_service.guardar_registro(tipo, datos)
-        
-        st.session_state.registros_temporales = []
\ No newline at end of file
+        inicio = time.perf_counter()
+        if self.data_service.diario is not None:
+            # Escritura diferida: el diario local responde al instante y su hilo envía
+            encolados = self.data_service.encolar_registros(registros_procesados)
+            st.session_state.registros_temporales = []
+            return {
+                'insertados': 0,
+                'encolados': encolados,
+                'errores': [],
+                'duracion': time.perf_counter() - inicio
+            }
+
+        # Insertar en DB agrupando por tabla
+        resultado = self.data_service.guardar_registros(registros_procesados)
+        duracion = time.perf_counter() - inicio
+
+        fallidos = [posiciones[error['indice']] for error in resultado['errores']]
+        st.session_state.registros_temporales = [
+            st.session_state.registros_temporales[pos] for pos in fallidos
+        ]
+
+        return {
+            'insertados': resultado['insertados'],
+            'encolados': 0,
+            'errores': [
+                f"Fila {pos + 1} ({error['tabla']}): {error['error']}"
+                for pos, error in zip(fallidos, resultado['errores'])
+            ],
+            'duracion': duracion
+        }
+
+    def leer_encabezados(self, archivo, nombre=None) -> list[str]:
+        return leer_encabezados(archivo, nombre)
+
+    def sugerir_mapeo(self, encabezados: list[str]) -> dict:
+        """Campo -> columna del archivo emparejando encabezados normalizados"""
+        normalizados = {normalizar_encabezado(c): c for c in encabezados}
+        mapeo = {}
+        for campo in self.CAMPOS_ARCHIVO:
+            candidatos = (campo,) + self.SINONIMOS.get(campo, ())
+            mapeo[campo] = next((normalizados[c] for c in candidatos if c in normalizados), None)
+        return mapeo
+
+    def preparar_bloque_archivo(self, bloque: pd.DataFrame, mapeo: dict, categoria: str = None) -> pd.DataFrame:
+        """Lleva un bloque leído del archivo a las columnas y tipos de los registros.
+
+        Los números que no se pueden interpretar se dejan como texto para que
+        `validar_dataframe` los marque con formato inválido.
+        """
+        df = pd.DataFrame(index=bloque.index)
+        for campo in self.CAMPOS_ARCHIVO:
+            columna = mapeo.get(campo)
+            df[campo] = bloque[columna].astype("string").str.strip() if columna else pd.NA
+        if categoria and not mapeo.get('categoria'):
+            df['categoria'] = categoria
+
+        claves = ValidadorRegistros.normalizar_productos(df['categoria'])
+        df['categoria'] = claves.map(self.CATEGORIAS).fillna(claves)
+        for campo in ('monto', 'cantidad'):
+            numeros = ValidadorRegistros.parsear_numeros(df[campo])
+            df[campo] = numeros.astype(object).where(numeros.notna(), df[campo].astype(object))
+        df['unidad_medida'] = df['unidad_medida'].str.lower()
+        return df.astype(object).where(df.notna(), None).reset_index(drop=True)
+
+    @staticmethod
+    def _registros_archivo(df: pd.DataFrame) -> list[tuple[str, dict]]:
+        """(tabla, datos) para las filas ya validadas, como los de `confirmar_registros`"""
+        df = df.assign(
+            fecha=ValidadorRegistros.parsear_fechas(df['fecha']).dt.strftime("%Y-%m-%d"),
+            monto=pd.to_numeric(df['monto']),
+            cantidad=pd.to_numeric(df['cantidad'], errors="coerce"),
+            producto_clave=ValidadorRegistros.normalizar_productos(df['producto'])
+        )
+        es_mercancia = df['categoria'].eq("mercancía")
+        df = df.astype(object).where(df.notna(), None)
+        df.loc[~es_mercancia, ['cantidad', 'unidad_medida']] = None
+
+        return [
+            ("compras" if mercancia else "gastos", {campo: valor for campo, valor in reg.items() if valor is not None})
+            for mercancia, reg in zip(es_mercancia, df.to_dict('records'))
+        ]
+
+    @staticmethod
+    def _clave_fila(huella: str, fila: int) -> str:
+        """UUID estable para la fila `fila` (desde 0) del archivo con esa huella"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{huella}:{fila}"))
+
+    def _agregar_pendientes(self, df: pd.DataFrame) -> int:
+        """Pasa filas con error a la lista temporal hasta MAX_PENDIENTES; devuelve cuántas entraron"""
+        disponibles = max(self.MAX_PENDIENTES - len(st.session_state.registros_temporales), 0)
+        df = df.head(disponibles)
+        # Lo que no se puede interpretar queda vacío para completarlo en la tabla
+        df = df.assign(
+            fecha=ValidadorRegistros.parsear_fechas(df['fecha']).dt.strftime("%Y-%m-%d"),
+            monto=pd.to_numeric(df['monto'], errors="coerce"),
+            cantidad=pd.to_numeric(df['cantidad'], errors="coerce")
+        )
+        pendientes = df.astype(object).where(df.notna(), None).to_dict('records')
+        st.session_state.registros_temporales.extend(pendientes)
+        return len(pendientes)
+
+    @instrumentar("logica")
+    def importar_archivo(self, archivo, mapeo: dict, nombre: str = None, categoria: str = None,
+                         tamano_bloque: int = TAMANO_BLOQUE, al_progresar=None) -> dict:
+        """Importa compras y gastos de un CSV o Excel bloque a bloque.
+
+        Cada bloque se valida con `validar_dataframe` y sus filas válidas se
+        insertan con `guardar_registros_idempotentes`. Cada fila lleva como
+        `clave_idempotencia` un UUID derivado del contenido del archivo y de
+        su posición: volver a importar el mismo archivo (doble clic, rerun o
+        una nueva subida) no duplica compras ni gastos. Solo las filas con
+        error (de validación o de la base de datos) pasan a
+        `registros_temporales` para corregirlas en la tabla; el resto del
+        archivo no se guarda en sesión.
+
+        `mapeo` asigna cada campo a una columna del archivo; `categoria` se
+        usa cuando el archivo no trae columna de categoría.
+        """
+        faltantes = [c for c in self.CAMPOS_ARCHIVO_OBLIGATORIOS if not mapeo.get(c)]
+        if faltantes:
+            raise ValueError(f"Asigna una columna a: {', '.join(faltantes)}")
+        if not mapeo.get('categoria') and not categoria:
+            raise ValueError("Asigna la columna de categoría o una categoría para todo el archivo")
+
+        huella = huella_archivo(archivo)
+        errores = []
+        resumen = {'leidas': 0, 'insertadas': 0, 'omitidas': 0, 'invalidas': 0, 'pendientes': 0}
+
+        for bloque, progreso in leer_por_bloques(archivo, nombre, tamano_bloque):
+            desplazamiento = resumen['leidas']
+            resumen['leidas'] += len(bloque)
+            df = self.preparar_bloque_archivo(bloque, mapeo, categoria)
+
+            errores_por_fila = ValidadorRegistros.agrupar_errores(ValidadorRegistros.validar_dataframe(df))
+            invalidas = list(errores_por_fila)
+            validas = df.drop(index=invalidas)
+
+            registros = [
+                (tabla, {**datos, 'clave_idempotencia': self._clave_fila(huella, desplazamiento + fila)})
+                for fila, (tabla, datos) in zip(validas.index, self._registros_archivo(validas))
+            ]
+            resultado = self.data_service.guardar_registros_idempotentes(registros)
+            resumen['insertadas'] += resultado['insertados']
+            resumen['omitidas'] += resultado['omitidos']
+            fallidas = validas.index[[error['indice'] for error in resultado['errores']]]
+            for fila, error in zip(fallidas, resultado['errores']):
+                errores_por_fila[fila] = [f"({error['tabla']}) {error['error']}"]
+
+            # Línea del archivo: +2 por el encabezado y la numeración desde 1
+            for fila in sorted(errores_por_fila):
+                if len(errores) < self.MAX_PENDIENTES:
+                    errores.append({'linea': desplazamiento + fila + 2, 'errores': " | ".join(errores_por_fila[fila])})
+            resumen['invalidas'] += len(errores_por_fila)
+            resumen['pendientes'] += self._agregar_pendientes(df.loc[sorted(errores_por_fila)])
+
+            if al_progresar:
+                al_progresar(progreso, resumen)
+
+        resumen['errores'] = pd.DataFrame(errores, columns=['linea', 'errores'])
+        return resumen
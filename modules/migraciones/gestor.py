@@ -0,0 +1,125 @@
+from modules.migraciones import (
+    m001_tablas_base,
+    m002_catalogo_productos,
+    m003_precio_ponderado_agregado,
+    m004_compras_rollup,
+    m005_indices_consultas,
+    m006_producto_clave,
+    m007_ventas_importaciones,
+    m008_ventas_diarias,
+    m009_clave_idempotencia,
+    m010_reconstruir_compras_rollup,
+    m011_reconstruir_ventas_diarias,
+    m012_recalcular_compras_rollup,
+    m013_normalizar_producto_nfkd
+)
+
+# Orden de aplicación; las versiones deben ser consecutivas
+MIGRACIONES = [
+    m001_tablas_base,
+    m002_catalogo_productos,
+    m003_precio_ponderado_agregado,
+    m004_compras_rollup,
+    m005_indices_consultas,
+    m006_producto_clave,
+    m007_ventas_importaciones,
+    m008_ventas_diarias,
+    m009_clave_idempotencia,
+    m010_reconstruir_compras_rollup,
+    m011_reconstruir_ventas_diarias,
+    m012_recalcular_compras_rollup,
+    m013_normalizar_producto_nfkd
+]
+
+ESQUEMA_VERSION = {
+    "postgres": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT NOW()
+        )
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            aplicada_en TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """
+}
+
+
+class GestorMigraciones:
+    """Aplica las migraciones de esquema pendientes sobre un backend.
+
+    Cada migración es un módulo con VERSION, NOMBRE y una lista de scripts
+    por dialecto (POSTGRES, SQLITE); opcionalmente `aplicar(backend)` para
+    cambios de datos que no se expresan en SQL. Los scripts se ejecutan con
+    la RPC `execute_sql` y deben ser idempotentes (IF NOT EXISTS, OR
+    REPLACE): si una migración falla a medias se puede repetir.
+
+    En el arranque solo se hace una lectura de `schema_version`.
+    """
+
+    def __init__(self, backend, migraciones: list = None):
+        self.backend = backend
+        self.dialecto = backend.dialecto
+        self.migraciones = sorted(migraciones or MIGRACIONES, key=lambda m: m.VERSION)
+
+    def _ejecutar_sql(self, script: str):
+        self.backend.rpc('execute_sql', params={'query': script}).execute()
+
+    def version_actual(self) -> int:
+        """Última versión aplicada (0 si la tabla schema_version no existe)"""
+        try:
+            datos = (
+                self.backend.table("schema_version")
+                .select("version")
+                .order("version", desc=True)
+                .limit(1)
+                .execute().data
+            )
+        except Exception:
+            return 0
+        return datos[0]["version"] if datos else 0
+
+    def pendientes(self) -> list:
+        version = self.version_actual()
+        return [m for m in self.migraciones if m.VERSION > version]
+
+    def aplicar_pendientes(self) -> list[int]:
+        """Aplica en orden las migraciones pendientes y devuelve sus versiones"""
+        pendientes = self.pendientes()
+        if not pendientes:
+            return []
+
+        self._ejecutar_sql(ESQUEMA_VERSION[self.dialecto])
+        for migracion in pendientes:
+            self._aplicar(migracion)
+
+        if self.dialecto == "postgres":
+            # PostgREST debe ver las tablas nuevas sin esperar a su recarga periódica
+            self._ejecutar_sql("NOTIFY pgrst, 'reload schema'")
+        return [m.VERSION for m in pendientes]
+
+    def _aplicar(self, migracion):
+        scripts = {"postgres": migracion.POSTGRES, "sqlite": migracion.SQLITE}[self.dialecto]
+        for script in scripts:
+            self._ejecutar_sql(script)
+
+        if hasattr(migracion, "aplicar"):
+            migracion.aplicar(self.backend)
+
+        # El registro se hace por SQL: la tabla puede no estar aún en la caché de PostgREST
+        nombre = migracion.NOMBRE.replace("'", "''")
+        self._ejecutar_sql(
+            f"INSERT INTO schema_version (version, nombre) VALUES ({int(migracion.VERSION)}, '{nombre}') "
+            f"ON CONFLICT (version) DO NOTHING"
+        )
+
+
+if __name__ == "__main__":
+    from modules.database import DatabaseManager
+
+    gestor = GestorMigraciones(DatabaseManager().client)
+    print(f"Versión del esquema: {gestor.version_actual()}")
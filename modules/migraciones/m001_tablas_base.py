@@ -0,0 +1,87 @@
+"""Tablas base de compras, gastos y ventas."""
+VERSION = 1
+NOMBRE = "tablas_base"
+
+POSTGRES = [
+    """
+        CREATE TABLE IF NOT EXISTS compras (
+            id SERIAL PRIMARY KEY,
+            fecha DATE NOT NULL,
+            categoria VARCHAR(50) NOT NULL DEFAULT 'Mercancía',
+            producto VARCHAR(100),
+            cantidad NUMERIC(10,3) NOT NULL DEFAULT 1,
+            unidad_medida VARCHAR(20) NOT NULL DEFAULT 'unidad',
+            monto NUMERIC(10,2) NOT NULL,
+            proveedor VARCHAR(100),
+            descripcion TEXT,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS gastos (
+            id SERIAL PRIMARY KEY,
+            fecha DATE NOT NULL,
+            producto VARCHAR(100),
+            categoria VARCHAR(50) NOT NULL,
+            monto NUMERIC(10,2) NOT NULL,
+            descripcion TEXT,
+            proveedor VARCHAR(100),
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS ventas (
+            id SERIAL PRIMARY KEY,
+            fecha DATE NOT NULL,
+            grupo VARCHAR(50) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            cantidad INTEGER NOT NULL,
+            venta NUMERIC(10,2) NOT NULL,
+            entidad VARCHAR(20) NOT NULL CHECK (entidad IN ('restaurante', 'domicilio')),
+            cliente VARCHAR(20) NOT NULL CHECK (cliente IN ('clientes', 'cuenta_casa')),
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """
+]
+
+SQLITE = [
+    """
+        CREATE TABLE IF NOT EXISTS compras (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,
+            categoria VARCHAR(50) NOT NULL DEFAULT 'Mercancía',
+            producto VARCHAR(100),
+            cantidad REAL NOT NULL DEFAULT 1,
+            unidad_medida VARCHAR(20) NOT NULL DEFAULT 'unidad',
+            monto REAL NOT NULL,
+            proveedor VARCHAR(100),
+            descripcion TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS gastos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,
+            producto VARCHAR(100),
+            categoria VARCHAR(50) NOT NULL,
+            monto REAL NOT NULL,
+            descripcion TEXT,
+            proveedor VARCHAR(100),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,
+            grupo VARCHAR(50) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            cantidad INTEGER NOT NULL,
+            venta REAL NOT NULL,
+            entidad VARCHAR(20) NOT NULL CHECK (entidad IN ('restaurante', 'domicilio')),
+            cliente VARCHAR(20) NOT NULL CHECK (cliente IN ('clientes', 'cuenta_casa')),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """
+]
@@ -0,0 +1,119 @@
+"""Catálogo de productos mantenido por trigger sobre compras.
+
+La carga inicial solo se hace si el catálogo está vacío.
+"""
+VERSION = 2
+NOMBRE = "catalogo_productos"
+
+POSTGRES = [
+    """
+        CREATE TABLE IF NOT EXISTS catalogo_productos (
+            producto VARCHAR(100) PRIMARY KEY,
+            ultima_compra DATE NOT NULL,
+            num_compras INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    """
+        CREATE OR REPLACE FUNCTION actualizar_catalogo_productos() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.producto IS NOT NULL THEN
+                UPDATE catalogo_productos
+                   SET num_compras = num_compras - 1,
+                       ultima_compra = COALESCE(
+                           (SELECT MAX(fecha) FROM compras WHERE producto = OLD.producto),
+                           ultima_compra
+                       )
+                 WHERE producto = OLD.producto;
+                DELETE FROM catalogo_productos
+                 WHERE producto = OLD.producto AND num_compras <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.producto IS NOT NULL THEN
+                INSERT INTO catalogo_productos (producto, ultima_compra, num_compras)
+                VALUES (NEW.producto, NEW.fecha, 1)
+                ON CONFLICT (producto) DO UPDATE
+                   SET num_compras = catalogo_productos.num_compras + 1,
+                       ultima_compra = GREATEST(catalogo_productos.ultima_compra, EXCLUDED.ultima_compra);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    """
+        CREATE OR REPLACE TRIGGER trg_catalogo_productos
+        AFTER INSERT OR DELETE OR UPDATE OF producto, fecha ON compras
+        FOR EACH ROW EXECUTE FUNCTION actualizar_catalogo_productos()
+    """,
+    """
+        INSERT INTO catalogo_productos (producto, ultima_compra, num_compras)
+        SELECT producto, MAX(fecha), COUNT(*)
+          FROM compras
+         WHERE producto IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM catalogo_productos)
+         GROUP BY producto
+    """
+]
+
+SQLITE = [
+    """
+        CREATE TABLE IF NOT EXISTS catalogo_productos (
+            producto VARCHAR(100) PRIMARY KEY,
+            ultima_compra TEXT NOT NULL,
+            num_compras INTEGER NOT NULL DEFAULT 0
+        );
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_catalogo_productos_insert
+        AFTER INSERT ON compras
+        BEGIN
+            INSERT INTO catalogo_productos (producto, ultima_compra, num_compras)
+            SELECT NEW.producto, NEW.fecha, 1 WHERE NEW.producto IS NOT NULL
+            ON CONFLICT (producto) DO UPDATE
+               SET num_compras = num_compras + 1,
+                   ultima_compra = MAX(ultima_compra, excluded.ultima_compra);
+        END;
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_catalogo_productos_delete
+        AFTER DELETE ON compras
+        BEGIN
+            UPDATE catalogo_productos
+               SET num_compras = num_compras - 1,
+                   ultima_compra = COALESCE(
+                       (SELECT MAX(fecha) FROM compras WHERE producto = OLD.producto),
+                       ultima_compra
+                   )
+             WHERE producto = OLD.producto;
+            DELETE FROM catalogo_productos WHERE producto = OLD.producto AND num_compras <= 0;
+        END;
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_catalogo_productos_update
+        AFTER UPDATE OF producto, fecha ON compras
+        BEGIN
+            UPDATE catalogo_productos
+               SET num_compras = num_compras - 1,
+                   ultima_compra = COALESCE(
+                       (SELECT MAX(fecha) FROM compras WHERE producto = OLD.producto),
+                       ultima_compra
+                   )
+             WHERE producto = OLD.producto;
+            DELETE FROM catalogo_productos WHERE producto = OLD.producto AND num_compras <= 0;
+
+            INSERT INTO catalogo_productos (producto, ultima_compra, num_compras)
+            SELECT NEW.producto, NEW.fecha, 1 WHERE NEW.producto IS NOT NULL
+            ON CONFLICT (producto) DO UPDATE
+               SET num_compras = num_compras + 1,
+                   ultima_compra = MAX(ultima_compra, excluded.ultima_compra);
+        END;
+    """,
+    """
+        INSERT INTO catalogo_productos (producto, ultima_compra, num_compras)
+        SELECT producto, MAX(fecha), COUNT(*)
+          FROM compras
+         WHERE producto IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM catalogo_productos)
+         GROUP BY producto
+    """
+]
@@ -0,0 +1,40 @@
+"""Agregación de precios en servidor: solo la serie agregada cruza la red.
+
+En SQLite la función se implementa en Python (SQLiteBackend._rpc_precio_ponderado_agregado).
+"""
+VERSION = 3
+NOMBRE = "precio_ponderado_agregado"
+
+POSTGRES = [
+    """
+        CREATE OR REPLACE FUNCTION precio_ponderado_agregado(
+            p_producto TEXT,
+            p_fecha_inicio DATE,
+            p_fecha_fin DATE,
+            p_intervalo TEXT DEFAULT NULL
+        )
+        RETURNS TABLE (
+            periodo DATE,
+            sum_monto NUMERIC,
+            sum_cantidad NUMERIC,
+            n BIGINT,
+            precio_min NUMERIC,
+            precio_max NUMERIC
+        ) AS $$
+            SELECT CASE WHEN p_intervalo IS NULL THEN p_fecha_inicio
+                        ELSE date_trunc(p_intervalo, fecha)::DATE END,
+                   SUM(monto),
+                   SUM(cantidad),
+                   COUNT(*),
+                   MIN(monto / NULLIF(cantidad, 0)),
+                   MAX(monto / NULLIF(cantidad, 0))
+              FROM compras
+             WHERE fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+               AND producto ILIKE '%' || p_producto || '%'
+             GROUP BY 1
+             ORDER BY 1
+        $$ LANGUAGE sql STABLE
+    """
+]
+
+SQLITE = []
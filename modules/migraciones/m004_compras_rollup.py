@@ -0,0 +1,78 @@
+"""Sumas mensuales por producto para el precio ponderado.
+
+Incluye las funciones de mantenimiento incremental y la carga inicial
+desde el histórico si la tabla está vacía.
+"""
+VERSION = 4
+NOMBRE = "compras_rollup"
+
+POSTGRES = [
+    """
+        CREATE TABLE IF NOT EXISTS compras_rollup (
+            producto VARCHAR(100) NOT NULL,
+            unidad_medida VARCHAR(20) NOT NULL,
+            mes DATE NOT NULL,
+            sum_monto NUMERIC(14,2) NOT NULL DEFAULT 0,
+            sum_cantidad NUMERIC(14,3) NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (producto, unidad_medida, mes)
+        )
+    """,
+    """
+        CREATE OR REPLACE FUNCTION aplicar_deltas_compras_rollup(p_deltas JSONB) RETURNS VOID AS $$
+            INSERT INTO compras_rollup AS r (producto, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT d.producto, d.unidad_medida, d.mes, d.sum_monto, d.sum_cantidad, d.n
+              FROM jsonb_to_recordset(p_deltas) AS d(
+                       producto TEXT, unidad_medida TEXT, mes DATE,
+                       sum_monto NUMERIC, sum_cantidad NUMERIC, n INTEGER
+                   )
+            ON CONFLICT (producto, unidad_medida, mes) DO UPDATE
+               SET sum_monto = r.sum_monto + EXCLUDED.sum_monto,
+                   sum_cantidad = r.sum_cantidad + EXCLUDED.sum_cantidad,
+                   n = r.n + EXCLUDED.n;
+
+            DELETE FROM compras_rollup WHERE n <= 0;
+        $$ LANGUAGE sql
+    """,
+    """
+        CREATE OR REPLACE FUNCTION reconstruir_compras_rollup() RETURNS VOID AS $$
+            DELETE FROM compras_rollup;
+
+            INSERT INTO compras_rollup (producto, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(producto, ''), unidad_medida, date_trunc('month', fecha)::DATE,
+                   SUM(monto), SUM(cantidad), COUNT(*)
+              FROM compras
+             GROUP BY 1, 2, 3;
+        $$ LANGUAGE sql
+    """,
+    """
+        INSERT INTO compras_rollup (producto, unidad_medida, mes, sum_monto, sum_cantidad, n)
+        SELECT COALESCE(producto, ''), unidad_medida, date_trunc('month', fecha)::DATE,
+               SUM(monto), SUM(cantidad), COUNT(*)
+          FROM compras
+         WHERE NOT EXISTS (SELECT 1 FROM compras_rollup)
+         GROUP BY 1, 2, 3
+    """
+]
+
+SQLITE = [
+    """
+        CREATE TABLE IF NOT EXISTS compras_rollup (
+            producto VARCHAR(100) NOT NULL,
+            unidad_medida VARCHAR(20) NOT NULL,
+            mes TEXT NOT NULL,
+            sum_monto REAL NOT NULL DEFAULT 0,
+            sum_cantidad REAL NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (producto, unidad_medida, mes)
+        );
+    """,
+    """
+        INSERT INTO compras_rollup (producto, unidad_medida, mes, sum_monto, sum_cantidad, n)
+        SELECT COALESCE(producto, ''), unidad_medida, strftime('%Y-%m-01', fecha),
+               SUM(monto), SUM(cantidad), COUNT(*)
+          FROM compras
+         WHERE NOT EXISTS (SELECT 1 FROM compras_rollup)
+         GROUP BY 1, 2, 3
+    """
+]
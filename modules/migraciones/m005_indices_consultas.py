@@ -0,0 +1,53 @@
+"""Índices para los filtros que emite DataService.
+
+- (fecha, id): rango de fechas y paginación por cursor ordenada por (fecha, id).
+- (producto, fecha): producto concreto dentro de un rango.
+- GIN con pg_trgm sobre producto: búsqueda por subcadena (ILIKE '%x%').
+- ventas (fecha, grupo): análisis de ventas por periodo y grupo.
+
+SQLite no tiene índices trigram; ahí la búsqueda por subcadena sigue
+recorriendo la tabla y solo se crean los índices B-tree.
+"""
+VERSION = 5
+NOMBRE = "indices_consultas"
+
+POSTGRES = [
+    """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_compras_fecha_id ON compras (fecha, id)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_compras_producto_fecha ON compras (producto, fecha)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_compras_producto_trgm ON compras USING gin (producto gin_trgm_ops)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_gastos_fecha_id ON gastos (fecha, id)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_gastos_producto_fecha ON gastos (producto, fecha)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_gastos_producto_trgm ON gastos USING gin (producto gin_trgm_ops)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_ventas_fecha_grupo ON ventas (fecha, grupo)
+    """,
+    """
+        ANALYZE compras, gastos, ventas
+    """
+]
+
+SQLITE = [
+    """
+        CREATE INDEX IF NOT EXISTS idx_compras_fecha_id ON compras (fecha, id);
+        CREATE INDEX IF NOT EXISTS idx_compras_producto_fecha ON compras (producto, fecha);
+        CREATE INDEX IF NOT EXISTS idx_gastos_fecha_id ON gastos (fecha, id);
+        CREATE INDEX IF NOT EXISTS idx_gastos_producto_fecha ON gastos (producto, fecha);
+        CREATE INDEX IF NOT EXISTS idx_ventas_fecha_grupo ON ventas (fecha, grupo);
+        ANALYZE;
+    """
+]
@@ -0,0 +1,290 @@
+"""Clave normalizada de producto y tabla de alias.
+
+`producto_clave` (minúsculas, sin tildes, espacios colapsados) se calcula
+en la aplicación al escribir (ValidadorRegistros.normalizar_producto) y
+aquí se rellena para el histórico con `normalizar_producto()`.
+`producto_alias` une variantes bajo una clave canónica.
+
+El catálogo, el rollup mensual y la agregación de precios pasan a usar
+igualdad exacta sobre la clave en lugar de ILIKE '%producto%'; el
+catálogo y el rollup se reconstruyen desde compras.
+"""
+VERSION = 6
+NOMBRE = "producto_clave"
+
+POSTGRES = [
+    """
+        CREATE EXTENSION IF NOT EXISTS unaccent
+    """,
+    """
+        CREATE OR REPLACE FUNCTION normalizar_producto(p_nombre TEXT) RETURNS TEXT AS $$
+            SELECT NULLIF(lower(btrim(regexp_replace(unaccent(p_nombre), '\\s+', ' ', 'g'))), '')
+        $$ LANGUAGE sql STABLE
+    """,
+    """
+        ALTER TABLE compras ADD COLUMN IF NOT EXISTS producto_clave VARCHAR(100)
+    """,
+    """
+        ALTER TABLE gastos ADD COLUMN IF NOT EXISTS producto_clave VARCHAR(100)
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS producto_alias (
+            alias_clave VARCHAR(100) PRIMARY KEY,
+            producto_clave VARCHAR(100) NOT NULL,
+            creado_en TIMESTAMP DEFAULT NOW()
+        )
+    """,
+    """
+        UPDATE compras SET producto_clave = normalizar_producto(producto)
+         WHERE producto_clave IS NULL AND producto IS NOT NULL
+    """,
+    """
+        UPDATE gastos SET producto_clave = normalizar_producto(producto)
+         WHERE producto_clave IS NULL AND producto IS NOT NULL
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_compras_producto_clave_fecha ON compras (producto_clave, fecha)
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_gastos_producto_clave_fecha ON gastos (producto_clave, fecha)
+    """,
+    # Catálogo por clave; `producto` es MIN(producto) del histórico y, para las claves
+    # nuevas, el nombre de su primera compra (el trigger no lo cambia después)
+    """
+        DROP TRIGGER IF EXISTS trg_catalogo_productos ON compras
+    """,
+    """
+        DROP TABLE IF EXISTS catalogo_productos
+    """,
+    """
+        CREATE TABLE catalogo_productos (
+            producto_clave VARCHAR(100) PRIMARY KEY,
+            producto VARCHAR(100) NOT NULL,
+            ultima_compra DATE NOT NULL,
+            num_compras INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+    """
+        CREATE OR REPLACE FUNCTION actualizar_catalogo_productos() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.producto_clave IS NOT NULL THEN
+                UPDATE catalogo_productos
+                   SET num_compras = num_compras - 1,
+                       ultima_compra = COALESCE(
+                           (SELECT MAX(fecha) FROM compras WHERE producto_clave = OLD.producto_clave),
+                           ultima_compra
+                       )
+                 WHERE producto_clave = OLD.producto_clave;
+                DELETE FROM catalogo_productos
+                 WHERE producto_clave = OLD.producto_clave AND num_compras <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.producto_clave IS NOT NULL THEN
+                INSERT INTO catalogo_productos (producto_clave, producto, ultima_compra, num_compras)
+                VALUES (NEW.producto_clave, NEW.producto, NEW.fecha, 1)
+                ON CONFLICT (producto_clave) DO UPDATE
+                   SET num_compras = catalogo_productos.num_compras + 1,
+                       ultima_compra = GREATEST(catalogo_productos.ultima_compra, EXCLUDED.ultima_compra);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """,
+    """
+        CREATE TRIGGER trg_catalogo_productos
+        AFTER INSERT OR DELETE OR UPDATE OF producto_clave, fecha ON compras
+        FOR EACH ROW EXECUTE FUNCTION actualizar_catalogo_productos()
+    """,
+    """
+        INSERT INTO catalogo_productos (producto_clave, producto, ultima_compra, num_compras)
+        SELECT producto_clave, MIN(producto), MAX(fecha), COUNT(*)
+          FROM compras
+         WHERE producto_clave IS NOT NULL
+         GROUP BY producto_clave
+    """,
+    # Rollup mensual por clave
+    """
+        DROP TABLE IF EXISTS compras_rollup
+    """,
+    """
+        CREATE TABLE compras_rollup (
+            producto_clave VARCHAR(100) NOT NULL,
+            unidad_medida VARCHAR(20) NOT NULL,
+            mes DATE NOT NULL,
+            sum_monto NUMERIC(14,2) NOT NULL DEFAULT 0,
+            sum_cantidad NUMERIC(14,3) NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (producto_clave, unidad_medida, mes)
+        )
+    """,
+    """
+        CREATE OR REPLACE FUNCTION aplicar_deltas_compras_rollup(p_deltas JSONB) RETURNS VOID AS $$
+            INSERT INTO compras_rollup AS r (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT d.producto_clave, d.unidad_medida, d.mes, d.sum_monto, d.sum_cantidad, d.n
+              FROM jsonb_to_recordset(p_deltas) AS d(
+                       producto_clave TEXT, unidad_medida TEXT, mes DATE,
+                       sum_monto NUMERIC, sum_cantidad NUMERIC, n INTEGER
+                   )
+            ON CONFLICT (producto_clave, unidad_medida, mes) DO UPDATE
+               SET sum_monto = r.sum_monto + EXCLUDED.sum_monto,
+                   sum_cantidad = r.sum_cantidad + EXCLUDED.sum_cantidad,
+                   n = r.n + EXCLUDED.n;
+
+            DELETE FROM compras_rollup WHERE n <= 0;
+        $$ LANGUAGE sql
+    """,
+    """
+        CREATE OR REPLACE FUNCTION reconstruir_compras_rollup() RETURNS VOID AS $$
+            DELETE FROM compras_rollup;
+
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(producto_clave, ''), unidad_medida, date_trunc('month', fecha)::DATE,
+                   SUM(monto), SUM(cantidad), COUNT(*)
+              FROM compras
+             GROUP BY 1, 2, 3;
+        $$ LANGUAGE sql
+    """,
+    """
+        SELECT reconstruir_compras_rollup()
+    """,
+    # Agregación de precios por igualdad de clave
+    """
+        DROP FUNCTION IF EXISTS precio_ponderado_agregado(TEXT, DATE, DATE, TEXT)
+    """,
+    """
+        CREATE OR REPLACE FUNCTION precio_ponderado_agregado(
+            p_producto_clave TEXT,
+            p_fecha_inicio DATE,
+            p_fecha_fin DATE,
+            p_intervalo TEXT DEFAULT NULL
+        )
+        RETURNS TABLE (
+            periodo DATE,
+            sum_monto NUMERIC,
+            sum_cantidad NUMERIC,
+            n BIGINT,
+            precio_min NUMERIC,
+            precio_max NUMERIC
+        ) AS $$
+            SELECT CASE WHEN p_intervalo IS NULL THEN p_fecha_inicio
+                        ELSE date_trunc(p_intervalo, fecha)::DATE END,
+                   SUM(monto),
+                   SUM(cantidad),
+                   COUNT(*),
+                   MIN(monto / NULLIF(cantidad, 0)),
+                   MAX(monto / NULLIF(cantidad, 0))
+              FROM compras
+             WHERE producto_clave = p_producto_clave
+               AND fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+             GROUP BY 1
+             ORDER BY 1
+        $$ LANGUAGE sql STABLE
+    """
+]
+
+# Un único script en una transacción: ADD COLUMN no admite IF NOT EXISTS en
+# SQLite, así que si algo falla no debe quedar aplicado a medias.
+# normalizar_producto() la registra SQLiteBackend como función de Python.
+SQLITE = [
+    """
+        BEGIN;
+
+        ALTER TABLE compras ADD COLUMN producto_clave VARCHAR(100);
+        ALTER TABLE gastos ADD COLUMN producto_clave VARCHAR(100);
+
+        CREATE TABLE IF NOT EXISTS producto_alias (
+            alias_clave VARCHAR(100) PRIMARY KEY,
+            producto_clave VARCHAR(100) NOT NULL,
+            creado_en TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+
+        UPDATE compras SET producto_clave = normalizar_producto(producto)
+         WHERE producto_clave IS NULL AND producto IS NOT NULL;
+        UPDATE gastos SET producto_clave = normalizar_producto(producto)
+         WHERE producto_clave IS NULL AND producto IS NOT NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_compras_producto_clave_fecha ON compras (producto_clave, fecha);
+        CREATE INDEX IF NOT EXISTS idx_gastos_producto_clave_fecha ON gastos (producto_clave, fecha);
+
+        DROP TRIGGER IF EXISTS trg_catalogo_productos_insert;
+        DROP TRIGGER IF EXISTS trg_catalogo_productos_delete;
+        DROP TRIGGER IF EXISTS trg_catalogo_productos_update;
+        DROP TABLE IF EXISTS catalogo_productos;
+
+        CREATE TABLE catalogo_productos (
+            producto_clave VARCHAR(100) PRIMARY KEY,
+            producto VARCHAR(100) NOT NULL,
+            ultima_compra TEXT NOT NULL,
+            num_compras INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TRIGGER trg_catalogo_productos_insert
+        AFTER INSERT ON compras
+        BEGIN
+            INSERT INTO catalogo_productos (producto_clave, producto, ultima_compra, num_compras)
+            SELECT NEW.producto_clave, NEW.producto, NEW.fecha, 1 WHERE NEW.producto_clave IS NOT NULL
+            ON CONFLICT (producto_clave) DO UPDATE
+               SET num_compras = num_compras + 1,
+                   ultima_compra = MAX(ultima_compra, excluded.ultima_compra);
+        END;
+
+        CREATE TRIGGER trg_catalogo_productos_delete
+        AFTER DELETE ON compras
+        BEGIN
+            UPDATE catalogo_productos
+               SET num_compras = num_compras - 1,
+                   ultima_compra = COALESCE(
+                       (SELECT MAX(fecha) FROM compras WHERE producto_clave = OLD.producto_clave),
+                       ultima_compra
+                   )
+             WHERE producto_clave = OLD.producto_clave;
+            DELETE FROM catalogo_productos WHERE producto_clave = OLD.producto_clave AND num_compras <= 0;
+        END;
+
+        CREATE TRIGGER trg_catalogo_productos_update
+        AFTER UPDATE OF producto_clave, fecha ON compras
+        BEGIN
+            UPDATE catalogo_productos
+               SET num_compras = num_compras - 1,
+                   ultima_compra = COALESCE(
+                       (SELECT MAX(fecha) FROM compras WHERE producto_clave = OLD.producto_clave),
+                       ultima_compra
+                   )
+             WHERE producto_clave = OLD.producto_clave;
+            DELETE FROM catalogo_productos WHERE producto_clave = OLD.producto_clave AND num_compras <= 0;
+
+            INSERT INTO catalogo_productos (producto_clave, producto, ultima_compra, num_compras)
+            SELECT NEW.producto_clave, NEW.producto, NEW.fecha, 1 WHERE NEW.producto_clave IS NOT NULL
+            ON CONFLICT (producto_clave) DO UPDATE
+               SET num_compras = num_compras + 1,
+                   ultima_compra = MAX(ultima_compra, excluded.ultima_compra);
+        END;
+
+        INSERT INTO catalogo_productos (producto_clave, producto, ultima_compra, num_compras)
+        SELECT producto_clave, MIN(producto), MAX(fecha), COUNT(*)
+          FROM compras
+         WHERE producto_clave IS NOT NULL
+         GROUP BY producto_clave;
+
+        DROP TABLE IF EXISTS compras_rollup;
+
+        CREATE TABLE compras_rollup (
+            producto_clave VARCHAR(100) NOT NULL,
+            unidad_medida VARCHAR(20) NOT NULL,
+            mes TEXT NOT NULL,
+            sum_monto REAL NOT NULL DEFAULT 0,
+            sum_cantidad REAL NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (producto_clave, unidad_medida, mes)
+        );
+
+        INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+        SELECT COALESCE(producto_clave, ''), unidad_medida, strftime('%Y-%m-01', fecha),
+               SUM(monto), SUM(cantidad), COUNT(*)
+          FROM compras
+         GROUP BY 1, 2, 3;
+
+        COMMIT;
+    """
+]
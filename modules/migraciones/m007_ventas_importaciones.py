@@ -0,0 +1,29 @@
+"""Registro de los días de ventas ya importados desde el POS.
+
+La importación omite los días presentes aquí, de modo que volver a subir
+un archivo (o uno que se solapa con otro) no duplica ventas.
+"""
+VERSION = 7
+NOMBRE = "ventas_importaciones"
+
+POSTGRES = [
+    """
+        CREATE TABLE IF NOT EXISTS ventas_importaciones (
+            fecha DATE PRIMARY KEY,
+            archivo VARCHAR(255),
+            filas INTEGER NOT NULL DEFAULT 0,
+            importado_en TIMESTAMP DEFAULT NOW()
+        )
+    """
+]
+
+SQLITE = [
+    """
+        CREATE TABLE IF NOT EXISTS ventas_importaciones (
+            fecha TEXT PRIMARY KEY,
+            archivo VARCHAR(255),
+            filas INTEGER NOT NULL DEFAULT 0,
+            importado_en TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """
+]
@@ -0,0 +1,106 @@
+"""Rollup diario de ventas para el módulo de análisis.
+
+`ventas_diarias` guarda ingresos, unidades y líneas por día, grupo,
+producto, entidad y cliente. Se recalcula por días completos
+(`recalcular_ventas_diarias`) en cada escritura sobre ventas, y
+`ventas_agregadas` agrupa el rollup por periodo y una dimensión para que
+solo la serie agregada cruce la red.
+"""
+VERSION = 8
+NOMBRE = "ventas_diarias"
+
+POSTGRES = [
+    """
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            fecha DATE NOT NULL,
+            grupo VARCHAR(50) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            entidad VARCHAR(20) NOT NULL,
+            cliente VARCHAR(20) NOT NULL,
+            ingresos NUMERIC(14,2) NOT NULL DEFAULT 0,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            lineas INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, grupo, nombre, entidad, cliente)
+        )
+    """,
+    """
+        CREATE OR REPLACE FUNCTION recalcular_ventas_diarias(p_fechas DATE[]) RETURNS VOID AS $$
+            DELETE FROM ventas_diarias WHERE fecha = ANY(p_fechas);
+
+            INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+            SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+              FROM ventas
+             WHERE fecha = ANY(p_fechas)
+             GROUP BY 1, 2, 3, 4, 5;
+        $$ LANGUAGE sql
+    """,
+    """
+        CREATE OR REPLACE FUNCTION reconstruir_ventas_diarias() RETURNS VOID AS $$
+            DELETE FROM ventas_diarias;
+
+            INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+            SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+              FROM ventas
+             GROUP BY 1, 2, 3, 4, 5;
+        $$ LANGUAGE sql
+    """,
+    """
+        CREATE OR REPLACE FUNCTION ventas_agregadas(
+            p_fecha_inicio DATE,
+            p_fecha_fin DATE,
+            p_intervalo TEXT DEFAULT NULL,
+            p_dimension TEXT DEFAULT NULL,
+            p_grupo TEXT DEFAULT NULL
+        )
+        RETURNS TABLE (
+            periodo DATE,
+            dimension TEXT,
+            ingresos NUMERIC,
+            unidades BIGINT,
+            lineas BIGINT
+        ) AS $$
+            SELECT CASE WHEN p_intervalo IS NULL THEN p_fecha_inicio
+                        ELSE date_trunc(p_intervalo, fecha)::DATE END,
+                   CASE p_dimension
+                        WHEN 'grupo' THEN grupo
+                        WHEN 'nombre' THEN nombre
+                        WHEN 'entidad' THEN entidad
+                        WHEN 'cliente' THEN cliente
+                        ELSE 'total' END,
+                   SUM(ingresos),
+                   SUM(unidades),
+                   SUM(lineas)
+              FROM ventas_diarias
+             WHERE fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+               AND (p_grupo IS NULL OR grupo = p_grupo)
+             GROUP BY 1, 2
+             ORDER BY 1, 2
+        $$ LANGUAGE sql STABLE
+    """,
+    """
+        SELECT reconstruir_ventas_diarias()
+    """
+]
+
+SQLITE = [
+    """
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            fecha TEXT NOT NULL,
+            grupo VARCHAR(50) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            entidad VARCHAR(20) NOT NULL,
+            cliente VARCHAR(20) NOT NULL,
+            ingresos REAL NOT NULL DEFAULT 0,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            lineas INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, grupo, nombre, entidad, cliente)
+        );
+
+        DELETE FROM ventas_diarias;
+
+        INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+        SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+          FROM ventas
+         GROUP BY 1, 2, 3, 4, 5;
+    """
+]
@@ -0,0 +1,36 @@
+"""Clave de idempotencia en compras y gastos.
+
+Los registros enviados desde el diario de escritura diferida
+(modules.diario_escritura) llevan un UUID en `clave_idempotencia` y se
+insertan con upsert ignore_duplicates sobre esa columna: reenviar un lote
+cuya respuesta se perdió no duplica filas. Las filas escritas por otras
+vías la dejan en NULL, que no choca con el índice único.
+"""
+VERSION = 9
+NOMBRE = "clave_idempotencia"
+
+POSTGRES = [
+    """
+        ALTER TABLE compras ADD COLUMN IF NOT EXISTS clave_idempotencia UUID
+    """,
+    """
+        ALTER TABLE gastos ADD COLUMN IF NOT EXISTS clave_idempotencia UUID
+    """,
+    """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_compras_clave_idempotencia ON compras (clave_idempotencia)
+    """,
+    """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_gastos_clave_idempotencia ON gastos (clave_idempotencia)
+    """
+]
+
+SQLITE = [
+    """
+        BEGIN;
+        ALTER TABLE compras ADD COLUMN clave_idempotencia TEXT;
+        ALTER TABLE gastos ADD COLUMN clave_idempotencia TEXT;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_compras_clave_idempotencia ON compras (clave_idempotencia);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_gastos_clave_idempotencia ON gastos (clave_idempotencia);
+        COMMIT;
+    """
+]
@@ -0,0 +1,39 @@
+"""Reconstrucción de compras_rollup compatible con pg_safeupdate.
+
+Supabase activa pg_safeupdate en las RPC y rechaza el `DELETE` sin
+condición de `reconstruir_compras_rollup` (m004, m006); aquí se redefine
+con `WHERE true`. Además se reconstruye la tabla: la carga inicial de m004
+solo corría si estaba vacía, y una base que ya mantenía el rollup antes de
+las migraciones nunca recibió el histórico.
+"""
+VERSION = 10
+NOMBRE = "reconstruir_compras_rollup"
+
+POSTGRES = [
+    """
+        CREATE OR REPLACE FUNCTION reconstruir_compras_rollup() RETURNS VOID AS $$
+            DELETE FROM compras_rollup WHERE true;
+
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(producto_clave, ''), unidad_medida, date_trunc('month', fecha)::DATE,
+                   SUM(monto), SUM(cantidad), COUNT(*)
+              FROM compras
+             GROUP BY 1, 2, 3;
+        $$ LANGUAGE sql
+    """,
+    """
+        SELECT reconstruir_compras_rollup()
+    """
+]
+
+SQLITE = [
+    """
+        DELETE FROM compras_rollup;
+
+        INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+        SELECT COALESCE(producto_clave, ''), unidad_medida, strftime('%Y-%m-01', fecha),
+               SUM(monto), SUM(cantidad), COUNT(*)
+          FROM compras
+         GROUP BY 1, 2, 3;
+    """
+]
@@ -0,0 +1,23 @@
+"""Reconstrucción de ventas_diarias compatible con pg_safeupdate.
+
+Supabase activa pg_safeupdate en las RPC y rechaza el `DELETE` sin
+condición de `reconstruir_ventas_diarias` (m008); aquí se redefine con
+`WHERE true`. En SQLite la función es un método del backend y no cambia.
+"""
+VERSION = 11
+NOMBRE = "reconstruir_ventas_diarias"
+
+POSTGRES = [
+    """
+        CREATE OR REPLACE FUNCTION reconstruir_ventas_diarias() RETURNS VOID AS $$
+            DELETE FROM ventas_diarias WHERE true;
+
+            INSERT INTO ventas_diarias (fecha, grupo, nombre, entidad, cliente, ingresos, unidades, lineas)
+            SELECT fecha, grupo, nombre, entidad, cliente, SUM(venta), SUM(cantidad), COUNT(*)
+              FROM ventas
+             GROUP BY 1, 2, 3, 4, 5;
+        $$ LANGUAGE sql
+    """
+]
+
+SQLITE = []
@@ -0,0 +1,35 @@
+"""Recálculo de grupos concretos de compras_rollup.
+
+Si un reenvío del diario de escritura diferida encuentra filas ya
+insertadas (la respuesta del envío anterior se perdió), no se sabe si el
+rollup las sumó. `recalcular_compras_rollup` rehace desde compras solo sus
+grupos (clave, unidad, mes), así que es idempotente. En SQLite la función
+es un método del backend.
+"""
+VERSION = 12
+NOMBRE = "recalcular_compras_rollup"
+
+POSTGRES = [
+    """
+        CREATE OR REPLACE FUNCTION recalcular_compras_rollup(p_grupos JSONB) RETURNS VOID AS $$
+            DELETE FROM compras_rollup r
+             USING jsonb_to_recordset(p_grupos) AS g(producto_clave TEXT, unidad_medida TEXT, mes DATE)
+             WHERE r.producto_clave = g.producto_clave
+               AND r.unidad_medida = g.unidad_medida
+               AND r.mes = g.mes;
+
+            INSERT INTO compras_rollup (producto_clave, unidad_medida, mes, sum_monto, sum_cantidad, n)
+            SELECT COALESCE(c.producto_clave, ''), c.unidad_medida, date_trunc('month', c.fecha)::DATE,
+                   SUM(c.monto), SUM(c.cantidad), COUNT(*)
+              FROM compras c
+              JOIN jsonb_to_recordset(p_grupos) AS g(producto_clave TEXT, unidad_medida TEXT, mes DATE)
+                ON COALESCE(c.producto_clave, '') = g.producto_clave
+               AND c.unidad_medida = g.unidad_medida
+               AND c.fecha >= g.mes
+               AND c.fecha < g.mes + INTERVAL '1 month'
+             GROUP BY 1, 2, 3;
+        $$ LANGUAGE sql
+    """
+]
+
+SQLITE = []
@@ -0,0 +1,48 @@
+"""normalizar_producto() con la misma definición que la aplicación.
+
+La versión de m006 usaba `unaccent`, que no coincide con
+ValidadorRegistros.normalizar_producto en caracteres de compatibilidad
+(letras de ancho completo, superíndices, ligaduras) ni en marcas
+combinantes fuera de U+0300–U+036F: el histórico y las filas nuevas
+acababan en claves distintas del catálogo y del rollup. Ahora ambas hacen
+NFKD, quitan los mismos bloques de marcas combinantes, colapsan espacios y
+pasan a minúsculas (`normalize` requiere Postgres 13 y base UTF8).
+
+Las filas cuya clave salió de la definición anterior se recalculan
+(resolviendo alias) y el rollup se reconstruye. En SQLite la función ya es
+la de Python.
+"""
+VERSION = 13
+NOMBRE = "normalizar_producto_nfkd"
+
+# Misma clase que _MARCAS en utils.validators (escapes \u del regex de Postgres)
+_MARCAS = "[\\u0300-\\u036f\\u1ab0-\\u1aff\\u1dc0-\\u1dff\\u20d0-\\u20ff\\ufe20-\\ufe2f]"
+
+_RECLAVAR = """
+        UPDATE {tabla} t
+           SET producto_clave = COALESCE(
+                   (SELECT a.producto_clave FROM producto_alias a
+                     WHERE a.alias_clave = normalizar_producto(t.producto)),
+                   normalizar_producto(t.producto)
+               )
+         WHERE t.producto_clave = NULLIF(lower(btrim(regexp_replace(unaccent(t.producto), '\\s+', ' ', 'g'))), '')
+           AND t.producto_clave IS DISTINCT FROM normalizar_producto(t.producto)
+"""
+
+POSTGRES = [
+    f"""
+        CREATE OR REPLACE FUNCTION normalizar_producto(p_nombre TEXT) RETURNS TEXT AS $$
+            SELECT NULLIF(lower(btrim(regexp_replace(
+                       regexp_replace(normalize(p_nombre, NFKD), '{_MARCAS}', '', 'g'),
+                       '\\s+', ' ', 'g'
+                   ))), '')
+        $$ LANGUAGE sql STABLE
+    """,
+    _RECLAVAR.format(tabla="compras"),
+    _RECLAVAR.format(tabla="gastos"),
+    """
+        SELECT reconstruir_compras_rollup()
+    """
+]
+
+SQLITE = []
@@ -0,0 +1,88 @@
+from datetime import date, datetime
+
+
+class RollupCompras:
+    """Mantiene la tabla `compras_rollup` (sumas mensuales por clave de producto y unidad).
+
+    Las escrituras sobre compras generan deltas (+fila nueva, -fila anterior)
+    que se agregan por clave y se envían en una sola llamada RPC.
+    """
+    TABLA = "compras"
+    COLUMNAS = "id,producto_clave,unidad_medida,fecha,monto,cantidad"
+
+    @staticmethod
+    def _mes(fecha) -> str:
+        if isinstance(fecha, (date, datetime)):
+            return fecha.strftime("%Y-%m-01")
+        return f"{str(fecha)[:7]}-01"
+
+    def calcular_deltas(self, anteriores: list[dict], nuevas: list[dict]) -> list[dict]:
+        """Agrega por (producto_clave, unidad_medida, mes) la diferencia entre filas"""
+        deltas = {}
+        for filas, signo in ((anteriores, -1), (nuevas, 1)):
+            for fila in filas:
+                clave = (
+                    fila.get('producto_clave') or '',
+                    fila.get('unidad_medida') or 'unidad',
+                    self._mes(fila['fecha'])
+                )
+                delta = deltas.setdefault(clave, {'sum_monto': 0.0, 'sum_cantidad': 0.0, 'n': 0})
+                delta['sum_monto'] += signo * float(fila.get('monto') or 0)
+                delta['sum_cantidad'] += signo * float(fila.get('cantidad') or 0)
+                delta['n'] += signo
+
+        return [
+            {
+                'producto_clave': producto_clave,
+                'unidad_medida': unidad,
+                'mes': mes,
+                'sum_monto': round(valores['sum_monto'], 2),
+                'sum_cantidad': round(valores['sum_cantidad'], 3),
+                'n': valores['n']
+            }
+            for (producto_clave, unidad, mes), valores in deltas.items()
+            if valores['n'] or valores['sum_monto'] or valores['sum_cantidad']
+        ]
+
+    def leer_filas(self, client, ids: list, tamano_lote: int = 500, columna: str = 'id') -> list[dict]:
+        """Lee las columnas que alimentan el rollup para las filas con `columna` en `ids`"""
+        filas = []
+        for inicio in range(0, len(ids), tamano_lote):
+            bloque = ids[inicio:inicio + tamano_lote]
+            filas.extend(
+                client.table(self.TABLA).select(self.COLUMNAS).in_(columna, bloque).execute().data
+            )
+        return filas
+
+    def aplicar(self, client, anteriores: list[dict], nuevas: list[dict]):
+        deltas = self.calcular_deltas(anteriores, nuevas)
+        if deltas:
+            client.rpc('aplicar_deltas_compras_rollup', params={'p_deltas': deltas}).execute()
+
+    def recalcular(self, client, filas: list[dict]):
+        """Recalcula desde compras los grupos (clave, unidad, mes) de `filas`.
+
+        A diferencia de `aplicar` es idempotente: sirve cuando no se sabe si
+        los deltas de esas filas llegaron a sumarse.
+        """
+        grupos = sorted({
+            (fila.get('producto_clave') or '', fila.get('unidad_medida') or 'unidad', self._mes(fila['fecha']))
+            for fila in filas
+        })
+        if grupos:
+            client.rpc('recalcular_compras_rollup', params={'p_grupos': [
+                {'producto_clave': producto_clave, 'unidad_medida': unidad, 'mes': mes}
+                for producto_clave, unidad, mes in grupos
+            ]}).execute()
+
+    def reconstruir(self, client):
+        """Recalcula el rollup completo desde compras (para cargas históricas)"""
+        client.rpc('reconstruir_compras_rollup', params={}).execute()
+
+
+if __name__ == "__main__":
+    # Reconstrucción manual: python -m modules.rollup_compras
+    from modules.database import DatabaseManager
+
+    DatabaseManager().reconstruir_rollup_compras()
+    print("compras_rollup reconstruido")
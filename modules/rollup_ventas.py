@@ -0,0 +1,40 @@
+class RollupVentas:
+    """Mantiene la tabla `ventas_diarias` (ingresos y unidades por día y dimensión).
+
+    En lugar de deltas, cada escritura sobre ventas recalcula por completo
+    los días afectados: cubre inserciones, borrados y reimportaciones con
+    una sola RPC y un día nunca queda a medias.
+    """
+    TABLA = "ventas"
+
+    def leer_fechas(self, client, ids: list[int]) -> list[dict]:
+        """Fechas actuales de las filas de ventas indicadas"""
+        if not ids:
+            return []
+        return client.table(self.TABLA).select('id,fecha').in_('id', ids).execute().data
+
+    @staticmethod
+    def fechas_afectadas(operation, resultado, filas_previas, record_id) -> list[str]:
+        if operation == 'delete_by_fecha':
+            filas = [{'fecha': fecha} for fecha in record_id]
+        elif operation == 'insert':
+            filas = [resultado]
+        elif operation == 'bulk_insert':
+            filas = resultado['insertados']
+        elif operation == 'bulk_delete':
+            filas = resultado['eliminados']
+        elif operation == 'bulk_update':
+            filas = filas_previas + resultado['actualizados']
+        elif operation == 'update':
+            filas = filas_previas + resultado
+        else:
+            filas = filas_previas
+        return sorted({str(fila['fecha'])[:10] for fila in filas if fila and fila.get('fecha')})
+
+    def aplicar(self, client, fechas: list[str]):
+        if fechas:
+            client.rpc('recalcular_ventas_diarias', params={'p_fechas': fechas}).execute()
+
+    def reconstruir(self, client):
+        """Recalcula el rollup completo desde ventas"""
+        client.rpc('reconstruir_ventas_diarias', params={}).execute()
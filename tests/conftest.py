@@ -0,0 +1,32 @@
+import pytest
+import streamlit as st
+from streamlit import logger
+
+from modules.backends.sqlite_backend import SQLiteBackend
+from modules.database import DatabaseManager
+from utils.data_service import DataService
+
+logger.set_log_level("error")
+
+
+@pytest.fixture
+def data_service():
+    """DataService sobre una base SQLite en memoria con todas las migraciones"""
+    servicio = DataService(DatabaseManager.con_backend(SQLiteBackend(":memory:")))
+    yield servicio
+    servicio.db.client.conexion.close()
+
+
+class _Sesion(dict):
+    """Sustituto de st.session_state: dict con acceso por atributo"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+
+@pytest.fixture
+def sesion(monkeypatch):
+    """st.session_state vacío para la lógica que guarda estado de sesión"""
+    estado = _Sesion()
+    monkeypatch.setattr(st, "session_state", estado)
+    return estado
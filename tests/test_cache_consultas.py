@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from utils.cache_consultas import CacheConsultas
+
+CLAVE = ("compras", "historico")
+
+
+class Interrumpido(BaseException):
+    """Como el StopException de un rerun de Streamlit"""
+
+
+def esperar_hasta(condicion, limite: float = 2.0):
+    fin = time.monotonic() + limite
+    while not condicion():
+        assert time.monotonic() < fin, "la condición no se cumplió a tiempo"
+        time.sleep(0.005)
+
+
+def en_hilo(funcion):
+    """Ejecuta `funcion` en un hilo y guarda su valor o su excepción"""
+    resultado = {}
+
+    def correr():
+        try:
+            resultado['valor'] = funcion()
+        except BaseException as e:
+            resultado['error'] = e
+
+    hilo = threading.Thread(target=correr)
+    hilo.start()
+    return hilo, resultado
+
+
+def calculo_bloqueado(valor=None, error=None):
+    """calcular() que espera a `liberar` y devuelve `valor` o lanza `error`"""
+    empezado, liberar = threading.Event(), threading.Event()
+
+    def calcular():
+        empezado.set()
+        liberar.wait(2)
+        if error is not None:
+            raise error
+        return valor
+
+    return calcular, empezado, liberar
+
+
+def test_espera_relanza_si_el_original_se_interrumpe():
+    cache = CacheConsultas()
+    calcular, empezado, liberar = calculo_bloqueado(error=Interrumpido())
+    llamadas = []
+
+    def calcular_espera():
+        llamadas.append(1)
+        return "propio"
+
+    original, resultado_original = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular))
+    empezado.wait(2)
+    espera, resultado_espera = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular_espera))
+    esperar_hasta(lambda: cache.agrupadas == 1)
+
+    liberar.set()
+    original.join(2)
+    espera.join(2)
+
+    assert isinstance(resultado_original['error'], Interrumpido)
+    assert resultado_espera == {'valor': "propio"}
+    assert llamadas == [1]
+    assert cache.obtener(CLAVE) == "propio"
+
+
+def test_escritura_durante_el_calculo_descarta_el_resultado():
+    cache = CacheConsultas()
+    calcular, empezado, liberar = calculo_bloqueado(valor="anterior")
+
+    original, resultado_original = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular))
+    empezado.wait(2)
+    cache.invalidar_tabla("compras")
+
+    # Tras la escritura no se suma a la consulta en curso: calcula la suya
+    assert cache.obtener_o_calcular(CLAVE, lambda: "nuevo") == "nuevo"
+    assert cache.agrupadas == 0
+
+    liberar.set()
+    original.join(2)
+
+    assert resultado_original == {'valor': "anterior"}
+    assert cache.obtener(CLAVE) == "nuevo"
+
+
+def test_escritura_durante_el_calculo_no_deja_entrada():
+    cache = CacheConsultas()
+    calcular, empezado, liberar = calculo_bloqueado(valor="anterior")
+
+    original, _ = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular))
+    empezado.wait(2)
+    cache.invalidar_tabla("compras")
+    liberar.set()
+    original.join(2)
+
+    assert cache.obtener(CLAVE) is None
+
+
+def test_excepcion_se_propaga_a_las_esperas():
+    cache = CacheConsultas()
+    calcular, empezado, liberar = calculo_bloqueado(error=ValueError("sin conexión"))
+    llamadas = []
+
+    original, resultado_original = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular))
+    empezado.wait(2)
+    esperas = [
+        en_hilo(lambda: cache.obtener_o_calcular(CLAVE, lambda: llamadas.append(1)))
+        for _ in range(3)
+    ]
+    esperar_hasta(lambda: cache.agrupadas == 3)
+
+    liberar.set()
+    original.join(2)
+    for hilo, _ in esperas:
+        hilo.join(2)
+
+    assert isinstance(resultado_original['error'], ValueError)
+    for _, resultado in esperas:
+        assert resultado['error'] is resultado_original['error']
+    assert llamadas == []
+    assert cache.obtener(CLAVE) is None
+
+    # El error no queda guardado: la siguiente petición vuelve a calcular
+    assert cache.obtener_o_calcular(CLAVE, lambda: "ok") == "ok"
+
+
+def test_peticiones_simultaneas_comparten_una_consulta():
+    cache = CacheConsultas()
+    calcular, empezado, liberar = calculo_bloqueado(valor=[1, 2, 3])
+
+    original, resultado_original = en_hilo(lambda: cache.obtener_o_calcular(CLAVE, calcular))
+    empezado.wait(2)
+    esperas = [
+        en_hilo(lambda: cache.obtener_o_calcular(CLAVE, lambda: pytest.fail("consulta repetida")))
+        for _ in range(5)
+    ]
+    esperar_hasta(lambda: cache.agrupadas == 5)
+
+    liberar.set()
+    original.join(2)
+    for hilo, _ in esperas:
+        hilo.join(2)
+
+    assert all(resultado == {'valor': [1, 2, 3]} for _, resultado in esperas)
+    assert cache.estadisticas()['fallos'] == 1
@@ -0,0 +1,106 @@
+import pytest
+
+
+def insertar(db, tabla: str, *filas: dict) -> list[dict]:
+    return db.execute_safe_operation(operation='bulk_insert', table=tabla, data=list(filas))['insertados']
+
+
+def rollup(db) -> list[tuple]:
+    return sorted(
+        (r['producto_clave'], r['unidad_medida'], r['mes'], round(r['sum_monto'], 2), round(r['sum_cantidad'], 3), r['n'])
+        for r in db.client.table("compras_rollup").select("*").execute().data
+    )
+
+
+def reconstruido(db) -> list[tuple]:
+    db.rollup_compras.reconstruir(db.client)
+    return rollup(db)
+
+
+@pytest.fixture
+def db(data_service):
+    return data_service.db
+
+
+def compra(producto_clave: str, fecha: str, monto: float, cantidad: float = 1, **extra) -> dict:
+    return {'fecha': fecha, 'categoria': 'mercancía', 'producto': producto_clave, 'producto_clave': producto_clave,
+            'monto': monto, 'cantidad': cantidad, 'unidad_medida': 'kg', **extra}
+
+
+def test_actualizacion_en_bloque_conserva_las_columnas_ausentes(db):
+    a, b = insertar(db, "gastos",
+                    {'fecha': '2025-01-03', 'categoria': 'servicios', 'producto': 'Luz', 'monto': 10, 'proveedor': 'Enel'},
+                    {'fecha': '2025-01-04', 'categoria': 'servicios', 'producto': 'Agua', 'monto': 20, 'proveedor': 'EAAB'})
+
+    # Registros con columnas distintas en el mismo lote
+    resultado = db.actualizar_registros_lote("gastos", [
+        {'id': a['id'], 'monto': 11},
+        {'id': b['id'], 'proveedor': 'Acueducto'}
+    ])
+
+    assert resultado['faltantes'] == []
+    filas = {f['id']: f for f in db.client.table("gastos").select("*").execute().data}
+    assert (filas[a['id']]['monto'], filas[a['id']]['proveedor']) == (11, 'Enel')
+    assert (filas[b['id']]['monto'], filas[b['id']]['proveedor']) == (20, 'Acueducto')
+
+
+def test_actualizacion_en_bloque_no_recrea_filas_borradas(db):
+    a, b = insertar(db, "compras", compra("cafe", "2025-01-03", 100), compra("cafe", "2025-01-04", 50))
+    db.client.table("compras").delete().eq('id', b['id']).execute()
+
+    resultado = db.actualizar_registros_lote("compras", [{'id': a['id'], 'monto': 120}, {'id': b['id'], 'monto': 70}])
+
+    assert resultado['faltantes'] == [b['id']]
+    assert [f['id'] for f in db.client.table("compras").select("id").execute().data] == [a['id']]
+
+
+def test_cambios_iguales_comparten_peticion(db, monkeypatch):
+    filas = insertar(db, "compras", *(compra("cafe", f"2025-01-0{i}", 10 * i) for i in range(1, 6)))
+    tablas = []
+    table = db.client.table
+    monkeypatch.setattr(db.client, "table", lambda nombre: tablas.append(nombre) or table(nombre))
+
+    resultado = db.actualizar_registros_lote("compras", [{'id': f['id'], 'proveedor': 'Andes'} for f in filas])
+
+    assert len(resultado['actualizados']) == 5
+    assert tablas == ["compras"]
+    assert {f['proveedor'] for f in db.client.table("compras").select("proveedor").execute().data} == {'Andes'}
+
+
+def test_rollup_ignora_filas_borradas_durante_la_edicion(db, monkeypatch):
+    a, b = insertar(db, "compras", compra("cafe", "2025-01-03", 100), compra("cafe", "2025-01-04", 50))
+    previas = db.rollup_compras.leer_filas(db.client, [a['id'], b['id']])
+    # Otra sesión borra b después de leer las filas previas
+    db.execute_safe_operation(operation='delete', table="compras", record_id=b['id'])
+    monkeypatch.setattr(db, "_filas_previas_rollup", lambda *args: previas)
+
+    db.execute_safe_operation(operation='bulk_update', table="compras",
+                              data=[{'id': a['id'], 'monto': 120}, {'id': b['id'], 'monto': 70}])
+
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 120, 1, 1)]
+    assert rollup(db) == reconstruido(db)
+
+
+def test_borrado_en_bloque_por_bloques_de_ids(db, monkeypatch):
+    filas = insertar(db, "compras", *(compra("cafe", f"2025-01-0{i}", 10 * i) for i in range(1, 6)))
+    ids = [f['id'] for f in filas]
+    tablas = []
+    table = db.client.table
+    monkeypatch.setattr(db.client, "table", lambda nombre: tablas.append(nombre) or table(nombre))
+
+    resultado = db.eliminar_registros_lote("compras", ids[:3] + [999], tamano_lote=2)
+
+    assert sorted(f['id'] for f in resultado['eliminados']) == ids[:3]
+    assert resultado['faltantes'] == [999]
+    assert tablas == ["compras", "compras"]
+    assert [f['id'] for f in table("compras").select("id").order("id").execute().data] == ids[3:]
+
+
+def test_borrado_en_bloque_descuenta_el_rollup(db):
+    a, b, c = insertar(db, "compras", compra("cafe", "2025-01-03", 100), compra("cafe", "2025-01-04", 50),
+                       compra("te", "2025-02-01", 30))
+
+    db.execute_safe_operation(operation='bulk_delete', table="compras", record_id=[a['id'], c['id']])
+
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 50, 1, 1)]
+    assert rollup(db) == reconstruido(db)
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from modules.diario_escritura import DiarioEscritura, es_error_transitorio
+
+
+@pytest.fixture
+def diario(tmp_path):
+    diario = DiarioEscritura(str(tmp_path / "diario.db"), espera_base=60, espera_maxima=600)
+    yield diario
+    diario.conexion.close()
+
+
+class Backend:
+    """enviar(tabla, registros) que falla según `fallo(registros)`"""
+
+    def __init__(self, fallo=None):
+        self.fallo = fallo
+        self.lotes = []
+        self.recibidos = []
+
+    def __call__(self, tabla, registros):
+        self.lotes.append((tabla, [r['producto'] for r in registros]))
+        error = self.fallo(registros) if self.fallo else None
+        if error is not None:
+            raise error
+        self.recibidos.extend(registros)
+        return registros
+
+
+def filas(diario):
+    return diario.conexion.execute(
+        "SELECT estado, intentos, proximo_intento, error FROM diario ORDER BY id"
+    ).fetchall()
+
+
+def test_envia_por_tabla_y_vacia_el_diario(diario):
+    diario.encolar([("compras", {"producto": "a"}), ("gastos", {"producto": "b"}), ("compras", {"producto": "c"})])
+    backend = Backend()
+
+    assert diario.enviar_pendientes(backend) == 3
+    assert sorted(backend.lotes) == [("compras", ["a", "c"]), ("gastos", ["b"])]
+    assert all(r['clave_idempotencia'] for r in backend.recibidos)
+    assert diario.conteos() == {'pendiente': 0, 'fallido': 0}
+
+
+def test_error_de_conexion_pospone_con_espera_exponencial(diario):
+    diario.encolar([("compras", {"producto": "a"}), ("compras", {"producto": "b"})])
+    backend = Backend(lambda registros: ConnectionError("sin red"))
+
+    antes = time.time()
+    assert diario.enviar_pendientes(backend) == 0
+    for estado, intentos, proximo, error in filas(diario):
+        assert (estado, intentos, error) == ('pendiente', 1, "sin red")
+        assert antes + 30 <= proximo <= time.time() + 60
+    assert diario.ultimo_error == "sin red"
+
+    # Hasta que venza la espera no se vuelve a intentar
+    assert diario.enviar_pendientes(backend) == 0
+    assert len(backend.lotes) == 1
+
+    # Cada intento dobla la espera, con jitter y hasta espera_maxima
+    assert 120 <= diario._espera(3) <= 240
+    assert 300 <= diario._espera(20) <= 600
+
+
+def test_reintento_tras_la_espera(diario):
+    diario.encolar([("compras", {"producto": "a"})])
+    caido = [True]
+    backend = Backend(lambda registros: TimeoutError("tiempo agotado") if caido[0] else None)
+    diario.enviar_pendientes(backend)
+
+    caido[0] = False
+    diario.conexion.execute("UPDATE diario SET proximo_intento = 0")
+    assert diario.enviar_pendientes(backend) == 1
+    assert diario.conteos() == {'pendiente': 0, 'fallido': 0}
+    assert diario.ultimo_error is None
+
+
+def test_error_de_datos_aisla_las_filas_rechazadas(diario):
+    diario.encolar([("compras", {"producto": p}) for p in ("a", "malo", "c")])
+
+    def rechazar(registros):
+        if any(r['producto'] == "malo" for r in registros):
+            return ValueError("monto inválido")
+
+    backend = Backend(rechazar)
+    assert diario.enviar_pendientes(backend) == 2
+    assert backend.lotes == [("compras", ["a", "malo", "c"]), ("compras", ["a"]),
+                             ("compras", ["malo"]), ("compras", ["c"])]
+    assert diario.conteos() == {'pendiente': 0, 'fallido': 1}
+    [fallido] = diario.fallidos()
+    assert (fallido['producto'], fallido['error']) == ("malo", "monto inválido")
+
+
+def test_corte_de_red_durante_fila_a_fila_pospone_sin_marcar_fallido(diario):
+    diario.encolar([("compras", {"producto": p}) for p in ("malo", "b")])
+
+    def fallo(registros):
+        if any(r['producto'] == "malo" for r in registros):
+            return ValueError("monto inválido")
+        if registros[0]['producto'] == "b":
+            return ConnectionError("sin red")
+
+    assert diario.enviar_pendientes(Backend(fallo)) == 0
+    assert [(estado, intentos) for estado, intentos, _, _ in filas(diario)] == [('fallido', 0), ('pendiente', 1)]
+
+
+def test_reintentar_fallidos_los_vuelve_a_enviar(diario):
+    diario.encolar([("gastos", {"producto": "malo"})])
+    corregido = [False]
+    backend = Backend(lambda registros: None if corregido[0] else ValueError("rechazado"))
+    diario.enviar_pendientes(backend)
+    assert diario.conteos() == {'pendiente': 0, 'fallido': 1}
+
+    # Sin reintentar a mano las filas fallidas no se reenvían
+    corregido[0] = True
+    assert diario.enviar_pendientes(backend) == 0
+
+    assert diario.reintentar_fallidos() == 1
+    assert filas(diario) == [('pendiente', 0, 0, None)]
+    assert diario.enviar_pendientes(backend) == 1
+    assert diario.conteos() == {'pendiente': 0, 'fallido': 0}
+    assert backend.recibidos[0]['producto'] == "malo"
+
+
+def test_clasificacion_de_errores():
+    class ErrorPostgrest(Exception):
+        def __init__(self, code):
+            self.code = code
+
+    assert es_error_transitorio(ConnectionError())
+    assert es_error_transitorio(ErrorPostgrest("08006"))
+    assert es_error_transitorio(ErrorPostgrest("57P01"))
+    assert not es_error_transitorio(ErrorPostgrest("23505"))
+    assert not es_error_transitorio(ValueError())
@@ -0,0 +1,77 @@
+import pandas as pd
+
+from utils.diff_registros import calcular_diff, hay_cambios
+
+
+def tabla(filas: list[dict]) -> pd.DataFrame:
+    return pd.DataFrame(filas, columns=["id", "producto", "monto", "fecha"])
+
+
+ORIGINALES = tabla([
+    {'id': 1, 'producto': "Café", 'monto': 10.0, 'fecha': "2025-01-03"},
+    {'id': 2, 'producto': "Té", 'monto': 5.0, 'fecha': "2025-01-04"},
+    {'id': 3, 'producto': "Azúcar", 'monto': None, 'fecha': "2025-01-05"},
+])
+
+
+def test_sin_cambios():
+    diff = calcular_diff(ORIGINALES, ORIGINALES.copy(), clave="id")
+
+    assert not hay_cambios(diff)
+    assert diff['actualizados'] == {} and diff['eliminados'] == [] and diff['insertados'].empty
+
+
+def test_insertados_actualizados_y_eliminados_por_clave():
+    editados = ORIGINALES.drop(index=1).copy()
+    editados.loc[0, "monto"] = 12.0
+    editados.loc[2, "monto"] = 1.5
+    editados = pd.concat([editados, tabla([{'id': None, 'producto': "Leche", 'monto': 2.0, 'fecha': "2025-01-06"}])],
+                         ignore_index=True)
+
+    diff = calcular_diff(ORIGINALES, editados, clave="id")
+
+    assert hay_cambios(diff)
+    # Solo los campos que cambiaron; un NaN que pasa a valor cuenta como cambio
+    assert diff['actualizados'] == {1: {'monto': 12.0}, 3: {'monto': 1.5}}
+    assert diff['eliminados'] == [2]
+    assert diff['insertados']['producto'].tolist() == ["Leche"]
+
+
+def test_ids_float_del_editor_se_emparejan_con_los_enteros():
+    # Con una fila nueva sin id el editor devuelve la columna como float
+    editados = pd.concat([ORIGINALES, tabla([{'id': None, 'producto': "Sal", 'monto': 1.0}])], ignore_index=True)
+    editados["id"] = editados["id"].astype(float)
+
+    diff = calcular_diff(ORIGINALES, editados, clave="id")
+
+    assert diff['actualizados'] == {} and diff['eliminados'] == []
+    assert diff['insertados']['producto'].tolist() == ["Sal"]
+
+
+def test_sin_clave_empareja_por_indice():
+    editados = ORIGINALES.drop(columns="id").copy()
+    editados.loc[1, "producto"] = "Té verde"
+    editados.loc[3] = ["Leche", 2.0, "2025-01-06"]
+
+    diff = calcular_diff(ORIGINALES.drop(columns="id").iloc[:2], editados)
+
+    assert diff['actualizados'] == {1: {'producto': "Té verde"}}
+    assert diff['insertados'].index.tolist() == [2, 3]
+    assert diff['eliminados'] == []
+
+
+def test_normalizadores_y_campos():
+    editados = ORIGINALES.copy()
+    editados["fecha"] = pd.to_datetime(editados["fecha"])
+    editados.loc[1, "producto"] = "Té negro"
+
+    # Sin normalizar, texto frente a datetime cuenta como cambio en todas las filas
+    assert len(calcular_diff(ORIGINALES, editados, clave="id")['actualizados']) == 3
+
+    a_fecha = {'fecha': lambda serie: pd.to_datetime(serie).dt.date}
+    diff = calcular_diff(ORIGINALES, editados, clave="id", normalizadores=a_fecha)
+    assert diff['actualizados'] == {2: {'producto': "Té negro"}}
+
+    # `campos` limita la comparación; los que no existen se ignoran
+    diff = calcular_diff(ORIGINALES, editados, clave="id", campos=["monto", "inexistente"])
+    assert not hay_cambios(diff)
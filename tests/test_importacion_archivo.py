@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from modules.logic.regist_compras_gastos_logic import RegistroManager
+
+CSV = (
+    "Fecha;Categoría;Producto/Servicio;Monto;Cantidad;Unidad;Proveedor\n"
+    "2025-01-03;Mercancía;Café molido;12000;2;kg;Andes\n"
+    "2025-01-03;Servicios;Internet;90000;;;Claro\n"
+    "2025-13-40;Mercancía;Azúcar;5000;1;kg;Andes\n"
+    "2025-01-05;Mercancía;Azúcar;5000;1;kg;Andes\n"
+)
+
+
+@pytest.fixture
+def manager(data_service, sesion):
+    return RegistroManager(data_service)
+
+
+def importar(manager, contenido: bytes, nombre: str = "compras.csv"):
+    archivo = io.BytesIO(contenido)
+    mapeo = manager.sugerir_mapeo(manager.leer_encabezados(archivo, nombre))
+    return manager.importar_archivo(archivo, mapeo, nombre)
+
+
+def filas(data_service, tabla: str) -> list[dict]:
+    return data_service.db.client.table(tabla).select("*").order("id").execute().data
+
+
+def rollup(data_service) -> list[tuple]:
+    return sorted(
+        (r['producto_clave'], r['mes'], r['sum_monto'], r['n'])
+        for r in data_service.db.client.table("compras_rollup").select("*").execute().data
+    )
+
+
+def test_importa_csv_y_pasa_las_filas_con_error_a_la_tabla(manager, data_service, sesion):
+    resumen = importar(manager, CSV.encode("cp1252"))
+
+    assert (resumen['leidas'], resumen['insertadas'], resumen['invalidas'], resumen['pendientes']) == (4, 3, 1, 1)
+    assert resumen['errores']['linea'].tolist() == [4]
+    assert [c['producto'] for c in filas(data_service, "compras")] == ["Café molido", "Azúcar"]
+    [gasto] = filas(data_service, "gastos")
+    assert (gasto['producto'], gasto['categoria']) == ("Internet", "servicios")
+    assert rollup(data_service) == [("azucar", "2025-01-01", 5000.0, 1), ("cafe molido", "2025-01-01", 12000.0, 1)]
+    assert sesion.registros_temporales[0]['producto'] == "Azúcar"
+
+
+def test_reimportar_el_mismo_archivo_no_duplica(manager, data_service):
+    contenido = CSV.encode("utf-8")
+    importar(manager, contenido)
+    antes = rollup(data_service)
+
+    resumen = importar(manager, contenido, nombre="copia.csv")
+
+    assert (resumen['insertadas'], resumen['omitidas']) == (0, 3)
+    assert len(filas(data_service, "compras")) == 2
+    assert len(filas(data_service, "gastos")) == 1
+    assert rollup(data_service) == antes
+
+
+def test_importa_excel(manager, data_service):
+    openpyxl = pytest.importorskip("openpyxl")
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(["fecha", "categoria", "producto", "monto", "cantidad", "unidad_medida"])
+    hoja.append(["2025-02-01", "mercancia", "Leche", 3000, 2, "l"])
+    hoja.append(["2025-02-02", "mercancia", "Leche", 3300, 2, "l"])
+    contenido = io.BytesIO()
+    libro.save(contenido)
+
+    resumen = importar(manager, contenido.getvalue(), nombre="compras.xlsx")
+
+    assert (resumen['insertadas'], resumen['invalidas']) == (2, 0)
+    assert rollup(data_service) == [("leche", "2025-02-01", 6300.0, 2)]
@@ -0,0 +1,54 @@
+import io
+
+from modules.logic.importacion_ventas_logic import ImportacionVentasLogic
+
+ENCABEZADO = "Fecha;Grupo;Nombre;Cantidad;Venta;Entidad;Cliente\n"
+
+
+def archivo(*lineas: str) -> io.BytesIO:
+    return io.BytesIO((ENCABEZADO + "".join(f"{linea}\n" for linea in lineas)).encode("cp1252"))
+
+
+def ventas(data_service):
+    return data_service.db.client.table("ventas").select("fecha,nombre,cantidad").order("id").execute().data
+
+
+def test_importa_y_omite_dias_ya_importados(data_service):
+    logica = ImportacionVentasLogic(data_service)
+    contenido = ("2025-01-03;Bebidas;Café;2;5000;Restaurante;Clientes",
+                 "2025-01-04;Bebidas;Té;1;3000;Domicilio;Cuenta Casa")
+
+    resumen = logica.importar(archivo(*contenido), "pos.csv")
+    assert (resumen['insertadas'], resumen['dias_importados'], resumen['dias_pendientes']) == (2, 2, 0)
+    assert ventas(data_service)[0]['nombre'] == "Café"
+
+    repetido = logica.importar(archivo(*contenido), "pos.csv")
+    assert (repetido['insertadas'], repetido['omitidas'], repetido['dias_omitidos']) == (0, 2, 2)
+    assert len(ventas(data_service)) == 2
+
+
+def test_dia_con_errores_se_puede_reimportar_corregido(data_service):
+    logica = ImportacionVentasLogic(data_service)
+    buenas = ("2025-01-03;Bebidas;Café;2;5000;Restaurante;Clientes",
+              "2025-01-04;Bebidas;Té;1;3000;Domicilio;Clientes")
+
+    resumen = logica.importar(archivo(*buenas, "2025-01-04;Bebidas;Jugo;x;4000;Domicilio;Clientes"), "pos.csv")
+    assert (resumen['invalidas'], resumen['dias_importados'], resumen['dias_pendientes']) == (1, 1, 1)
+    assert resumen['errores']['linea'].tolist() == [4]
+
+    corregido = logica.importar(archivo(*buenas, "2025-01-04;Bebidas;Jugo;3;4000;Domicilio;Clientes"), "pos.csv")
+    assert (corregido['insertadas'], corregido['dias_omitidos'], corregido['dias_importados']) == (2, 1, 1)
+    # El día incompleto se limpia antes de reinsertar: no se duplica el té
+    assert sorted(v['nombre'] for v in ventas(data_service) if v['fecha'] == "2025-01-04") == ["Jugo", "Té"]
+
+
+def test_fila_sin_fecha_legible_no_registra_ningun_dia(data_service):
+    logica = ImportacionVentasLogic(data_service)
+
+    resumen = logica.importar(archivo(
+        "2025-01-03;Bebidas;Café;2;5000;Restaurante;Clientes",
+        "03/13/2025;Bebidas;Té;1;3000;Domicilio;Clientes"
+    ), "pos.csv")
+
+    assert (resumen['insertadas'], resumen['dias_importados'], resumen['dias_pendientes']) == (1, 0, 1)
+    assert data_service.obtener_dias_importados() == set()
@@ -0,0 +1,71 @@
+import pytest
+
+from modules.logic.regist_compras_gastos_logic import RegistroManager
+
+
+@pytest.fixture
+def db(data_service):
+    # Rechazo en la base de datos para filas que pasan la validación de la aplicación
+    data_service.db.client.conexion.executescript("""
+        CREATE TRIGGER rechazar_compras BEFORE INSERT ON compras WHEN NEW.producto = 'Rechazado'
+        BEGIN SELECT RAISE(ABORT, 'producto rechazado'); END;
+    """)
+    return data_service.db
+
+
+def compra(producto: str, monto: float = 10) -> dict:
+    return {'fecha': '2025-01-03', 'categoria': 'mercancía', 'producto': producto, 'producto_clave': producto.lower(),
+            'monto': monto, 'cantidad': 1, 'unidad_medida': 'kg'}
+
+
+def gasto(producto: str, monto: float = 10) -> dict:
+    return {'fecha': '2025-01-03', 'categoria': 'servicios', 'producto': producto, 'monto': monto}
+
+
+def productos(db, tabla: str) -> list[str]:
+    return [f['producto'] for f in db.client.table(tabla).select("producto").order("id").execute().data]
+
+
+def test_bloque_valido_en_una_peticion(db, monkeypatch):
+    tablas = []
+    table = db.client.table
+    monkeypatch.setattr(db.client, "table", lambda nombre: tablas.append(nombre) or table(nombre))
+
+    resultado = db.safe_insert_lote("compras", [compra(f"p{i}") for i in range(5)])
+
+    assert (len(resultado['insertados']), resultado['errores']) == (5, [])
+    assert tablas == ["compras"]
+
+
+def test_bloque_con_fila_rechazada_se_reintenta_fila_a_fila(db):
+    registros = [compra("Cafe"), compra("Rechazado"), compra("Te")]
+
+    resultado = db.safe_insert_lote("compras", registros, tamano_lote=2)
+
+    assert [f['producto'] for f in resultado['insertados']] == ["Cafe", "Te"]
+    [error] = resultado['errores']
+    assert error['indice'] == 1 and "producto rechazado" in error['error']
+    assert productos(db, "compras") == ["Cafe", "Te"]
+
+
+def test_guardar_registros_agrupa_por_tabla_y_conserva_posiciones(data_service, db):
+    resultado = data_service.guardar_registros([
+        ("gastos", gasto("Luz")), ("compras", compra("Cafe")), ("compras", compra("Rechazado")), ("gastos", gasto("Agua"))
+    ])
+
+    assert resultado['insertados'] == 3
+    assert [(e['indice'], e['tabla']) for e in resultado['errores']] == [(2, "compras")]
+    assert productos(db, "gastos") == ["Luz", "Agua"]
+
+
+def test_confirmar_deja_en_la_lista_solo_las_filas_fallidas(data_service, db, sesion):
+    manager = RegistroManager(data_service)
+    sesion.registros_temporales = [compra("Cafe"), compra("Rechazado"), gasto("Luz")]
+
+    resumen = manager.confirmar_registros()
+
+    assert resumen['insertados'] == 2
+    assert len(resumen['errores']) == 1 and resumen['errores'][0].startswith("Fila 2 (compras)")
+    assert [r['producto'] for r in sesion.registros_temporales] == ["Rechazado"]
+    assert productos(db, "compras") == ["Cafe"]
+    assert productos(db, "gastos") == ["Luz"]
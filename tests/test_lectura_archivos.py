@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from utils.lectura_archivos import leer_por_bloques, leer_encabezados
+
+CSV = "Fecha;Producto;Monto\n2025-01-03;Café molido;10,5\n2025-01-04;Azúcar Ñandú;3\n"
+
+
+def leer(contenido: bytes, nombre: str = "export.csv", tamano_bloque: int = 1000):
+    return [bloque for bloque, _ in leer_por_bloques(io.BytesIO(contenido), nombre, tamano_bloque)]
+
+
+@pytest.mark.parametrize("codificacion", ["utf-8", "utf-8-sig", "cp1252", "latin-1"])
+def test_detecta_la_codificacion_sin_reemplazar_caracteres(codificacion):
+    [bloque] = leer(CSV.encode(codificacion))
+
+    assert list(bloque.columns) == ["Fecha", "Producto", "Monto"]
+    assert bloque["Producto"].tolist() == ["Café molido", "Azúcar Ñandú"]
+
+
+def test_bytes_invalidos_en_cp1252_se_leen_como_latin1():
+    # 0x81 no existe en cp1252; en latin-1 es un carácter de control
+    [bloque] = leer("Producto\nCafé\x81\n".encode("latin-1"))
+
+    assert bloque["Producto"].tolist() == ["Café\x81"]
+
+
+def test_utf8_con_tilde_al_final_de_un_bloque_de_lectura():
+    # Un carácter multibyte partido entre lecturas no debe hacer caer a cp1252
+    contenido = ("Producto\n" + "x" * 8190 + "é\n").encode("utf-8")
+    [bloque] = leer(contenido)
+
+    assert bloque["Producto"].iloc[0].endswith("é")
+
+
+def test_bloques_y_encabezados():
+    contenido = ("Producto,Monto\n" + "".join(f"p{i},{i}\n" for i in range(25))).encode("utf-8")
+
+    bloques = leer(contenido, tamano_bloque=10)
+    assert [len(b) for b in bloques] == [10, 10, 5]
+    assert leer_encabezados(io.BytesIO(contenido), "datos.csv") == ["Producto", "Monto"]
+
+
+def test_formato_no_soportado():
+    with pytest.raises(ValueError, match="Formato no soportado"):
+        leer(b"", nombre="datos.pdf")
@@ -0,0 +1,140 @@
+import pytest
+
+from modules.rollup_compras import RollupCompras
+
+
+def compra(producto_clave: str, fecha: str, monto: float, cantidad: float = 1, unidad: str = "kg") -> dict:
+    return {'fecha': fecha, 'categoria': 'mercancía', 'producto': producto_clave, 'producto_clave': producto_clave,
+            'monto': monto, 'cantidad': cantidad, 'unidad_medida': unidad}
+
+
+def rollup(db) -> list[tuple]:
+    return sorted(
+        (r['producto_clave'], r['unidad_medida'], r['mes'], round(r['sum_monto'], 2), round(r['sum_cantidad'], 3), r['n'])
+        for r in db.client.table("compras_rollup").select("*").execute().data
+    )
+
+
+def coincide_con_reconstruccion(db) -> bool:
+    incremental = rollup(db)
+    db.rollup_compras.reconstruir(db.client)
+    return incremental == rollup(db)
+
+
+@pytest.fixture
+def db(data_service):
+    return data_service.db
+
+
+def test_calcular_deltas_agrega_por_clave_unidad_y_mes():
+    anteriores = [{'producto_clave': 'cafe', 'unidad_medida': 'kg', 'fecha': '2025-01-10', 'monto': 100, 'cantidad': 2}]
+    nuevas = [
+        {'producto_clave': 'cafe', 'unidad_medida': 'kg', 'fecha': '2025-01-10', 'monto': 120, 'cantidad': 2},
+        {'producto_clave': 'cafe', 'unidad_medida': 'kg', 'fecha': '2025-02-01', 'monto': 50, 'cantidad': 1},
+        {'producto_clave': None, 'unidad_medida': None, 'fecha': '2025-02-03', 'monto': 5, 'cantidad': None},
+    ]
+
+    deltas = RollupCompras().calcular_deltas(anteriores, nuevas)
+
+    assert sorted(deltas, key=lambda d: (d['producto_clave'], d['mes'])) == [
+        {'producto_clave': '', 'unidad_medida': 'unidad', 'mes': '2025-02-01', 'sum_monto': 5.0, 'sum_cantidad': 0.0, 'n': 1},
+        {'producto_clave': 'cafe', 'unidad_medida': 'kg', 'mes': '2025-01-01', 'sum_monto': 20.0, 'sum_cantidad': 0.0, 'n': 0},
+        {'producto_clave': 'cafe', 'unidad_medida': 'kg', 'mes': '2025-02-01', 'sum_monto': 50.0, 'sum_cantidad': 1.0, 'n': 1},
+    ]
+
+
+def test_calcular_deltas_omite_grupos_sin_cambio():
+    fila = {'producto_clave': 'cafe', 'unidad_medida': 'kg', 'fecha': '2025-01-10', 'monto': 100, 'cantidad': 2}
+    assert RollupCompras().calcular_deltas([fila], [dict(fila)]) == []
+
+
+def test_insercion_individual_y_en_bloque(db):
+    db.execute_safe_operation(operation='insert', table="compras", data=compra("cafe", "2025-01-03", 100, 2))
+    db.execute_safe_operation(operation='bulk_insert', table="compras",
+                              data=[compra("cafe", "2025-01-20", 60, 1), compra("te", "2025-02-01", 30, 3, "caja")])
+
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 160, 3, 2), ("te", "caja", "2025-02-01", 30, 3, 1)]
+    assert coincide_con_reconstruccion(db)
+
+
+def test_actualizacion_mueve_la_fila_de_grupo(db):
+    fila = db.execute_safe_operation(operation='insert', table="compras", data=compra("cafe", "2025-01-03", 100, 2))
+
+    # Cambia de mes y de producto: resta del grupo anterior y suma al nuevo
+    db.execute_safe_operation(operation='update', table="compras", record_id=fila['id'],
+                              data={'fecha': '2025-02-03', 'producto_clave': 'te', 'monto': 80})
+
+    assert rollup(db) == [("te", "kg", "2025-02-01", 80, 2, 1)]
+    assert coincide_con_reconstruccion(db)
+
+
+def test_actualizacion_en_bloque(db):
+    filas = db.execute_safe_operation(operation='bulk_insert', table="compras",
+                                      data=[compra("cafe", f"2025-01-0{i}", 10 * i) for i in range(1, 5)])['insertados']
+
+    db.execute_safe_operation(operation='bulk_update', table="compras", data=[
+        {'id': filas[0]['id'], 'monto': 15},
+        {'id': filas[1]['id'], 'fecha': '2025-03-01'},
+    ])
+
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 85, 3, 3), ("cafe", "kg", "2025-03-01", 20, 1, 1)]
+    assert coincide_con_reconstruccion(db)
+
+
+def test_borrado_individual_y_en_bloque(db):
+    filas = db.execute_safe_operation(operation='bulk_insert', table="compras",
+                                      data=[compra("cafe", "2025-01-03", 100), compra("cafe", "2025-01-04", 50),
+                                            compra("te", "2025-01-05", 30)])['insertados']
+
+    db.execute_safe_operation(operation='delete', table="compras", record_id=filas[0]['id'])
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 50, 1, 1), ("te", "kg", "2025-01-01", 30, 1, 1)]
+
+    # El grupo que se queda sin filas desaparece del rollup
+    db.execute_safe_operation(operation='bulk_delete', table="compras", record_id=[filas[1]['id'], filas[2]['id']])
+    assert rollup(db) == []
+
+
+def test_borrar_una_fila_inexistente_no_toca_el_rollup(db):
+    db.execute_safe_operation(operation='insert', table="compras", data=compra("cafe", "2025-01-03", 100))
+
+    db.execute_safe_operation(operation='bulk_delete', table="compras", record_id=[9999])
+
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 100, 1, 1)]
+
+
+def test_unir_productos_mueve_el_historico_con_deltas(data_service, db, monkeypatch):
+    db.execute_safe_operation(operation='bulk_insert', table="compras", data=[
+        compra("cafe molido", "2025-01-03", 100, 2), compra("cafe mol", "2025-01-10", 40, 1),
+        compra("cafe molido x", "2025-02-01", 30, 1), compra("te", "2025-01-05", 10, 1),
+    ])
+    monkeypatch.setattr(db.rollup_compras, "reconstruir", lambda client: pytest.fail("reconstrucción completa"))
+
+    reasignadas = data_service.registrar_alias(["cafe mol", "cafe molido x"], "cafe molido")
+
+    assert reasignadas == 2
+    assert rollup(db) == [("cafe molido", "kg", "2025-01-01", 140, 3, 2), ("cafe molido", "kg", "2025-02-01", 30, 1, 1),
+                          ("te", "kg", "2025-01-01", 10, 1, 1)]
+    assert set(data_service.obtener_alias()) == {"cafe mol", "cafe molido x"}
+    monkeypatch.undo()
+    assert coincide_con_reconstruccion(db)
+
+
+def test_unir_bajo_un_alias_usa_su_canonica(data_service, db):
+    db.execute_safe_operation(operation='bulk_insert', table="compras", data=[
+        compra("cafe", "2025-01-03", 100), compra("cafe mol", "2025-01-04", 50), compra("cafesito", "2025-01-05", 20)
+    ])
+    data_service.registrar_alias(["cafe mol"], "cafe")
+
+    data_service.registrar_alias(["cafesito"], "cafe mol")
+
+    assert data_service.obtener_alias() == {"cafe mol": "cafe", "cafesito": "cafe"}
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 170, 3, 3)]
+    # Las compras nuevas con un alias se guardan bajo la canónica
+    data_service.guardar_registros([("compras", compra("cafesito", "2025-01-06", 5))])
+    assert rollup(db) == [("cafe", "kg", "2025-01-01", 175, 4, 4)]
+
+
+@pytest.mark.parametrize("alias", [[], ["cafe"], [""]])
+def test_unir_productos_rechaza_alias_invalidos(data_service, alias):
+    with pytest.raises(ValueError):
+        data_service.registrar_alias(alias, "cafe")
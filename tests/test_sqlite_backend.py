@@ -0,0 +1,96 @@
+import pytest
+
+GASTOS = [
+    {'fecha': "2025-01-03", 'categoria': "servicios", 'producto': "Luz", 'monto': 30.0},
+    {'fecha': "2025-01-10", 'categoria': "servicios", 'producto': "Agua", 'monto': 12.0},
+    {'fecha': "2025-02-01", 'categoria': "arriendo", 'producto': "Local", 'monto': 500.0},
+    {'fecha': "2025-02-15", 'categoria': "servicios", 'producto': None, 'monto': 8.0},
+]
+
+
+@pytest.fixture
+def client(data_service):
+    client = data_service.db.client
+    client.table("gastos").insert(GASTOS).execute()
+    return client
+
+
+def productos(respuesta) -> list:
+    return [fila['producto'] for fila in respuesta.data]
+
+
+def test_filtros_encadenados_y_orden(client):
+    consulta = (client.table("gastos").select("producto, monto")
+                .gte("fecha", "2025-01-05").neq("categoria", "arriendo").order("monto", desc=True))
+
+    assert consulta.execute().data == [{'producto': "Agua", 'monto': 12.0}, {'producto': None, 'monto': 8.0}]
+    assert productos(client.table("gastos").select("*").in_("id", [1, 3]).order("id").execute()) == ["Luz", "Local"]
+    assert productos(client.table("gastos").select("*").in_("id", []).execute()) == []
+    assert productos(client.table("gastos").select("*").is_("producto", "null").execute()) == [None]
+    assert productos(client.table("gastos").select("*").ilike("producto", "l*").order("id").execute()) == ["Luz", "Local"]
+
+
+def test_or_con_grupos_anidados(client):
+    respuesta = (client.table("gastos").select("producto")
+                 .or_("monto.gt.100,and(categoria.eq.servicios,fecha.lt.2025-01-05)").order("id").execute())
+
+    assert productos(respuesta) == ["Luz", "Local"]
+
+
+def test_rango_conteo_y_fila_unica(client):
+    respuesta = client.table("gastos").select("*", count="exact").order("id").range(1, 2).execute()
+    assert (productos(respuesta), respuesta.count) == (["Agua", "Local"], 4)
+
+    assert client.table("gastos").select("*", count="exact", head=True).eq("categoria", "servicios").execute().count == 3
+    assert client.table("gastos").select("*").eq("id", 2).single().execute().data['producto'] == "Agua"
+    with pytest.raises(ValueError, match="exactamente una fila"):
+        client.table("gastos").select("*").eq("categoria", "servicios").single().execute()
+
+
+def test_update_y_delete_devuelven_las_filas_afectadas(client):
+    actualizadas = client.table("gastos").update({'monto': 1.0}).in_("id", [1, 2, 99]).execute().data
+    assert sorted(f['id'] for f in actualizadas) == [1, 2]
+
+    borradas = client.table("gastos").delete().eq("categoria", "arriendo").execute()
+    assert productos(borradas) == ["Local"]
+    assert productos(client.table("gastos").select("*").order("id").execute()) == ["Luz", "Agua", None]
+
+
+def test_upsert_por_clave_idempotencia(client):
+    fila = {'fecha': "2025-03-01", 'categoria': "servicios", 'producto': "Gas", 'monto': 9.0,
+            'clave_idempotencia': "5b7f4a3c-0000-4000-8000-000000000001"}
+    tabla = lambda: client.table("gastos")
+
+    assert len(tabla().upsert(fila, on_conflict="clave_idempotencia", ignore_duplicates=True).execute().data) == 1
+    # Un duplicado ignorado no devuelve filas ni cambia la existente
+    repetida = {**fila, 'monto': 99.0}
+    assert tabla().upsert(repetida, on_conflict="clave_idempotencia", ignore_duplicates=True).execute().data == []
+    assert tabla().select("monto").eq("producto", "Gas").execute().data == [{'monto': 9.0}]
+
+    # Sin ignore_duplicates actualiza las columnas enviadas
+    tabla().upsert(repetida, on_conflict="clave_idempotencia").execute()
+    assert tabla().select("monto").eq("producto", "Gas").execute().data == [{'monto': 99.0}]
+
+
+def test_insercion_sin_default_to_null_respeta_los_valores_por_defecto(client):
+    filas = [
+        {'fecha': "2025-03-01", 'producto': "Sal", 'monto': 2.0},
+        {'fecha': "2025-03-01", 'producto': "Arroz", 'monto': 3.0, 'cantidad': 5, 'unidad_medida': "kg"},
+    ]
+    client.table("compras").insert(filas, default_to_null=False).execute()
+
+    guardadas = client.table("compras").select("producto, categoria, cantidad, unidad_medida").order("id").execute().data
+    assert [(f['categoria'], f['cantidad'], f['unidad_medida']) for f in guardadas] == [
+        ("Mercancía", 1, "unidad"), ("Mercancía", 5, "kg")
+    ]
+
+
+def test_identificadores_y_rpc_no_validos(client):
+    with pytest.raises(ValueError, match="Identificador no válido"):
+        client.table("gastos; DROP TABLE gastos").select("*").execute()
+    with pytest.raises(ValueError, match="Identificador no válido"):
+        client.table("gastos").select("*").eq("monto = 1 OR 1", 1).execute()
+    with pytest.raises(ValueError, match="Operador no soportado"):
+        client.table("gastos").select("*").or_("monto.regex.1").execute()
+    with pytest.raises(ValueError, match="no disponible en SQLite"):
+        client.rpc("no_existe", {}).execute()
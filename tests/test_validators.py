@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from utils.validators import ValidadorRegistros
+
+NOMBRES = [
+    "Café  Molido ", "CAFÉ MOLIDO", "Ñandú", "ＣＡＦＥ", "ﬁno", "m²", "Crème brûlée",
+    "a᷄b", "x⃗", " leche entera", "   ", "", None
+]
+
+
+def test_vectorizada_coincide_con_la_escalar():
+    claves = ValidadorRegistros.normalizar_productos(pd.Series(NOMBRES, dtype=object))
+    assert claves.tolist() == [ValidadorRegistros.normalizar_producto(n) for n in NOMBRES]
+
+
+@pytest.mark.parametrize("nombre, clave", [
+    ("Café  Molido ", "cafe molido"),
+    ("Ñandú", "nandu"),
+    ("ＣＡＦＥ", "cafe"),
+    ("ﬁno", "fino"),
+    ("m²", "m2"),
+    ("a᷄b", "ab"),
+    (" leche entera", "leche entera"),
+    ("   ", None),
+    (None, None),
+])
+def test_clave_de_producto(nombre, clave):
+    assert ValidadorRegistros.normalizar_producto(nombre) == clave
+
+
+def test_misma_clave_en_sqlite(data_service):
+    # SQLiteBackend registra la función de Python como normalizar_producto()
+    conexion = data_service.db.client.conexion
+    for nombre in NOMBRES:
+        [(clave,)] = conexion.execute("SELECT normalizar_producto(?)", (nombre,)).fetchall()
+        assert clave == ValidadorRegistros.normalizar_producto(nombre)
+
+
+REGISTROS = [
+    {'fecha': "2025-01-03", 'categoria': "servicios", 'producto': "Luz", 'monto': 10},
+    {'fecha': "2025-01-03", 'categoria': "mercancía", 'producto': "Café", 'monto': "12.5", 'cantidad': 2,
+     'unidad_medida': "kg"},
+    {'fecha': "", 'categoria': "servicios", 'producto': "   ", 'monto': 0},
+    {'fecha': "2025-01-03", 'categoria': "", 'producto': "Agua", 'monto': ""},
+    {'fecha': "2025-01-03", 'categoria': "servicios", 'producto': "Gas", 'monto': "abc"},
+    {'fecha': "2025-01-03", 'categoria': "mercancía", 'producto': "Té", 'monto': -3, 'cantidad': "",
+     'unidad_medida': ""},
+    {'fecha': "2025-01-03", 'categoria': "mercancía", 'producto': "Sal", 'monto': 1, 'cantidad': -1,
+     'unidad_medida': "kg"},
+    {'fecha': "2025-01-03", 'categoria': "mercancía", 'producto': "Arroz", 'monto': 1, 'cantidad': "dos"},
+    {'fecha': None, 'categoria': None, 'producto': "", 'monto': None},
+]
+
+
+def test_validar_dataframe_coincide_con_la_validacion_por_fila():
+    errores = ValidadorRegistros.agrupar_errores(ValidadorRegistros.validar_dataframe(pd.DataFrame(REGISTROS)))
+
+    for fila, registro in enumerate(REGISTROS):
+        assert errores.get(fila, []) == ValidadorRegistros.validar_campos_comunes(registro), registro
+
+
+def test_validar_dataframe_rechaza_fechas_invalidas():
+    # Regla adicional de la validación vectorizada: la fecha debe poder parsearse
+    df = pd.DataFrame([{**REGISTROS[0], 'fecha': "2025-13-45"}])
+
+    assert ValidadorRegistros.validar_dataframe(df)['mensaje'].tolist() == ["Formato de **fecha** inválido"]
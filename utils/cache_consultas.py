@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Vuelo:
+    """Consulta en curso a la que se suman las peticiones idénticas"""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.terminado = threading.Event()
+        self.valor = None
+        self.error = None
+
+    def esperar(self):
+        """Valor de la consulta; relanza su excepción o devuelve el propio
+        vuelo si se interrumpió sin resultado"""
+        self.terminado.wait()
+        if self.error is self:
+            return self
+        if self.error is not None:
+            raise self.error
+        return self.valor
+
+
+class CacheConsultas:
+    """Caché LRU con expiración (TTL) para resultados de consultas.
+
+    Las entradas se agrupan por tabla (primer elemento de la clave) y cada
+    tabla tiene un contador de versión que sube con cada escritura. Una
+    entrada solo es válida si se calculó con la versión vigente de su
+    tabla, así que una consulta que estaba en curso durante una escritura
+    no deja en la caché datos anteriores a ella.
+
+    Es segura entre hilos porque el DataService se comparte entre todas las
+    sesiones de Streamlit; `obtener_o_calcular` además agrupa las peticiones
+    idénticas simultáneas en una sola consulta (single-flight).
+    """
+
+    def __init__(self, ttl: float = 300, max_entradas: int = 128):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._versiones = {}
+        self._en_vuelo = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.agrupadas = 0
+
+    def version(self, tabla: str) -> int:
+        with self._lock:
+            return self._versiones.get(tabla, 0)
+
+    def _vigente(self, clave: tuple):
+        """Entrada válida o None; requiere tener el lock"""
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        guardada_en, version, valor = entrada
+        if time.monotonic() - guardada_en > self.ttl or version != self._versiones.get(clave[0], 0):
+            del self._entradas[clave]
+            return None
+        self._entradas.move_to_end(clave)
+        return valor
+
+    def _guardar(self, clave: tuple, valor, version: int):
+        """Guarda si `version` sigue vigente; requiere tener el lock"""
+        if version != self._versiones.get(clave[0], 0):
+            return
+        self._entradas[clave] = (time.monotonic(), version, valor)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def obtener(self, clave: tuple):
+        """Devuelve el valor guardado o None si no existe, ha expirado o su tabla cambió"""
+        with self._lock:
+            valor = self._vigente(clave)
+            if valor is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: tuple, valor):
+        """Guarda un valor; la clave debe empezar por el nombre de la tabla"""
+        with self._lock:
+            self._guardar(clave, valor, self._versiones.get(clave[0], 0))
+
+    def obtener_o_calcular(self, clave: tuple, calcular):
+        """Devuelve la entrada vigente o el resultado de `calcular()`.
+
+        Si otra petición ya está calculando la misma clave con la versión
+        vigente de la tabla, se espera a su resultado (o a su excepción) en
+        lugar de repetir la consulta. El resultado se comparte: quien lo
+        modifique debe copiarlo antes.
+        """
+        with self._lock:
+            valor = self._vigente(clave)
+            if valor is not None:
+                self.aciertos += 1
+                return valor
+
+            version = self._versiones.get(clave[0], 0)
+            vuelo = self._en_vuelo.get(clave)
+            if vuelo is not None and vuelo.version == version:
+                self.agrupadas += 1
+                propio = False
+            else:
+                # Sin consulta en curso, o la que hay empezó antes de una escritura
+                vuelo = self._en_vuelo[clave] = _Vuelo(version)
+                self.fallos += 1
+                propio = True
+
+        if not propio:
+            if isinstance(vuelo.esperar(), _Vuelo):
+                # La petición original se interrumpió (p. ej. un rerun): se calcula aquí
+                return self.obtener_o_calcular(clave, calcular)
+            return vuelo.valor
+
+        try:
+            vuelo.valor = calcular()
+        except Exception as e:
+            vuelo.error = e
+            raise
+        except BaseException:
+            vuelo.error = vuelo
+            raise
+        finally:
+            with self._lock:
+                if vuelo.error is None:
+                    self._guardar(clave, vuelo.valor, vuelo.version)
+                if self._en_vuelo.get(clave) is vuelo:
+                    del self._en_vuelo[clave]
+            vuelo.terminado.set()
+        return vuelo.valor
+
+    def invalidar_tabla(self, tabla: str):
+        """Sube la versión de la tabla y elimina sus entradas"""
+        with self._lock:
+            self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+            for clave in [c for c in self._entradas if c[0] == tabla]:
+                del self._entradas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        """Contadores de aciertos/fallos para verificar el uso de la caché.
+
+        `agrupadas` cuenta las peticiones que esperaron a una consulta
+        idéntica en curso en lugar de lanzar la suya.
+        """
+        with self._lock:
+            total = self.aciertos + self.fallos + self.agrupadas
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'agrupadas': self.agrupadas,
+                'entradas': len(self._entradas),
+                'versiones': dict(self._versiones),
+                'tasa_aciertos': (self.aciertos + self.agrupadas) / total if total else 0.0
+            }
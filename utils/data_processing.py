@@ -1,45 +1,46 @@
 import pandas as pd
 from utils.error_handler import ErrorHandler
+from utils.validators import ValidadorRegistros
 
-def validate_mercancia_fields(registro):
-    if registro.get('categoria') == 'mercancía':
-        errors = []
-        if not registro.get('cantidad'):
-            errors.append("Cantidad es obligatoria para mercancía")
-        if not registro.get('unidad_medida'):
-            errors.append("Unidad de medida es obligatoria para mercancía")
-        return errors
-    return []
+# Campos cuyo formato se revisa en cada edición de la tabla
+CAMPOS_EDICION = ['fecha', 'monto', 'cantidad', 'unidad_medida']
+
+def convertir_registros(edited_df: pd.DataFrame) -> list[dict]:
+    """Normaliza fecha (texto ISO) y monto (float) por columnas y serializa a dicts"""
+    df = edited_df.replace({pd.NA: None})
+
+    # Conversión por columnas; los valores inválidos se conservan para mostrarlos
+    if 'fecha' in df.columns:
+        fechas = ValidadorRegistros.parsear_fechas(df['fecha'])
+        df['fecha'] = fechas.dt.strftime("%Y-%m-%d").astype(object).where(fechas.notna(), df['fecha'])
+    if 'monto' in df.columns:
+        montos = pd.to_numeric(df['monto'], errors="coerce")
+        df['monto'] = montos.astype(object).where(montos.notna(), df['monto'])
+
+    return df.to_dict('records')
+
+def mostrar_errores_edicion(edited_df: pd.DataFrame):
+    """Valida la tabla en una pasada y muestra un aviso por cada fila con errores"""
+    errores = ValidadorRegistros.validar_dataframe(edited_df)
+    errores = errores[errores['campo'].isin(CAMPOS_EDICION)]
+    if errores.empty:
+        return
+
+    errores_por_fila = ValidadorRegistros.agrupar_errores(errores)
+    filas = convertir_registros(edited_df.iloc[list(errores_por_fila)])
+
+    for registro, mensajes in zip(filas, errores_por_fila.values()):
+        identificador = (
+            f"Producto: '{registro.get('producto', 'N/A')}' | "
+            f"Fecha: {registro.get('fecha', 'N/A')} | "
+            f"Categoría: {registro.get('categoria', 'N/A')}"
+        )
+        ErrorHandler.display_validation_errors(
+            errors=mensajes,
+            context=f"procesamiento de datos - {identificador}"
+        )
 
 def procesar_dataframe_editado(edited_df: pd.DataFrame) -> list[dict]:
-    edited_data = edited_df.replace({pd.NA: None}).to_dict('records')
-    
-    for registro in edited_data:
-        try:
-            if 'fecha' in registro:
-                registro['fecha'] = pd.to_datetime(registro['fecha']).strftime("%Y-%m-%d")
-            
-            monto = registro.get('monto')
-            if monto is None or (isinstance(monto, str) and monto.strip() == ''):
-                raise ValueError("El campo 'monto' no puede estar vacío")
-            registro['monto'] = float(monto)  # Conversión después de validar
-
-            # Para mercancías
-            mercancia_errors = validate_mercancia_fields(registro)
-            if mercancia_errors:
-                raise ValueError("\n".join(mercancia_errors))
-        
-        except ValueError as e:
-            identificador = (
-                f"Producto: '{registro.get('producto', 'N/A')}' | "
-                f"Fecha: {registro.get('fecha', 'N/A')} | "
-                f"Categoría: {registro.get('categoria', 'N/A')}"
-            )
-            ErrorHandler.display_validation_errors(
-                errors=[str(e)], 
-                context=f"procesamiento de datos - {identificador}"
-            )
-    
+    edited_data = convertir_registros(edited_df)
+    mostrar_errores_edicion(edited_df)
     return edited_data
-
- 
\ No newline at end of file
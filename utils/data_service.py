@@ -1,40 +1,503 @@
+import contextvars
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from modules.database import DatabaseManager 
+from utils.cache_consultas import CacheConsultas
+from utils.esquemas import tipar_dataframe
+from utils.instrumentacion import instrumentar
+
+# Marca los hilos del pool para no anidar tareas concurrentes (evita bloqueos)
+_hilo_pool = threading.local()
 
 class DataService:
-    def __init__(self,db_manager: DatabaseManager):
+    # Orden de las tablas al combinar resultados de compras y gastos
+    TABLAS_REGISTROS = ("compras", "gastos")
+
+    def __init__(self,db_manager: DatabaseManager, cache_ttl: float = 300, cache_max_entradas: int = 128,
+                 max_hilos: int = 4, diario=None):
         self.db = db_manager
+        self.cache = CacheConsultas(ttl=cache_ttl, max_entradas=cache_max_entradas)
+        # Cualquier escritura vía execute_safe_operation sube la versión de la tabla
+        # afectada; las lecturas idénticas simultáneas se agrupan (obtener_o_calcular)
+        self.db.registrar_observador(self.cache.invalidar_tabla)
+        self.max_hilos = max_hilos
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Escritura diferida opcional (modules.diario_escritura); su hilo envía con _enviar_diferidos
+        self.diario = diario
+        if diario is not None:
+            diario.iniciar(self._enviar_diferidos)
+
+    def _ejecutor(self) -> ThreadPoolExecutor:
+        """Pool compartido por todas las sesiones; se crea en el primer uso"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_hilos, thread_name_prefix="data_service")
+            return self._pool
+
+    @staticmethod
+    def _en_contexto(tarea):
+        """Envuelve `tarea` para que corra en el pool con el contexto del llamador.
+
+        Copia las ContextVar (eventos de instrumentación del rerun) y el
+        contexto de Streamlit, de modo que st.error/st.warning de la capa de
+        datos siguen llegando a la sesión que hizo la petición.
+        """
+        contexto = contextvars.copy_context()
+        contexto_streamlit = get_script_run_ctx(suppress_warning=True)
+
+        def ejecutar():
+            add_script_run_ctx(ctx=contexto_streamlit)
+            _hilo_pool.activo = True
+            try:
+                return contexto.run(tarea)
+            finally:
+                _hilo_pool.activo = False
+                add_script_run_ctx(ctx=None)
+        return ejecutar
+
+    @instrumentar("servicio")
+    def ejecutar_concurrente(self, tareas: list) -> list:
+        """Ejecuta funciones independientes (sin argumentos) en el pool acotado.
+
+        Devuelve los resultados en el mismo orden que `tareas`; si alguna
+        falla se propaga la excepción de la primera en ese orden. Dentro de
+        una tarea del pool las llamadas anidadas se ejecutan en serie.
+        """
+        if len(tareas) <= 1 or self.max_hilos <= 1 or getattr(_hilo_pool, "activo", False):
+            return [tarea() for tarea in tareas]
+
+        ejecutor = self._ejecutor()
+        futuros = [ejecutor.submit(self._en_contexto(tarea)) for tarea in tareas]
+        return [futuro.result() for futuro in futuros]
+
+    def obtener_registros_varios(self, consultas: list[tuple[str, dict]], columnas: list[str] = None) -> list[list]:
+        """`obtener_registros` para varias (tipo, filtros) a la vez, en el orden recibido"""
+        return self.ejecutar_concurrente([
+            lambda tipo=tipo, filtros=filtros: self.obtener_registros(tipo, filtros, columnas)
+            for tipo, filtros in consultas
+        ])
+
+    @instrumentar("servicio")
+    def obtener_registros_todas(self, filtros: dict, columnas: list[str] = None) -> list[dict]:
+        """Registros de compras y gastos consultados en paralelo.
+
+        Cada registro lleva su `tabla` (los ids se repiten entre tablas) y la
+        combinación sigue el orden (fecha, tabla, id) de forma determinista.
+        """
+        resultados = self.obtener_registros_varios(
+            [("mercancía", filtros), ("gastos", filtros)], columnas
+        )
+        por_tabla = [
+            [{**reg, 'tabla': tabla} for reg in registros]
+            for tabla, registros in zip(self.TABLAS_REGISTROS, resultados)
+        ]
+        return list(heapq.merge(
+            *por_tabla,
+            key=lambda reg: (str(reg['fecha']), self.TABLAS_REGISTROS.index(reg['tabla']), reg['id'])
+        ))
+
+    @staticmethod
+    def _clave_consulta(tabla: str, filtros: dict, columnas: list[str] = None) -> tuple:
+        """Normaliza los filtros para que consultas equivalentes compartan entrada.
+
+        `producto` busca por subcadena; `producto_clave` filtra por igualdad
+        exacta sobre la clave normalizada (indexada).
+        """
+        producto = (filtros.get("producto") or "").strip().lower()
+        return (
+            tabla,
+            filtros.get("fecha_inicio") or None,
+            filtros.get("fecha_fin") or None,
+            producto or None,
+            tuple(columnas) if columnas else None,
+            filtros.get("producto_clave") or None
+        )
+
+    @staticmethod
+    def _seleccion(columnas: list[str] = None) -> str:
+        """Proyección de columnas; `fecha` e `id` se incluyen siempre porque
+        forman el cursor de paginación"""
+        if not columnas:
+            return "*"
+        return ",".join(dict.fromkeys([*columnas, "fecha", "id"]))
         
-    def obtener_registros(self, tipo: str, filtros: dict) -> list:
-        """Obtiene registros filtrados por tipo (compras/gastos)"""
+    @instrumentar("servicio")
+    def obtener_registros(self, tipo: str, filtros: dict, columnas: list[str] = None) -> list:
+        """Obtiene registros filtrados por tipo (compras/gastos).
+
+        `columnas` limita la proyección a las columnas indicadas.
+        """
         tabla = "compras" if tipo.lower() == "mercancía" else "gastos" 
-        query = self.db.client.table(tabla).select("*")
-        
-        # Aplicar filtros
-        if filtros.get("fecha_inicio"):
-            query = query.gte("fecha", filtros["fecha_inicio"])
-        if filtros.get("fecha_fin"):
-            query = query.lte("fecha", filtros["fecha_fin"])
-        if filtros.get("producto"):
-            query = query.ilike("producto", f"%{filtros['producto']}%")
-    
-        return query.execute().data
+        clave = self._clave_consulta(tabla, filtros, columnas)
+
+        # Se pagina para no quedar truncados por el max-rows de PostgREST
+        datos = self.cache.obtener_o_calcular(clave, lambda: [
+            reg for pagina in self.iterar_registros(tipo, filtros, columnas=columnas) for reg in pagina
+        ])
+        # Copias para que los llamadores no alteren la entrada cacheada
+        return [dict(reg) for reg in datos]
+
+    @instrumentar("servicio")
+    def obtener_dataframe(self, tipo: str, filtros: dict, columnas: list[str] = None) -> pd.DataFrame:
+        """Obtiene los registros como DataFrame tipado (ver utils.esquemas).
+
+        Los montos llegan como float, `fecha` como datetime y las columnas de
+        texto repetitivo como categóricas. El DataFrame tipado se cachea para
+        no repetir la conversión en cada rerun.
+        """
+        tabla = "compras" if tipo.lower() == "mercancía" else "gastos"
+        clave = self._clave_consulta(tabla, filtros, columnas) + ("dataframe",)
+
+        def construir():
+            df = pd.DataFrame(self.obtener_registros(tipo, filtros, columnas=columnas))
+            if columnas and not df.empty:
+                df = df[list(dict.fromkeys([*columnas, "fecha", "id"]))]
+            return tipar_dataframe(df, tabla)
+
+        return self.cache.obtener_o_calcular(clave, construir).copy()
+
+    def iterar_registros(self, tipo: str, filtros: dict, tamano_pagina: int = 1000, columnas: list[str] = None):
+        """Genera páginas de registros ordenadas por (fecha, id).
+
+        Usa paginación por cursor sobre (fecha, id) en lugar de offsets, de
+        modo que cada página cuesta lo mismo sin importar su posición.
+        Termina con la primera página vacía y no con una incompleta: si
+        `tamano_pagina` supera el max-rows de PostgREST, las páginas llegan
+        recortadas sin que falten registros.
+        """
+        tabla = "compras" if tipo.lower() == "mercancía" else "gastos"
+        clave = self._clave_consulta(tabla, filtros)
+        ultimo = None
+
+        while True:
+            pagina = self._consulta_pagina(tabla, clave, columnas, ultimo, tamano_pagina).execute().data
+            if not pagina:
+                return
+
+            yield pagina
+            ultimo = (pagina[-1]["fecha"], pagina[-1]["id"])
+
+    @staticmethod
+    def _aplicar_filtros(query, clave: tuple):
+        """Aplica a `query` los filtros normalizados por `_clave_consulta`"""
+        if clave[1]:
+            query = query.gte("fecha", clave[1])
+        if clave[2]:
+            query = query.lte("fecha", clave[2])
+        if clave[3]:
+            query = query.ilike("producto", f"%{clave[3]}%")
+        if clave[5]:
+            query = query.eq("producto_clave", clave[5])
+        return query
+
+    def _consulta_pagina(self, tabla: str, clave: tuple, columnas: list[str], ultimo: tuple, tamano_pagina: int):
+        """Consulta de una página de `iterar_registros` (sin ejecutar)"""
+        query = self._aplicar_filtros(self.db.client.table(tabla).select(self._seleccion(columnas)), clave)
+
+        # Continuar después del último (fecha, id) recibido
+        if ultimo:
+            fecha, reg_id = ultimo
+            query = query.or_(f"fecha.gt.{fecha},and(fecha.eq.{fecha},id.gt.{reg_id})")
+
+        return query.order("fecha").order("id").range(0, tamano_pagina - 1)
+
+    @instrumentar("servicio")
+    def contar_registros(self, tipo: str, filtros: dict) -> int:
+        """Total de registros del filtro sin descargarlos (COUNT en el servidor)"""
+        tabla = "compras" if tipo.lower() == "mercancía" else "gastos"
+        clave = self._clave_consulta(tabla, filtros) + ("conteo",)
+
+        return self.cache.obtener_o_calcular(clave, lambda: self._aplicar_filtros(
+            self.db.client.table(tabla).select("id", count="exact", head=True), clave
+        ).execute().count or 0)
+
+    @instrumentar("servicio")
+    def obtener_pagina(self, tipo: str, filtros: dict, cursor: tuple = None, tamano_pagina: int = 100,
+                       columnas: list[str] = None) -> tuple[list, tuple]:
+        """Una página de registros ordenada por (fecha, id) que empieza tras `cursor`.
+
+        Devuelve (registros, siguiente_cursor); `siguiente_cursor` es None en
+        la última página. Cada página se cachea por separado, así que volver
+        a una ya vista no consulta la base de datos.
+        """
+        tabla = "compras" if tipo.lower() == "mercancía" else "gastos"
+        clave = self._clave_consulta(tabla, filtros, columnas)
+        clave_pagina = clave + ("pagina", cursor, tamano_pagina)
+
+        def consultar():
+            # Se pide una fila de más para saber si hay página siguiente
+            datos = self._consulta_pagina(tabla, clave, columnas, cursor, tamano_pagina + 1).execute().data
+            return datos[:tamano_pagina], len(datos) > tamano_pagina
+
+        registros, hay_mas = self.cache.obtener_o_calcular(clave_pagina, consultar)
+        siguiente = (registros[-1]["fecha"], registros[-1]["id"]) if hay_mas else None
+        return [dict(reg) for reg in registros], siguiente
+
+    def iterar_dataframes(self, tipo: str, filtros: dict, tamano_pagina: int = 1000, columnas: list[str] = None):
+        """Igual que `iterar_registros` pero cada página llega como DataFrame
+        tipado, lista para `pd.concat` o para agregaciones incrementales.
 
+        Las categorías de cada página son independientes; tras un `pd.concat`
+        esas columnas vuelven a ser object salvo que se unifiquen.
+        """
+        tabla = "compras" if tipo.lower() == "mercancía" else "gastos"
+        for pagina in self.iterar_registros(tipo, filtros, tamano_pagina, columnas=columnas):
+            yield tipar_dataframe(pd.DataFrame(pagina), tabla)
+
+    @instrumentar("servicio")
     def guardar_registro(self, tipo: str, datos: dict):
         return self.db.execute_safe_operation(
             operation='insert',
             table="compras" if tipo == "mercancía" else "gastos",
             data=datos
         )
-    
+
+    @instrumentar("servicio")
+    def guardar_registros(self, registros: list[tuple[str, dict]]) -> dict:
+        """Inserta varios registros agrupados por tabla en bloques multi-fila.
+
+        `registros` es una lista de tuplas (tabla, datos). Los errores se
+        devuelven con la posición original de cada fila en la lista.
+        """
+        por_tabla = {}
+        for posicion, (tabla, datos) in enumerate(registros):
+            por_tabla.setdefault(tabla, []).append((posicion, self._resolver_alias(datos)))
+
+        insertados = 0
+        errores = []
+        for tabla, filas in por_tabla.items():
+            resultado = self.db.execute_safe_operation(
+                operation='bulk_insert',
+                table=tabla,
+                data=[datos for _, datos in filas]
+            )
+            insertados += len(resultado['insertados'])
+            for error in resultado['errores']:
+                errores.append({
+                    'indice': filas[error['indice']][0],
+                    'tabla': tabla,
+                    'error': error['error']
+                })
+
+        errores.sort(key=lambda e: e['indice'])
+        return {'insertados': insertados, 'errores': errores}
+
+    @instrumentar("servicio")
+    def guardar_registros_idempotentes(self, registros: list[tuple[str, dict]]) -> dict:
+        """Como `guardar_registros`, pero ignorando las filas cuya `clave_idempotencia` ya existe.
+
+        Usa `insertar_idempotente` por tabla; si un bloque falla se reintenta
+        fila a fila para aislar las filas rechazadas. Devuelve también las
+        filas omitidas por estar ya guardadas.
+        """
+        por_tabla = {}
+        for posicion, (tabla, datos) in enumerate(registros):
+            por_tabla.setdefault(tabla, []).append((posicion, self._resolver_alias(datos)))
+
+        insertados = 0
+        errores = []
+        for tabla, filas in por_tabla.items():
+            try:
+                insertados += len(self.db.insertar_idempotente(tabla, [datos for _, datos in filas]))
+                continue
+            except Exception:
+                pass
+
+            for posicion, datos in filas:
+                try:
+                    insertados += len(self.db.insertar_idempotente(tabla, [datos]))
+                except Exception as e:
+                    errores.append({'indice': posicion, 'tabla': tabla, 'error': str(e)})
+
+        errores.sort(key=lambda e: e['indice'])
+        return {'insertados': insertados, 'omitidos': len(registros) - insertados - len(errores), 'errores': errores}
+
+    @instrumentar("servicio")
+    def encolar_registros(self, registros: list[tuple[str, dict]]) -> int:
+        """Guarda (tabla, datos) en el diario local sin esperar a la base de datos"""
+        return self.diario.encolar(registros)
+
+    def _enviar_diferidos(self, tabla: str, registros: list[dict]) -> list[dict]:
+        """Envío de un lote del diario (corre en su hilo, fuera de cualquier rerun)"""
+        return self.db.insertar_idempotente(tabla, [self._resolver_alias(datos) for datos in registros])
+
+    @instrumentar("servicio")
+    def aplicar_cambios(self, actualizaciones: list[dict], eliminaciones: list[dict]) -> dict:
+        """Aplica actualizaciones y eliminaciones en bloque, agrupadas por tabla.
+
+        `actualizaciones` contiene dicts {'tabla', 'id', 'datos'} con la fila
+        completa a escribir; `eliminaciones` contiene dicts {'tabla', 'id'}.
+        """
+        actualizaciones_por_tabla = {}
+        for cambio in actualizaciones:
+            actualizaciones_por_tabla.setdefault(cambio['tabla'], []).append(
+                {**self._resolver_alias(cambio['datos']), 'id': cambio['id']}
+            )
+
+        eliminaciones_por_tabla = {}
+        for eliminacion in eliminaciones:
+            eliminaciones_por_tabla.setdefault(eliminacion['tabla'], []).append(eliminacion['id'])
+
+        actualizados = 0
+        faltantes = []
+        for tabla, registros in actualizaciones_por_tabla.items():
+            resultado = self.db.execute_safe_operation(
+                operation='bulk_update',
+                table=tabla,
+                data=registros
+            )
+            actualizados += len(resultado['actualizados'])
+            # Borrados por otra sesión mientras se editaban: no se recrean
+            faltantes.extend({'tabla': tabla, 'id': reg_id} for reg_id in resultado['faltantes'])
+
+        eliminados = 0
+        for tabla, ids in eliminaciones_por_tabla.items():
+            resultado = self.db.execute_safe_operation(
+                operation='bulk_delete',
+                table=tabla,
+                record_id=ids
+            )
+            eliminados += len(resultado['eliminados'])
+            faltantes.extend({'tabla': tabla, 'id': reg_id} for reg_id in resultado['faltantes'])
+
+        return {'actualizados': actualizados, 'eliminados': eliminados, 'faltantes': faltantes}
+
+    @instrumentar("servicio")
+    def obtener_dias_importados(self, tamano_pagina: int = 1000) -> set[str]:
+        """Fechas (ISO) de ventas ya importadas desde el POS"""
+        def consultar():
+            dias = []
+            while True:
+                query = self.db.client.table("ventas_importaciones").select("fecha").order("fecha")
+                if dias:
+                    query = query.gt("fecha", dias[-1])
+                pagina = [str(fila["fecha"])[:10] for fila in query.limit(tamano_pagina).execute().data]
+                dias.extend(pagina)
+                if len(pagina) < tamano_pagina:
+                    return frozenset(dias)
+
+        return set(self.cache.obtener_o_calcular(("ventas_importaciones",), consultar))
+
+    @instrumentar("servicio")
+    def guardar_ventas(self, registros: list[dict]) -> dict:
+        """Inserta líneas de venta en bloques multi-fila (ver safe_insert_lote)"""
+        return self.db.execute_safe_operation(operation='bulk_insert', table="ventas", data=registros)
+
+    @instrumentar("servicio")
+    def eliminar_ventas_dias(self, fechas: list[str]) -> int:
+        """Borra las ventas de los días indicados; devuelve las filas eliminadas"""
+        if not fechas:
+            return 0
+        resultado = self.db.execute_safe_operation(operation='delete_by_fecha', table="ventas", record_id=fechas)
+        return len(resultado['eliminados'])
+
+    @instrumentar("servicio")
+    def registrar_importacion(self, filas_por_dia: dict, archivo: str) -> dict:
+        """Marca los días como importados con el número de líneas de cada uno"""
+        return self.db.execute_safe_operation(
+            operation='bulk_insert',
+            table="ventas_importaciones",
+            data=[
+                {'fecha': fecha, 'archivo': archivo, 'filas': int(filas)}
+                for fecha, filas in sorted(filas_por_dia.items())
+            ]
+        )
+
+    def obtener_catalogo_productos(self) -> list[dict]:
+        """Catálogo de productos con fecha de última compra y número de compras.
+
+        Se lee de la tabla `catalogo_productos`, que mantiene un trigger sobre
+        compras, así que el coste no depende del histórico. Se cachea bajo la
+        tabla compras para invalidarse con cada escritura en ella.
+        """
+        return self.cache.obtener_o_calcular(("compras", "catalogo_productos"), lambda: (
+            self.db.client.table("catalogo_productos")
+            .select("producto_clave,producto,ultima_compra,num_compras")
+            .order("producto_clave")
+            .execute().data
+        ))
+
+    @instrumentar("servicio")
+    def obtener_agregado_precios(self, producto_clave: str, fecha_inicio: str, fecha_fin: str, intervalo: str = None) -> list[dict]:
+        """Sumas de monto/cantidad, conteo y precio unitario mínimo/máximo
+        calculados en Postgres (RPC `precio_ponderado_agregado`).
+
+        `intervalo` ('day', 'week' o 'month') agrupa por periodo; sin él se
+        devuelve una única fila con el total del rango.
+        """
+        clave = ("compras", "precio_ponderado_agregado", producto_clave, fecha_inicio, fecha_fin, intervalo)
+        return self.cache.obtener_o_calcular(clave, lambda: self.db.client.rpc("precio_ponderado_agregado", params={
+            "p_producto_clave": producto_clave,
+            "p_fecha_inicio": fecha_inicio,
+            "p_fecha_fin": fecha_fin,
+            "p_intervalo": intervalo
+        }).execute().data)
+
+    @instrumentar("servicio")
+    def obtener_rollup_compras(self, producto_clave: str, mes_inicio: str, mes_fin: str) -> list[dict]:
+        """Filas de `compras_rollup` del producto entre dos meses (ambos incluidos)"""
+        clave = ("compras", "compras_rollup", producto_clave, mes_inicio, mes_fin)
+        return self.cache.obtener_o_calcular(clave, lambda: (
+            self.db.client.table("compras_rollup")
+            .select("mes,sum_monto,sum_cantidad,n")
+            .eq("producto_clave", producto_clave)
+            .gte("mes", mes_inicio)
+            .lte("mes", mes_fin)
+            .execute().data
+        ))
+
+    @instrumentar("servicio")
+    def obtener_ventas_agregadas(self, fecha_inicio: str, fecha_fin: str, intervalo: str = None,
+                                 dimension: str = None, grupo: str = None) -> list[dict]:
+        """Ingresos, unidades y líneas por periodo y dimensión desde `ventas_diarias`.
+
+        La agrupación se hace en el servidor (RPC `ventas_agregadas`), así que
+        solo llega la serie agregada. `dimension` es 'grupo', 'nombre',
+        'entidad', 'cliente' o None para el total; `grupo` restringe a un grupo.
+        """
+        clave = ("ventas", "ventas_agregadas", fecha_inicio, fecha_fin, intervalo, dimension, grupo)
+        return self.cache.obtener_o_calcular(clave, lambda: self.db.client.rpc("ventas_agregadas", params={
+            "p_fecha_inicio": fecha_inicio,
+            "p_fecha_fin": fecha_fin,
+            "p_intervalo": intervalo,
+            "p_dimension": dimension,
+            "p_grupo": grupo
+        }).execute().data)
+
+    def obtener_alias(self) -> dict:
+        """Mapa alias_clave -> producto_clave canónica (cacheado)"""
+        return self.cache.obtener_o_calcular(("producto_alias",), lambda: {
+            fila["alias_clave"]: fila["producto_clave"]
+            for fila in self.db.client.table("producto_alias").select("alias_clave,producto_clave").execute().data
+        })
+
+    def _resolver_alias(self, datos: dict) -> dict:
+        """Sustituye la clave de producto por su canónica si es un alias"""
+        producto_clave = datos.get("producto_clave")
+        if not producto_clave:
+            return datos
+        canonica = self.obtener_alias().get(producto_clave)
+        return {**datos, "producto_clave": canonica} if canonica else datos
+
+    def registrar_alias(self, alias_claves: list[str], producto_clave: str) -> int:
+        """Une `alias_claves` bajo `producto_clave` (ver DatabaseManager.unir_productos)"""
+        if not alias_claves or any(not alias or alias == producto_clave for alias in alias_claves):
+            raise ValueError("Los alias deben ser distintos del producto destino")
+
+        # Mantener la tabla plana: si el destino ya es un alias se usa su canónica
+        canonica = self.obtener_alias().get(producto_clave, producto_clave)
+        if canonica in alias_claves:
+            raise ValueError("El producto destino no puede unirse a sí mismo")
+        return self.db.unir_productos(list(dict.fromkeys(alias_claves)), canonica)
+
     def obtener_productos(self):
         """Obtiene lista única de productos registrados"""
         try:
-            # Consultar productos distintos
-            response = self.db.client.table("compras").select("producto").execute()
-            productos = list({item["producto"] for item in response.data if item["producto"]})
-            return sorted(productos)
+            return [item["producto"] for item in self.obtener_catalogo_productos()]
         except Exception as e:
             print(f"Error obteniendo productos: {str(e)}")
             return []
-        
-        
\ No newline at end of file
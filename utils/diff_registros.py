@@ -0,0 +1,74 @@
+import pandas as pd
+
+
+def calcular_diff(originales: pd.DataFrame, editados: pd.DataFrame, clave: str = None,
+                  campos: list[str] = None, normalizadores: dict = None) -> dict:
+    """Compara dos versiones de una tabla emparejando filas por clave.
+
+    Con `clave=None` se usa el índice del DataFrame (filas sin id, como los
+    registros temporales). El emparejamiento es un hash join sobre la clave,
+    así que el trabajo por fila solo se hace para las filas que cambiaron.
+    `normalizadores` permite unificar tipos por campo antes de comparar
+    (p. ej. fechas en texto frente a datetime).
+
+    Devuelve un dict con:
+        - 'insertados': DataFrame con las filas nuevas (sin clave o con clave desconocida)
+        - 'actualizados': {clave: {campo: valor_editado}} solo con los campos cambiados
+        - 'eliminados': lista de claves que ya no están en `editados`
+    """
+    normalizadores = normalizadores or {}
+
+    if clave is None:
+        orig = originales
+        edit = editados
+        sin_clave = editados.iloc[0:0]
+    else:
+        orig = originales.set_index(clave)
+        con_clave = editados[clave].notna()
+        sin_clave = editados[~con_clave]
+        edit = editados[con_clave].set_index(clave)
+        if pd.api.types.is_integer_dtype(orig.index) and not pd.api.types.is_integer_dtype(edit.index):
+            # El editor convierte los ids a float cuando hay filas nuevas sin id
+            edit.index = edit.index.astype(orig.index.dtype)
+
+    eliminados = orig.index.difference(edit.index)
+    nuevos = edit.index.difference(orig.index)
+    comunes = orig.index.intersection(edit.index)
+
+    if campos is None:
+        campos = [c for c in orig.columns if c in edit.columns and c != clave]
+    else:
+        campos = [c for c in campos if c in orig.columns and c in edit.columns]
+
+    antes = orig.loc[comunes, campos].astype(object)
+    despues = edit.loc[comunes, campos].astype(object)
+    valores = despues.copy()
+
+    for campo, normalizar in normalizadores.items():
+        if campo in campos:
+            antes[campo] = normalizar(antes[campo]).astype(object)
+            despues[campo] = normalizar(despues[campo]).astype(object)
+
+    iguales = (antes == despues) | (antes.isna() & despues.isna())
+    distintos = ~iguales
+    filas_cambiadas = distintos.any(axis=1)
+
+    actualizados = {}
+    for reg_clave, mascara in distintos[filas_cambiadas].iterrows():
+        actualizados[reg_clave] = {
+            campo: valores.at[reg_clave, campo] for campo in campos if mascara[campo]
+        }
+
+    insertados = edit.loc[nuevos]
+    if clave is not None:
+        insertados = pd.concat([sin_clave, insertados.reset_index()], ignore_index=True)
+
+    return {
+        'insertados': insertados,
+        'actualizados': actualizados,
+        'eliminados': list(eliminados)
+    }
+
+
+def hay_cambios(diff: dict) -> bool:
+    return bool(len(diff['insertados']) or diff['actualizados'] or diff['eliminados'])
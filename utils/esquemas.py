@@ -0,0 +1,40 @@
+import pandas as pd
+
+# Tipos de las columnas tal como se definen en las migraciones (modules/migraciones).
+# PostgREST devuelve NUMERIC como texto/decimal y DATE como cadena ISO, por
+# lo que se convierten una sola vez al construir el DataFrame.
+ESQUEMAS = {
+    "compras": {
+        "numericas": ["monto", "cantidad"],
+        "fechas": ["fecha"],
+        "categoricas": ["categoria", "producto", "unidad_medida"]
+    },
+    "gastos": {
+        "numericas": ["monto"],
+        "fechas": ["fecha"],
+        "categoricas": ["categoria", "producto"]
+    },
+    "ventas": {
+        "numericas": ["cantidad", "venta"],
+        "fechas": ["fecha"],
+        "categoricas": ["grupo", "nombre", "entidad", "cliente"]
+    }
+}
+
+
+def tipar_dataframe(df: pd.DataFrame, tabla: str) -> pd.DataFrame:
+    """Aplica el esquema de la tabla a las columnas presentes en el DataFrame"""
+    esquema = ESQUEMAS.get(tabla)
+    if esquema is None or df.empty:
+        return df
+
+    for columna in esquema["numericas"]:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors="coerce").astype("float64")
+    for columna in esquema["fechas"]:
+        if columna in df.columns:
+            df[columna] = pd.to_datetime(df[columna])
+    for columna in esquema["categoricas"]:
+        if columna in df.columns:
+            df[columna] = df[columna].astype("category")
+    return df
@@ -0,0 +1,80 @@
+import io
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.esquemas import ESQUEMAS
+
+# Formato -> (extensión, tipo MIME)
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+
+def _tipo_arrow(tabla: str, columna: str, serie: pd.Series) -> pa.DataType:
+    """Tipo Parquet de una columna según el esquema de la tabla"""
+    esquema = ESQUEMAS.get(tabla, {})
+    if columna in esquema.get("fechas", ()):
+        return pa.date32()
+    if columna in esquema.get("numericas", ()):
+        return pa.float64()
+    if columna == "id":
+        return pa.int64()
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def escribir_csv(paginas, destino) -> int:
+    """Escribe las páginas (DataFrames) una tras otra; solo la primera lleva encabezado"""
+    filas = 0
+    for pagina in paginas:
+        pagina.to_csv(destino, header=filas == 0, index=False, date_format="%Y-%m-%d", lineterminator="\n")
+        filas += len(pagina)
+    return filas
+
+
+def escribir_parquet(paginas, destino, tabla: str) -> int:
+    """Escribe cada página como un row group con el esquema fijado por la primera.
+
+    Las categóricas de cada página son independientes, así que se escriben
+    como texto (Parquet las codifica por diccionario igualmente).
+    """
+    escritor = None
+    esquema = None
+    filas = 0
+    try:
+        for pagina in paginas:
+            if escritor is None:
+                esquema = pa.schema([
+                    (columna, _tipo_arrow(tabla, columna, pagina[columna])) for columna in pagina.columns
+                ])
+                escritor = pq.ParquetWriter(destino, esquema, compression="zstd")
+            pagina = pagina.reindex(columns=esquema.names)
+            escritor.write_table(pa.Table.from_pandas(pagina, schema=esquema, preserve_index=False))
+            filas += len(pagina)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+
+def exportar(paginas, formato: str, tabla: str):
+    """Vuelca las páginas a un archivo temporal en disco.
+
+    Devuelve (archivo, filas) con el archivo posicionado al inicio, listo
+    para `st.download_button`; en memoria solo hay una página a la vez.
+    """
+    archivo = tempfile.TemporaryFile()
+    if formato == "Parquet":
+        filas = escribir_parquet(paginas, archivo, tabla)
+    else:
+        texto = io.TextIOWrapper(archivo, encoding="utf-8", newline="")
+        filas = escribir_csv(paginas, texto)
+        texto.flush()
+        texto.detach()
+    archivo.seek(0)
+    return archivo, filas
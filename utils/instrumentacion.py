@@ -0,0 +1,234 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+# Eventos del rerun en curso (cada rerun de Streamlit corre en su propio contexto)
+_eventos_rerun: ContextVar = ContextVar("eventos_rerun", default=None)
+_padre: ContextVar = ContextVar("evento_padre", default=None)
+_inicio_rerun: ContextVar = ContextVar("inicio_rerun", default=None)
+
+
+class Evento:
+    """Medición de una llamada: tiempo de pared, filas y bytes aproximados"""
+    __slots__ = ("nombre", "capa", "padre", "nivel", "inicio", "duracion", "filas", "bytes")
+
+    def __init__(self, nombre: str, capa: str, padre: "Evento" = None):
+        self.nombre = nombre
+        self.capa = capa
+        self.padre = padre
+        self.nivel = padre.nivel + 1 if padre is not None else 0
+        self.inicio = time.perf_counter()
+        self.duracion = 0.0
+        self.filas = None
+        self.bytes = None
+
+    def registrar(self, resultado):
+        """Toma filas y bytes del resultado (lista, DataFrame o respuesta con `.data`)"""
+        self.filas, self.bytes = Instrumentacion.medir_resultado(resultado)
+        return resultado
+
+
+def _configurada() -> bool:
+    """INSTRUMENTACION activa las mediciones (variable de entorno o secreto); por defecto no"""
+    valor = os.environ.get("INSTRUMENTACION")
+    if valor is None:
+        try:
+            import streamlit as st
+            valor = st.secrets.get("INSTRUMENTACION", "")
+        except FileNotFoundError:
+            valor = ""
+    return str(valor).strip().lower() in ("1", "true", "si", "sí")
+
+
+class Instrumentacion:
+    """Registro de tiempos de las rutas calientes (base de datos, servicio y lógica).
+
+    Los eventos se guardan por rerun para el panel de la barra lateral y en
+    un historial acotado por nombre, compartido entre sesiones, del que se
+    calculan percentiles. Es opcional: solo se mide con `INSTRUMENTACION=1`
+    en el entorno o en los secretos; desactivada, las funciones decoradas
+    se llaman directamente.
+    """
+    activa = _configurada()
+    max_historial = 1000
+    _historial = {}
+    _importaciones = {}
+    _lock = threading.Lock()
+
+    # Filas de muestra usadas para estimar el tamaño de una lista de registros
+    MUESTRA_BYTES = 20
+
+    @staticmethod
+    def medir_resultado(resultado) -> tuple:
+        datos = getattr(resultado, "data", resultado)
+        # Sin pandas cargado no puede haber DataFrames (se evita importarlo al arrancar)
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(datos, pd.DataFrame):
+            return len(datos), int(datos.memory_usage(index=False).sum())
+        if not isinstance(datos, list):
+            return None, None
+        if not datos:
+            return 0, 0
+
+        muestra = datos[:Instrumentacion.MUESTRA_BYTES]
+        tamano_muestra = len(json.dumps(muestra, default=str).encode("utf-8"))
+        return len(datos), int(tamano_muestra * len(datos) / len(muestra))
+
+    @classmethod
+    def iniciar_rerun(cls):
+        """Empieza a acumular los eventos del rerun actual"""
+        if not cls.activa:
+            return
+        _eventos_rerun.set([])
+        _inicio_rerun.set(time.perf_counter())
+
+    @classmethod
+    def eventos_rerun(cls) -> list[Evento]:
+        return list(_eventos_rerun.get() or [])
+
+    @classmethod
+    def resumen_rerun(cls) -> tuple["pd.DataFrame", dict]:
+        """Eventos del rerun actual y tiempo propio acumulado por capa.
+
+        El tiempo propio de un evento descuenta el de las llamadas anidadas,
+        así que la suma por capa separa red, servicio y lógica. Lo que no
+        está instrumentado (render de Streamlit, UI) aparece como 'otros'.
+        Las llamadas concurrentes (DataService.ejecutar_concurrente) suman el
+        tiempo de cada hilo, así que sus capas pueden superar el total.
+        """
+        import pandas as pd
+
+        eventos = cls.eventos_rerun()
+        # Tiempo de los hijos directos de cada evento (None = raíz del rerun)
+        hijos_por_padre = {}
+        for evento in eventos:
+            clave = id(evento.padre) if evento.padre is not None else None
+            hijos_por_padre[clave] = hijos_por_padre.get(clave, 0.0) + evento.duracion
+
+        filas = []
+        for evento in eventos:
+            hijos = hijos_por_padre.get(id(evento), 0.0)
+            filas.append({
+                "nombre": "  " * evento.nivel + evento.nombre,
+                "capa": evento.capa,
+                "inicio": evento.inicio,
+                "ms": evento.duracion * 1000,
+                "ms_propio": max(evento.duracion - hijos, 0.0) * 1000,
+                "filas": evento.filas,
+                "KB": evento.bytes / 1024 if evento.bytes is not None else None
+            })
+
+        df = pd.DataFrame(filas, columns=["nombre", "capa", "inicio", "ms", "ms_propio", "filas", "KB"])
+        por_capa = df.groupby("capa")["ms_propio"].sum().to_dict() if not df.empty else {}
+
+        inicio = _inicio_rerun.get()
+        if inicio is not None:
+            total = (time.perf_counter() - inicio) * 1000
+            por_capa["otros"] = max(total - hijos_por_padre.get(None, 0.0) * 1000, 0.0)
+            por_capa["total"] = total
+
+        return df.sort_values("inicio").drop(columns="inicio"), por_capa
+
+    @classmethod
+    @contextmanager
+    def bloque(cls, nombre: str, capa: str = "db"):
+        """Mide el bloque `with`; usar `evento.registrar(resultado)` para contar filas"""
+        if not cls.activa:
+            yield Evento(nombre, capa)
+            return
+
+        evento = Evento(nombre, capa, _padre.get())
+        token = _padre.set(evento)
+        try:
+            yield evento
+        finally:
+            _padre.reset(token)
+            evento.duracion = time.perf_counter() - evento.inicio
+            cls._guardar(evento)
+
+    @classmethod
+    def _guardar(cls, evento: Evento):
+        eventos = _eventos_rerun.get()
+        if eventos is not None:
+            eventos.append(evento)
+        with cls._lock:
+            historial = cls._historial.get(evento.nombre)
+            if historial is None:
+                historial = cls._historial[evento.nombre] = deque(maxlen=cls.max_historial)
+            historial.append((evento.duracion, evento.filas, evento.bytes))
+
+    @classmethod
+    def percentiles(cls) -> dict:
+        """Percentiles de duración (s) y medias de filas/bytes por nombre"""
+        import numpy as np
+
+        with cls._lock:
+            historial = {nombre: list(valores) for nombre, valores in cls._historial.items()}
+
+        resumen = {}
+        for nombre, valores in historial.items():
+            duraciones = np.array([v[0] for v in valores])
+            filas = [v[1] for v in valores if v[1] is not None]
+            tamanos = [v[2] for v in valores if v[2] is not None]
+            p50, p95, p99 = np.percentile(duraciones, [50, 95, 99])
+            resumen[nombre] = {
+                "n": len(valores),
+                "p50_s": float(p50),
+                "p95_s": float(p95),
+                "p99_s": float(p99),
+                "max_s": float(duraciones.max()),
+                "filas_media": float(np.mean(filas)) if filas else None,
+                "bytes_media": float(np.mean(tamanos)) if tamanos else None
+            }
+        return resumen
+
+    @classmethod
+    def exportar_percentiles(cls, ruta=None) -> Path:
+        """Escribe los percentiles agregados en un archivo JSON local"""
+        ruta = Path(ruta or f"perfiles/percentiles_{datetime.now():%Y%m%d_%H%M%S}.json")
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_text(json.dumps({
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "percentiles": cls.percentiles()
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        return ruta
+
+    @classmethod
+    def registrar_importacion(cls, nombre: str, segundos: float):
+        """Guarda el tiempo de la primera importación (en frío) de un módulo o grupo"""
+        with cls._lock:
+            cls._importaciones.setdefault(nombre, segundos)
+
+    @classmethod
+    def importaciones(cls) -> dict:
+        """Nombre -> segundos de importación registrados en este proceso"""
+        with cls._lock:
+            return dict(cls._importaciones)
+
+    @classmethod
+    def limpiar(cls):
+        with cls._lock:
+            cls._historial.clear()
+
+
+def instrumentar(capa: str, nombre: str = None):
+    """Decorador que registra cada llamada con `Instrumentacion.bloque`"""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not Instrumentacion.activa:
+                return funcion(*args, **kwargs)
+            with Instrumentacion.bloque(etiqueta, capa) as evento:
+                return evento.registrar(funcion(*args, **kwargs))
+        return envoltura
+    return decorador
@@ -0,0 +1,151 @@
+import codecs
+import csv
+import hashlib
+import io
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+TAMANO_BLOQUE = 5000
+EXTENSIONES = ("csv", "txt", "xlsx")
+# Se prueban en orden; latin-1 decodifica cualquier byte y cierra la lista
+CODIFICACIONES = ("utf-8-sig", "cp1252", "latin-1")
+
+
+def normalizar_encabezado(nombre) -> str:
+    """'Número  Venta ' -> 'numero_venta' para emparejar columnas sin importar el formato"""
+    texto = unicodedata.normalize("NFKD", str(nombre))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return "_".join(texto.strip().lower().split())
+
+
+def _detectar_codificacion(archivo, tamano_lectura: int = 1 << 20) -> str:
+    """Primera codificación de CODIFICACIONES que decodifica todo el archivo sin errores.
+
+    Los exportes del POS suelen venir en cp1252: leerlos como UTF-8 con
+    reemplazo estropearía las tildes sin avisar.
+    """
+    for codificacion in CODIFICACIONES:
+        decodificador = codecs.getincrementaldecoder(codificacion)()
+        archivo.seek(0)
+        try:
+            while datos := archivo.read(tamano_lectura):
+                decodificador.decode(datos)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        finally:
+            archivo.seek(0)
+        return codificacion
+    return CODIFICACIONES[-1]
+
+
+def _detectar_separador(archivo, codificacion: str) -> str:
+    muestra = archivo.read(8192)
+    archivo.seek(0)
+    if isinstance(muestra, bytes):
+        # La muestra puede cortar un carácter multibyte al final
+        muestra = muestra.decode(codificacion, errors="ignore")
+    try:
+        return csv.Sniffer().sniff(muestra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _tamano(archivo) -> int:
+    posicion = archivo.tell()
+    archivo.seek(0, io.SEEK_END)
+    tamano = archivo.tell()
+    archivo.seek(posicion)
+    return tamano or 1
+
+
+def _bloques_csv(archivo, tamano_bloque: int):
+    codificacion = _detectar_codificacion(archivo)
+    separador = _detectar_separador(archivo, codificacion)
+    total = _tamano(archivo)
+    lector = pd.read_csv(
+        archivo,
+        sep=separador,
+        dtype=str,
+        chunksize=tamano_bloque,
+        skipinitialspace=True,
+        encoding=codificacion
+    )
+    with lector:
+        for bloque in lector:
+            # La posición del archivo avanza con el búfer del lector: progreso aproximado
+            yield bloque, min(archivo.tell() / total, 1.0)
+
+
+def _bloques_excel(archivo, tamano_bloque: int):
+    from openpyxl import load_workbook
+
+    # Modo solo lectura: las filas se recorren sin cargar la hoja entera en memoria
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        total = hoja.max_row or 0
+        filas = hoja.iter_rows(values_only=True)
+        encabezados = [str(c) if c is not None else f"columna_{i}" for i, c in enumerate(next(filas, []))]
+
+        leidas = 1
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            leidas += 1
+            if len(bloque) == tamano_bloque:
+                yield pd.DataFrame(bloque, columns=encabezados, dtype=object), (leidas / total if total else 0.0)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezados, dtype=object), 1.0
+    finally:
+        libro.close()
+
+
+def leer_por_bloques(archivo, nombre: str = None, tamano_bloque: int = TAMANO_BLOQUE):
+    """Lee un CSV o Excel en DataFrames de `tamano_bloque` filas.
+
+    `archivo` es una ruta o un objeto binario (p. ej. el de st.file_uploader).
+    Genera tuplas (bloque, progreso) con el progreso aproximado entre 0 y 1;
+    solo un bloque está en memoria a la vez. El CSV se lee como texto; la
+    codificación (UTF-8 o cp1252/latin-1) y el separador se detectan
+    automáticamente.
+    """
+    nombre = nombre or getattr(archivo, "name", None) or str(archivo)
+    extension = Path(nombre).suffix.lower().lstrip(".")
+    if extension not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: .{extension} (use CSV o Excel .xlsx)")
+
+    if isinstance(archivo, (str, Path)):
+        with open(archivo, "rb") as f:
+            yield from leer_por_bloques(f, nombre, tamano_bloque)
+        return
+
+    archivo.seek(0)
+    if extension == "xlsx":
+        yield from _bloques_excel(archivo, tamano_bloque)
+    else:
+        yield from _bloques_csv(archivo, tamano_bloque)
+
+
+def huella_archivo(archivo, tamano_lectura: int = 1 << 20) -> str:
+    """SHA-256 del contenido; identifica el mismo archivo aunque se suba con otro nombre"""
+    if isinstance(archivo, (str, Path)):
+        with open(archivo, "rb") as f:
+            return huella_archivo(f, tamano_lectura)
+
+    huella = hashlib.sha256()
+    archivo.seek(0)
+    while datos := archivo.read(tamano_lectura):
+        huella.update(datos)
+    archivo.seek(0)
+    return huella.hexdigest()
+
+
+def leer_encabezados(archivo, nombre: str = None) -> list[str]:
+    """Columnas del archivo leyendo solo el primer bloque"""
+    for bloque, _ in leer_por_bloques(archivo, nombre, tamano_bloque=1):
+        return list(bloque.columns)
+    return []
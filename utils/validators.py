@@ -1,4 +1,156 @@
+import re
+import unicodedata
+import pandas as pd
+
+_ESPACIOS = re.compile(r"\s+")
+# Bloques Unicode de marcas combinantes; la misma clase la usa normalizar_producto() en Postgres (m013)
+_MARCAS = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+
+
 class ValidadorRegistros:
+    # Valores admitidos por los CHECK de la tabla ventas
+    ENTIDADES_VENTA = ("restaurante", "domicilio")
+    CLIENTES_VENTA = ("clientes", "cuenta_casa")
+
+    @staticmethod
+    def _columna(df, nombre):
+        if nombre in df.columns:
+            return df[nombre]
+        return pd.Series(None, index=df.index, dtype=object)
+
+    @staticmethod
+    def _vacios(serie):
+        """Máscara de valores nulos o cadenas en blanco"""
+        return serie.isna() | serie.astype("string").str.strip().eq("").fillna(True)
+
+    @staticmethod
+    def _errores_por_reglas(filas: int, reglas: list) -> pd.DataFrame:
+        """DataFrame (fila, campo, mensaje) ordenado por fila a partir de (máscara, campo, mensaje)"""
+        posiciones = pd.RangeIndex(filas)
+        errores = [
+            pd.DataFrame({'fila': posiciones[mascara.to_numpy(dtype=bool)], 'campo': campo, 'mensaje': mensaje})
+            for mascara, campo, mensaje in reglas
+        ]
+        return (
+            pd.concat(errores, ignore_index=True)
+            .sort_values('fila', kind='stable')
+            .reset_index(drop=True)
+        )
+
+    @staticmethod
+    def parsear_fechas(serie):
+        """Convierte fechas (texto ISO, date o Timestamp) a datetime; inválidas -> NaT"""
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            return serie
+        return pd.to_datetime(serie, errors="coerce", format="ISO8601")
+
+    @staticmethod
+    def normalizar_producto(nombre):
+        """Clave de producto: NFKD, sin marcas combinantes, espacios colapsados y minúsculas.
+
+        Es la única definición de la clave: la versión vectorizada la aplica
+        fila a fila y la función normalizar_producto() de Postgres (m013)
+        sigue los mismos pasos (normalize NFKD, mismos bloques de marcas).
+        """
+        if nombre is None or pd.isna(nombre):
+            return None
+        texto = _MARCAS.sub("", unicodedata.normalize("NFKD", str(nombre)))
+        return _ESPACIOS.sub(" ", texto).strip().lower() or None
+
+    @staticmethod
+    def normalizar_productos(serie: pd.Series) -> pd.Series:
+        """`normalizar_producto` sobre una Serie (nulos -> None)"""
+        claves = serie.map(ValidadorRegistros.normalizar_producto, na_action="ignore")
+        return claves.astype(object).where(claves.notna(), None)
+
+    @staticmethod
+    def validar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+        """Valida todas las filas de una vez con máscaras por columna.
+
+        Aplica las mismas reglas que `validar_campos_comunes` y devuelve un
+        DataFrame ordenado con columnas (fila, campo, mensaje), donde `fila`
+        es la posición de la fila en `df`.
+        """
+        columna = lambda nombre: ValidadorRegistros._columna(df, nombre)
+        vacios = ValidadorRegistros._vacios
+
+        fecha = columna('fecha')
+        fecha_vacia = vacios(fecha)
+        fecha_invalida = ~fecha_vacia & ValidadorRegistros.parsear_fechas(fecha).isna()
+
+        monto = columna('monto')
+        monto_vacio = vacios(monto)
+        monto_num = pd.to_numeric(monto, errors="coerce")
+        monto_invalido = ~monto_vacio & monto_num.isna()
+
+        es_mercancia = columna('categoria').astype("string").eq("mercancía").fillna(False)
+        cantidad = columna('cantidad')
+        cantidad_vacia = es_mercancia & vacios(cantidad)
+        cantidad_num = pd.to_numeric(cantidad, errors="coerce")
+        cantidad_invalida = es_mercancia & ~cantidad_vacia & cantidad_num.isna()
+
+        reglas = [
+            (fecha_vacia, 'fecha', "**Fecha** no especificada"),
+            (fecha_invalida, 'fecha', "Formato de **fecha** inválido"),
+            (vacios(columna('categoria')), 'categoria', "**Categoría** es obligatoria"),
+            (vacios(columna('producto')), 'producto', "**Producto** no especificado"),
+            (monto_vacio, 'monto', "**Monto** no especificado"),
+            (monto_invalido, 'monto', "Formato de **monto** inválido"),
+            (monto_num.le(0).fillna(False), 'monto', "**Monto** debe ser mayor a $0"),
+            (cantidad_vacia, 'cantidad', "**Cantidad** no especificada"),
+            (cantidad_invalida, 'cantidad', "Formato de **cantidad** inválido"),
+            (es_mercancia & cantidad_num.le(0).fillna(False), 'cantidad', "**Cantidad** debe ser > 0"),
+            (es_mercancia & vacios(columna('unidad_medida')), 'unidad_medida', "**Unidad de medida** requerida"),
+        ]
+        return ValidadorRegistros._errores_por_reglas(len(df), reglas)
+
+    @staticmethod
+    def parsear_numeros(serie):
+        """Números en texto ('$ 12.5', '12,5') a float; inválidos -> NaN"""
+        if pd.api.types.is_numeric_dtype(serie):
+            return serie.astype("float64")
+        texto = serie.astype("string").str.replace(r"[$\s]", "", regex=True)
+        texto = texto.where(texto.str.contains(".", regex=False).fillna(True), texto.str.replace(",", ".", regex=False))
+        return pd.to_numeric(texto, errors="coerce").astype("float64")
+
+    @staticmethod
+    def validar_ventas(df: pd.DataFrame) -> pd.DataFrame:
+        """Valida un bloque de ventas con las reglas y CHECK de la tabla.
+
+        Espera `entidad` y `cliente` ya normalizados (minúsculas, sin
+        espacios). Devuelve un DataFrame (fila, campo, mensaje) como
+        `validar_dataframe`.
+        """
+        columna = lambda nombre: ValidadorRegistros._columna(df, nombre)
+        vacios = ValidadorRegistros._vacios
+
+        fecha = columna('fecha')
+        fecha_vacia = vacios(fecha)
+        cantidad = columna('cantidad')
+        cantidad_num = ValidadorRegistros.parsear_numeros(cantidad)
+        venta = columna('venta')
+        venta_num = ValidadorRegistros.parsear_numeros(venta)
+
+        reglas = [
+            (fecha_vacia, 'fecha', "**Fecha** no especificada"),
+            (~fecha_vacia & ValidadorRegistros.parsear_fechas(fecha).isna(), 'fecha', "Formato de **fecha** inválido"),
+            (vacios(columna('grupo')), 'grupo', "**Grupo** no especificado"),
+            (vacios(columna('nombre')), 'nombre', "**Nombre** no especificado"),
+            (cantidad_num.isna(), 'cantidad', "**Cantidad** vacía o inválida"),
+            ((cantidad_num % 1).ne(0) & cantidad_num.notna(), 'cantidad', "**Cantidad** debe ser un número entero"),
+            (venta_num.isna(), 'venta', "**Venta** vacía o inválida"),
+            (~columna('entidad').isin(ValidadorRegistros.ENTIDADES_VENTA), 'entidad',
+             f"**Entidad** debe ser {' o '.join(ValidadorRegistros.ENTIDADES_VENTA)}"),
+            (~columna('cliente').isin(ValidadorRegistros.CLIENTES_VENTA), 'cliente',
+             f"**Cliente** debe ser {' o '.join(ValidadorRegistros.CLIENTES_VENTA)}"),
+        ]
+        return ValidadorRegistros._errores_por_reglas(len(df), reglas)
+
+    @staticmethod
+    def agrupar_errores(errores: pd.DataFrame) -> dict:
+        """Agrupa el DataFrame de errores en {fila: [mensajes]}"""
+        return errores.groupby('fila', sort=True)['mensaje'].agg(list).to_dict()
+
     @staticmethod
     def validar_campos_comunes(registro):
         errores = []
@@ -52,6 +204,9 @@ class ValidadorRegistros:
             valor = registro.get(campo)
             if valor is not None: 
                 reg_filtrado[campo] = valor
+
+        if 'producto' in reg_filtrado:
+            reg_filtrado['producto_clave'] = ValidadorRegistros.normalizar_producto(reg_filtrado['producto'])
         
         return reg_filtrado
 